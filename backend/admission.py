@@ -0,0 +1,187 @@
+"""
+Admission control for the prediction endpoints
+Bounds the work in flight per worker process and per endpoint, so bursts
+are shed with a fast 503 + Retry-After instead of queueing behind the GIL
+until clients time out.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import jsonify
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, rows=0):
+        """
+        Raised by AdmissionController.admit() when a request is shed
+
+        Args:
+            reason (str): 'too_large', 'queue_full' or 'timeout'
+            rows (int): Batch rows the request asked for
+        """
+        super().__init__(f'Request rejected by admission control: {reason}')
+        self.reason = reason
+        self.rows = rows
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight=4, endpoint_limits=None, max_batch_rows=50000,
+                 queue_timeout=2.0, max_queued=8, retry_after=1):
+        """
+        Args:
+            max_in_flight (int): Requests executing at once in this worker
+            endpoint_limits (dict): Endpoint name -> max requests executing at once
+            max_batch_rows (int): Rows executing at once across batch requests
+            queue_timeout (float): Seconds a request may wait for a slot
+            max_queued (int): Requests allowed to wait for a slot at once
+            retry_after (int): Seconds suggested to rejected clients
+        """
+        self.max_in_flight = max_in_flight
+        self.endpoint_limits = endpoint_limits or {}
+        self.max_batch_rows = max_batch_rows
+        self.queue_timeout = queue_timeout
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._queued = 0
+        self._rows_in_flight = 0
+        self._endpoint_in_flight = {}
+        self._counters = {}
+
+    def _count(self, endpoint, outcome):
+        counters = self._counters.setdefault(endpoint, {
+            'admitted': 0, 'rejected_queue_full': 0, 'rejected_timeout': 0, 'rejected_too_large': 0
+        })
+        counters[outcome] += 1
+
+    def _has_capacity(self, endpoint, rows):
+        if self._in_flight >= self.max_in_flight:
+            return False
+        limit = self.endpoint_limits.get(endpoint)
+        if limit is not None and self._endpoint_in_flight.get(endpoint, 0) >= limit:
+            return False
+        return rows == 0 or self._rows_in_flight + rows <= self.max_batch_rows
+
+    def acquire(self, endpoint, rows=0):
+        """
+        Wait (up to queue_timeout) for a slot
+
+        Args:
+            endpoint (str): Endpoint name
+            rows (int): Batch rows the request will score (0 for single requests)
+
+        Returns:
+            str: None if admitted, otherwise the rejection reason
+                 ('too_large', 'queue_full' or 'timeout')
+        """
+        with self._lock:
+            if rows > self.max_batch_rows:
+                self._count(endpoint, 'rejected_too_large')
+                return 'too_large'
+
+            if not self._has_capacity(endpoint, rows):
+                if self._queued >= self.max_queued:
+                    self._count(endpoint, 'rejected_queue_full')
+                    return 'queue_full'
+
+                deadline = time.monotonic() + self.queue_timeout
+                self._queued += 1
+                try:
+                    while not self._has_capacity(endpoint, rows):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._count(endpoint, 'rejected_timeout')
+                            return 'timeout'
+                        self._slot_freed.wait(remaining)
+                finally:
+                    self._queued -= 1
+
+            self._in_flight += 1
+            self._rows_in_flight += rows
+            self._endpoint_in_flight[endpoint] = self._endpoint_in_flight.get(endpoint, 0) + 1
+            self._count(endpoint, 'admitted')
+            return None
+
+    def release(self, endpoint, rows=0):
+        """Free the slot taken by acquire()"""
+        with self._lock:
+            self._in_flight -= 1
+            self._rows_in_flight -= rows
+            self._endpoint_in_flight[endpoint] -= 1
+            self._slot_freed.notify_all()
+
+    @contextmanager
+    def admit(self, endpoint, rows=0):
+        """
+        Context manager holding a slot for the enclosed work
+
+        Raises:
+            AdmissionRejected: If no slot could be acquired
+        """
+        reason = self.acquire(endpoint, rows)
+        if reason:
+            raise AdmissionRejected(reason, rows)
+        try:
+            yield
+        finally:
+            self.release(endpoint, rows)
+
+    def rejection_response(self, reason, rows=0):
+        """Flask response for a shed request (413 for oversized batches, else 503)"""
+        if reason == 'too_large':
+            return jsonify({
+                'error': f'Batch of {rows} rows exceeds the limit of {self.max_batch_rows} rows'
+            }), 413
+
+        response = jsonify({
+            'error': 'Server is busy, please retry later',
+            'reason': reason
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(self.retry_after)
+        return response
+
+    def guard(self, endpoint, rows=None):
+        """
+        Decorator applying admission control to a Flask view
+
+        Args:
+            endpoint (str): Endpoint name used for limits and counters
+            rows (callable): Returns the number of batch rows in the current
+                             request (batch endpoints only)
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                n_rows = rows() if rows else 0
+                reason = self.acquire(endpoint, n_rows)
+                if reason:
+                    return self.rejection_response(reason, n_rows)
+
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    self.release(endpoint, n_rows)
+            return wrapper
+        return decorator
+
+    def get_stats(self):
+        """Current load and per-endpoint admitted / shed counters"""
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'queued': self._queued,
+                'batch_rows_in_flight': self._rows_in_flight,
+                'limits': {
+                    'max_in_flight': self.max_in_flight,
+                    'endpoint_limits': dict(self.endpoint_limits),
+                    'max_batch_rows': self.max_batch_rows,
+                    'queue_timeout': self.queue_timeout,
+                    'max_queued': self.max_queued
+                },
+                'endpoints': {endpoint: dict(counters) for endpoint, counters in self._counters.items()}
+            }
@@ -6,7 +6,20 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
-from model_handler import ModelHandler
+import threading
+import time
+import numpy as np
+from model_handler import ModelStore
+from admission import AdmissionController, AdmissionRejected
+from coalescing import SingleFlight, canonical_key
+from supported_values import SupportedValuesPayload
+from price_cube import PriceCube
+from comparables import ComparablesIndex
+from drift import DriftMonitor
+from audit_log import AuditLogger
+from inference_pool import InferencePool, WorkerError
+from shared_cache import SharedPredictionCache
+from schema import PRICE_SCHEMA, CONDITION_SCHEMA, ValidationError, compile_schema
 
 # Load environment variables
 load_dotenv()
@@ -15,14 +28,164 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Initialize model handler
+# Initialize model handler (requests read model_store.current once and use that set)
 try:
-    model_handler = ModelHandler(models_dir='models')
+    model_store = ModelStore(
+        models_dir='models',
+        segment_memory_mb=float(os.getenv('SEGMENT_MEMORY_MB', 512))
+    )
+    # Serialized once per model version
+    supported_values = SupportedValuesPayload(model_store)
+    supported_values.get_variants()
     models_loaded = True
 except Exception as e:
     print(f"⚠️  Warning: Could not load models: {e}")
     models_loaded = False
 
+def _watch_models(interval):
+    """Reload the models whenever the artifacts on disk change"""
+    while True:
+        time.sleep(interval)
+        try:
+            if model_store.reload_if_changed():
+                print(f"♻️ Models reloaded (version {model_store.current.model_version})")
+        except Exception as e:
+            print(f"⚠️  Warning: Could not reload models, keeping the loaded ones: {e}")
+
+# Check the model files for changes (MODEL_RELOAD_INTERVAL=0 disables)
+_reload_interval = float(os.getenv('MODEL_RELOAD_INTERVAL', 60))
+if models_loaded and _reload_interval > 0:
+    threading.Thread(target=_watch_models, args=(_reload_interval,), name='model-watcher', daemon=True).start()
+
+# Run the models in worker processes instead of the request threads (optional)
+inference_pool = None
+if models_loaded and int(os.getenv('INFERENCE_WORKERS', 0)) > 0:
+    try:
+        inference_pool = InferencePool(
+            model_store,
+            int(os.getenv('INFERENCE_WORKERS')),
+            max_rows=int(os.getenv('INFERENCE_MAX_ROWS', 4096)),
+            timeout=float(os.getenv('INFERENCE_TIMEOUT', 30.0)),
+            health_interval=float(os.getenv('INFERENCE_HEALTH_INTERVAL', 5.0))
+        )
+        model_store.attach_inference_pool(inference_pool.start())
+    except WorkerError as e:
+        print(f"⚠️  Warning: Could not start inference workers, predicting in-process: {e}")
+        inference_pool.close()
+        inference_pool = None
+
+# Precomputed price cube (optional, see build_price_cube.py)
+price_cube = None
+if models_loaded and os.getenv('PRICE_CUBE_DIR'):
+    try:
+        price_cube = PriceCube(
+            os.getenv('PRICE_CUBE_DIR'),
+            max_error=float(os.getenv('PRICE_CUBE_MAX_ERROR', 0.05))
+        )
+        if price_cube.model_version != model_store.current.model_version:
+            print("⚠️  Price cube was built for another model version, it will not be used")
+        else:
+            print(f"✓ Price cube loaded ({price_cube.prices.size:,} cells)")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️  Warning: Could not load price cube: {e}")
+        price_cube = None
+
+# Drift monitor over prediction inputs (needs models/drift_reference.json, written by train.py)
+drift_monitor = None
+if models_loaded:
+    try:
+        drift_monitor = DriftMonitor.from_models_dir(
+            'models',
+            window=int(os.getenv('DRIFT_WINDOW', 10000)),
+            min_observations=int(os.getenv('DRIFT_MIN_OBSERVATIONS', 200))
+        )
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️  Warning: Could not load drift reference: {e}")
+
+# Prediction audit log (optional; written by a background thread)
+audit_logger = None
+if os.getenv('AUDIT_LOG_DIR'):
+    audit_logger = AuditLogger(
+        os.getenv('AUDIT_LOG_DIR'),
+        max_queue=int(os.getenv('AUDIT_MAX_QUEUE', 10000)),
+        batch_size=int(os.getenv('AUDIT_BATCH_SIZE', 500)),
+        flush_interval=float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0)),
+        max_file_mb=float(os.getenv('AUDIT_MAX_FILE_MB', 64)),
+        max_file_age=float(os.getenv('AUDIT_MAX_FILE_AGE', 3600))
+    )
+    print(f"✓ Auditing predictions to {os.getenv('AUDIT_LOG_DIR')}")
+
+# Prediction cache shared by the worker processes on this host (optional)
+shared_cache = None
+if models_loaded and os.getenv('SHARED_CACHE_PATH'):
+    try:
+        shared_cache = SharedPredictionCache(
+            os.getenv('SHARED_CACHE_PATH'),
+            size_mb=float(os.getenv('SHARED_CACHE_MB', 64)),
+            ways=int(os.getenv('SHARED_CACHE_WAYS', 8))
+        )
+        print(f"✓ Shared prediction cache at {os.getenv('SHARED_CACHE_PATH')}")
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Warning: Could not open shared prediction cache: {e}")
+
+# Comparable-listings index (optional, see training/build_comparables.py)
+comparables_index = None
+if os.getenv('COMPARABLES_DIR'):
+    try:
+        comparables_index = ComparablesIndex(
+            os.getenv('COMPARABLES_DIR'),
+            max_k=int(os.getenv('COMPARABLES_MAX_K', 100))
+        )
+        print(f"✓ Comparables index loaded ({comparables_index.rows:,} listings)")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️  Warning: Could not load comparables index: {e}")
+        comparables_index = None
+
+def _parse_limits(value):
+    """Parse "endpoint=limit,endpoint=limit" into a dict"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        endpoint, limit = item.split('=')
+        limits[endpoint.strip()] = int(limit)
+    return limits
+
+# Admission control (per worker process)
+_max_in_flight = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', 4))
+_heavy_limit = max(1, _max_in_flight // 2)
+admission = AdmissionController(
+    max_in_flight=_max_in_flight,
+    endpoint_limits={
+        # Batch and explanation requests may not take every slot from single predictions
+        'predict_price_batch': _heavy_limit,
+        'predict_condition_batch': _heavy_limit,
+        'predict_price_sweep': _heavy_limit,
+        'explain_price': _heavy_limit,
+        'explain_condition': _heavy_limit,
+        **_parse_limits(os.getenv('ADMISSION_ENDPOINT_LIMITS', ''))
+    },
+    max_batch_rows=int(os.getenv('ADMISSION_MAX_BATCH_ROWS', 50000)),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 2.0)),
+    max_queued=int(os.getenv('ADMISSION_MAX_QUEUED', 2 * _max_in_flight)),
+    retry_after=int(os.getenv('ADMISSION_RETRY_AFTER', 1))
+)
+
+def _batch_rows():
+    """Number of instances in the current request body (for the batch row budget)"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and isinstance(data.get('instances'), list):
+        return len(data['instances'])
+    return 1
+
+# Maximum grid points of a /predict/price/sweep request
+SWEEP_MAX_POINTS = int(os.getenv('SWEEP_MAX_POINTS', 10000))
+
+# Coalesces identical concurrent single predictions
+single_flight = SingleFlight()
+
+# Request schemas (compiled once at startup)
+price_schema = compile_schema(PRICE_SCHEMA)
+condition_schema = compile_schema(CONDITION_SCHEMA)
+
 # ==================== ROUTES ====================
 
 @app.route('/', methods=['GET'])
@@ -37,7 +200,15 @@ def home():
             'GET /health': 'Health check',
             'POST /predict/price': 'Predict vehicle price',
             'POST /predict/condition': 'Predict vehicle condition',
-            'GET /supported-values': 'Get supported categorical values'
+            'POST /predict/price/batch': 'Predict prices for a batch of vehicles',
+            'POST /predict/condition/batch': 'Predict conditions for a batch of vehicles',
+            'POST /predict/price/sweep': 'Predict prices over an odometer/year grid',
+            'POST /explain/price': 'Per-feature contributions to the predicted price',
+            'POST /explain/condition': 'Per-feature contributions to the predicted condition',
+            'POST /comparables': 'Most similar historical listings',
+            'GET /drift': 'Drift of prediction inputs from the training data',
+            'GET /supported-values': 'Get supported categorical values',
+            'GET /metrics': 'Serving counters (admission, coalescing, supported values, caches, segment models, audit log, inference pool)'
         }
     })
 
@@ -49,6 +220,123 @@ def health():
         'models_loaded': models_loaded
     })
 
+def _get_instances(data):
+    """
+    Extract the list of vehicles from a request body
+    
+    Accepts either a single vehicle object or {"instances": [...]}.
+    
+    Returns:
+        tuple: (list of vehicle dicts, whether the request was a batch)
+    """
+    if isinstance(data, dict) and 'instances' in data:
+        instances = data['instances']
+        if not isinstance(instances, list) or not instances:
+            raise ValueError('"instances" must be a non-empty list of objects')
+        return instances, True
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    return [data], False
+
+def _parse_request(schema, batch_only=False):
+    """
+    Parse and validate the JSON body against a compiled schema
+    
+    All inputs are checked before any model work is done.
+    
+    Returns:
+        tuple: (normalized instances, is_batch, error response or None)
+    """
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return None, False, (jsonify({'error': 'No input data provided'}), 400)
+    
+    try:
+        instances, is_batch = _get_instances(data)
+        if batch_only and not is_batch:
+            raise ValueError('Batch requests must be of the form {"instances": [...]}')
+        if is_batch:
+            instances = schema.validate_batch(instances)
+        else:
+            instances = [schema.validate(instances[0])]
+    except ValidationError as e:
+        return None, False, (jsonify({'error': e.summary(), 'details': e.errors}), 400)
+    except ValueError as e:
+        return None, False, (jsonify({'error': str(e)}), 400)
+    
+    return instances, is_batch, None
+
+def _observe_drift(instances, sent=None):
+    """
+    Feed validated prediction inputs to the drift monitor
+    
+    Only the fields the client sent are observed: sent defaults to the
+    instances of the request body, before schema defaults were filled in.
+    """
+    if drift_monitor:
+        if sent is None:
+            sent, _ = _get_instances(request.get_json(silent=True))
+        drift_monitor.observe(instances, sent)
+
+def _audit(endpoint, inputs, outputs, model_version, started):
+    """Queue an audit record of a served prediction (never blocks)"""
+    if audit_logger:
+        audit_logger.record(
+            endpoint, inputs, outputs, model_version,
+            (time.perf_counter() - started) * 1000
+        )
+
+def _admitted(endpoint, predict_fn, data):
+    """Run a prediction while holding an admission slot"""
+    with admission.admit(endpoint):
+        return predict_fn(data)
+
+def _predict_single(endpoint, models, predict_fn, record):
+    """
+    Predict one validated input
+    
+    Answered from the shared cache when another worker (or this one) has
+    already predicted it with the same models. Otherwise identical
+    concurrent requests share one computation, only that computation takes
+    an admission slot, and its result is cached.
+    
+    Args:
+        endpoint (str): Endpoint name
+        models (ModelHandler): The request's model set (model_store.current)
+        predict_fn (callable): Bound prediction method of that set
+        record (dict): Validated input
+    """
+    key = canonical_key(record)
+    if shared_cache:
+        result = shared_cache.get(endpoint, key, models.model_version)
+        if result is not None:
+            return result
+    
+    def compute():
+        result = _admitted(endpoint, predict_fn, record)
+        if shared_cache:
+            shared_cache.put(endpoint, key, models.model_version, result)
+        return result
+    
+    # Requests on different model sets (during a reload) never share a result
+    return single_flight.do(endpoint, f"{models.model_version}:{key}", compute)
+
+def _models_not_loaded():
+    return jsonify({
+        'error': 'Models not loaded. Please train and export models first.'
+    }), 500
+
+def _workers_unavailable(e):
+    """503 with Retry-After when no inference worker could serve the request"""
+    response = jsonify({
+        'error': f'Inference workers unavailable, please retry later: {e}',
+        'reason': 'workers_unavailable'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(inference_pool.retry_after if inference_pool else 1)
+    return response
+
 @app.route('/predict/price', methods=['POST'])
 def predict_price():
     """
@@ -72,37 +360,44 @@ def predict_price():
         "region": "los angeles",
         "condition": "good"
     }
+    
+    Only year, odometer, manufacturer, fuel and transmission are required;
+    the other fields fall back to the defaults in schema.PRICE_SCHEMA.
     """
     if not models_loaded:
-        return jsonify({
-            'error': 'Models not loaded. Please train and export models first.'
-        }), 500
+        return _models_not_loaded()
     
+    started = time.perf_counter()
+    models = model_store.current
     try:
-        # Get JSON data from request
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({'error': 'No input data provided'}), 400
-        
-        # Validate required fields
-        required_fields = ['year', 'odometer', 'manufacturer', 'fuel', 'transmission']
-        missing_fields = [field for field in required_fields if field not in data]
+        instances, _, error = _parse_request(price_schema)
+        if error:
+            return error
+        _observe_drift(instances)
         
-        if missing_fields:
+        # Common configurations are answered from the precomputed cube
+        result = price_cube.lookup(instances[0], models) if price_cube else None
+        if result:
+            _audit('predict_price', instances[0], result, models.model_version, started)
             return jsonify({
-                'error': f'Missing required fields: {", ".join(missing_fields)}'
-            }), 400
+                'success': True,
+                'prediction': result,
+                'input': request.get_json()
+            })
         
-        # Make prediction
-        result = model_handler.predict_price(data)
+        result = _predict_single('predict_price', models, models.predict_price, instances[0])
+        _audit('predict_price', instances[0], result, models.model_version, started)
         
         return jsonify({
             'success': True,
             'prediction': result,
-            'input': data
+            'input': request.get_json()
         })
         
+    except AdmissionRejected as e:
+        return admission.rejection_response(e.reason)
+    except WorkerError as e:
+        return _workers_unavailable(e)
     except Exception as e:
         return jsonify({
             'error': f'Prediction failed: {str(e)}'
@@ -131,63 +426,306 @@ def predict_condition():
         "state": "ca",
         "region": "los angeles"
     }
+    
+    Only price, year, odometer, manufacturer, fuel and transmission are
+    required; the other fields fall back to the defaults in
+    schema.CONDITION_SCHEMA.
     """
     if not models_loaded:
+        return _models_not_loaded()
+    
+    started = time.perf_counter()
+    models = model_store.current
+    try:
+        instances, _, error = _parse_request(condition_schema)
+        if error:
+            return error
+        _observe_drift(instances)
+        
+        result = _predict_single('predict_condition', models, models.predict_condition, instances[0])
+        _audit('predict_condition', instances[0], result, models.model_version, started)
+        
         return jsonify({
-            'error': 'Models not loaded. Please train and export models first.'
+            'success': True,
+            'prediction': result,
+            'input': request.get_json()
+        })
+        
+    except AdmissionRejected as e:
+        return admission.rejection_response(e.reason)
+    except WorkerError as e:
+        return _workers_unavailable(e)
+    except Exception as e:
+        return jsonify({
+            'error': f'Prediction failed: {str(e)}'
         }), 500
+
+@app.route('/predict/price/batch', methods=['POST'])
+@admission.guard('predict_price_batch', rows=_batch_rows)
+def predict_price_batch():
+    """
+    Predict prices for a batch of vehicles
+    
+    Expected JSON body: {"instances": [<same object as /predict/price>, ...]}
+    Every instance is validated before any prediction is made; errors are
+    reported per instance.
+    """
+    if not models_loaded:
+        return _models_not_loaded()
     
+    started = time.perf_counter()
+    models = model_store.current
     try:
-        # Get JSON data from request
-        data = request.get_json()
+        instances, _, error = _parse_request(price_schema, batch_only=True)
+        if error:
+            return error
+        _observe_drift(instances)
         
-        if not data:
-            return jsonify({'error': 'No input data provided'}), 400
+        predictions = models.predict_price_batch(instances)
+        _audit('predict_price_batch', instances, predictions, models.model_version, started)
         
-        # Validate required fields
-        required_fields = ['price', 'year', 'odometer', 'manufacturer', 'fuel', 'transmission']
-        missing_fields = [field for field in required_fields if field not in data]
+        return jsonify({
+            'success': True,
+            'predictions': predictions
+        })
         
-        if missing_fields:
-            return jsonify({
-                'error': f'Missing required fields: {", ".join(missing_fields)}'
-            }), 400
+    except WorkerError as e:
+        return _workers_unavailable(e)
+    except Exception as e:
+        return jsonify({
+            'error': f'Prediction failed: {str(e)}'
+        }), 500
+
+@app.route('/predict/condition/batch', methods=['POST'])
+@admission.guard('predict_condition_batch', rows=_batch_rows)
+def predict_condition_batch():
+    """
+    Predict conditions for a batch of vehicles
+    
+    Expected JSON body: {"instances": [<same object as /predict/condition>, ...]}
+    """
+    if not models_loaded:
+        return _models_not_loaded()
+    
+    started = time.perf_counter()
+    models = model_store.current
+    try:
+        instances, _, error = _parse_request(condition_schema, batch_only=True)
+        if error:
+            return error
+        _observe_drift(instances)
         
-        # Make prediction
-        result = model_handler.predict_condition(data)
+        predictions = models.predict_condition_batch(instances)
+        _audit('predict_condition_batch', instances, predictions, models.model_version, started)
         
         return jsonify({
             'success': True,
-            'prediction': result,
-            'input': data
+            'predictions': predictions
         })
         
+    except WorkerError as e:
+        return _workers_unavailable(e)
     except Exception as e:
         return jsonify({
             'error': f'Prediction failed: {str(e)}'
         }), 500
 
-@app.route('/supported-values', methods=['GET'])
-def get_supported_values():
-    """Get all supported categorical values for inputs"""
+@app.route('/predict/price/sweep', methods=['POST'])
+def predict_price_sweep():
+    """
+    Predict prices over a grid of one or two numeric features
+    
+    Expected JSON body:
+    {
+        "vehicle": {<same object as /predict/price>},
+        "axes": [
+            {"feature": "odometer", "start": 0, "stop": 300000, "step": 10000},
+            {"feature": "year", "values": [2010, 2013, 2016, 2019]}
+        ]
+    }
+    
+    Sweepable features: year, odometer, lat, long. The response holds the
+    axis values and a nested list of predicted prices indexed [axis1][axis2].
+    """
     if not models_loaded:
+        return _models_not_loaded()
+    
+    started = time.perf_counter()
+    models = model_store.current
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('vehicle'), dict):
+            return jsonify({'error': 'Request body must contain a "vehicle" object and "axes"'}), 400
+        
+        try:
+            vehicle = price_schema.validate(data['vehicle'])
+            axes = price_schema.validate_axes(data.get('axes'), SWEEP_MAX_POINTS)
+        except ValidationError as e:
+            return jsonify({'error': e.summary(), 'details': e.errors}), 400
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        _observe_drift([vehicle], [data['vehicle']])
+        
+        n_points = int(np.prod([len(values) for _, values in axes]))
+        with admission.admit('predict_price_sweep', rows=n_points):
+            result = models.predict_price_grid(vehicle, axes)
+        _audit('predict_price_sweep', {'vehicle': vehicle, 'axes': data['axes']}, result, models.model_version, started)
+        
         return jsonify({
-            'error': 'Models not loaded'
+            'success': True,
+            'sweep': result
+        })
+        
+    except AdmissionRejected as e:
+        return admission.rejection_response(e.reason, e.rows)
+    except WorkerError as e:
+        return _workers_unavailable(e)
+    except Exception as e:
+        return jsonify({
+            'error': f'Sweep failed: {str(e)}'
         }), 500
+
+def _explain(schema, explain_fn):
+    """Shared request handling for the explanation endpoints"""
+    if not models_loaded:
+        return _models_not_loaded()
     
     try:
-        categories = model_handler.get_valid_categories()
-        feature_info = model_handler.get_feature_info()
+        instances, is_batch, error = _parse_request(schema)
+        if error:
+            return error
+        
+        explanations = explain_fn(model_store.current, instances)
+        
+        if is_batch:
+            return jsonify({'success': True, 'explanations': explanations})
+        return jsonify({'success': True, 'explanation': explanations[0], 'input': request.get_json()})
+        
+    except Exception as e:
+        return jsonify({
+            'error': f'Explanation failed: {str(e)}'
+        }), 500
+
+@app.route('/explain/price', methods=['POST'])
+@admission.guard('explain_price', rows=_batch_rows)
+def explain_price():
+    """
+    Explain a price prediction as per-feature contributions (USD)
+    
+    Expected JSON body: same as /predict/price, or {"instances": [...]}
+    for a batch. The base value plus all contributions equals the
+    predicted price.
+    """
+    return _explain(price_schema, lambda models, instances: models.explain_price(instances))
+
+@app.route('/explain/condition', methods=['POST'])
+@admission.guard('explain_condition', rows=_batch_rows)
+def explain_condition():
+    """
+    Explain a condition prediction as per-feature, per-class contributions
+    
+    Expected JSON body: same as /predict/condition, or {"instances": [...]}
+    for a batch.
+    """
+    return _explain(condition_schema, lambda models, instances: models.explain_condition(instances))
+
+@app.route('/comparables', methods=['POST'])
+def find_comparables():
+    """
+    Find the historical listings most similar to a vehicle
+    
+    Expected JSON body:
+    {
+        "vehicle": {"manufacturer": "toyota", "type": "sedan", "year": 2015,
+                    "odometer": 60000, "lat": 34.05, "long": -118.24, "condition": "good"},
+        "k": 10,
+        "filters": {"fuel": "gas"}
+    }
+    
+    Listings always match the vehicle's manufacturer and type (and every
+    filter) exactly; among those the nearest by year, mileage, location and
+    condition are returned. Omitted numeric fields are ignored.
+    """
+    if comparables_index is None:
+        return jsonify({
+            'error': 'Comparables index not configured'
+        }), 503
+    
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('vehicle'), dict):
+            return jsonify({'error': 'Request body must contain a "vehicle" object'}), 400
+        
+        with admission.admit('comparables'):
+            try:
+                result = comparables_index.query(data['vehicle'], k=data.get('k', 10), filters=data.get('filters'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
         return jsonify({
             'success': True,
-            'valid_categories': categories,
-            'feature_info': feature_info
+            **result
         })
+        
+    except AdmissionRejected as e:
+        return admission.rejection_response(e.reason, e.rows)
+    except Exception as e:
+        return jsonify({
+            'error': f'Comparables lookup failed: {str(e)}'
+        }), 500
+
+@app.route('/supported-values', methods=['GET'])
+def get_supported_values():
+    """
+    Get all supported categorical values for inputs
+    
+    Served from bytes prebuilt at model load, with a strong ETag
+    (If-None-Match -> 304) and precomputed gzip/brotli variants.
+    """
+    if not models_loaded:
+        return jsonify({
+            'error': 'Models not loaded'
+        }), 500
+    
+    try:
+        return supported_values.response()
     except Exception as e:
         return jsonify({
             'error': f'Failed to retrieve supported values: {str(e)}'
         }), 500
 
+@app.route('/drift', methods=['GET'])
+def drift():
+    """
+    Drift of recent prediction inputs from the training data
+    
+    Per-feature population stability index (PSI) over the last one to two
+    windows of requests seen by this worker process, with quantiles
+    (numeric features) and unknown-value rates (categorical features).
+    """
+    if drift_monitor is None:
+        return jsonify({
+            'error': 'Drift reference not found. Re-export the models with train.py or run drift_reference.py.'
+        }), 503
+    
+    return jsonify(drift_monitor.report())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Serving metrics for this worker process"""
+    return jsonify({
+        'admission': admission.get_stats(),
+        'coalescing': single_flight.get_stats(),
+        'supported_values': supported_values.get_stats() if models_loaded else None,
+        'price_cube': price_cube.get_stats() if price_cube else None,
+        'segments': model_store.current.segment_cache.get_stats() if models_loaded and model_store.current.segments else None,
+        'comparables': comparables_index.get_stats() if comparables_index else None,
+        'audit_log': audit_logger.get_stats() if audit_logger else None,
+        'inference_pool': inference_pool.get_stats() if inference_pool else None,
+        'shared_cache': shared_cache.get_stats() if shared_cache else None
+    })
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(e):
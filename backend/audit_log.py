@@ -0,0 +1,249 @@
+"""
+Asynchronous prediction audit log
+Request threads only put a record (inputs, outputs, model version, latency)
+on a bounded in-memory queue; when the queue is full the record is dropped
+and counted instead of blocking the request. A background thread collects
+records into batches and appends each batch to the current log file as one
+frame:
+
+    file  := MAGIC frame*
+    frame := <uint32 payload length> <uint32 record count> <uint32 crc32> payload
+    payload = zlib(newline-separated JSON records)
+
+Files are rotated by size and age and never deleted here. A crash can only
+leave a truncated last frame, which the reader skips.
+
+Usage (from the backend directory):
+    python audit_log.py audit/*.audit --endpoint predict_price
+"""
+import argparse
+import atexit
+import glob
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+
+MAGIC = b'VPAUDIT1'
+FRAME_HEADER = struct.Struct('<III')
+FILE_SUFFIX = '.audit'
+
+
+def _json_default(value):
+    """Serialize numpy scalars and arrays"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+class AuditLogger:
+    def __init__(self, log_dir, max_queue=10000, batch_size=500, flush_interval=1.0,
+                 max_file_mb=64, max_file_age=3600, compression_level=6):
+        """
+        Args:
+            log_dir (str): Directory for the log files (created if missing)
+            max_queue (int): Records held in memory before new ones are dropped
+            batch_size (int): Largest number of records per frame
+            flush_interval (float): Seconds a record may wait for its batch to fill
+            max_file_mb (float): Rotate after a file reaches this size
+            max_file_age (float): Rotate after a file has been open this many seconds
+            compression_level (int): zlib level of the frame payloads
+        """
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_mb * 1024 ** 2
+        self.max_file_age = max_file_age
+        self.compression_level = compression_level
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stats = {'records': 0, 'dropped': 0, 'written': 0, 'frames': 0, 'files': 0, 'write_errors': 0}
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._file = None
+        self._file_opened = 0.0
+        self._file_sequence = 0
+        atexit.register(self.close)
+
+    def _ensure_writer(self):
+        """Start the writer thread (again in a forked worker process)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._file = None
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def record(self, endpoint, inputs, outputs, model_version, latency_ms, **extra):
+        """
+        Queue one audit record without blocking
+
+        Args:
+            endpoint (str): Endpoint name, e.g. predict_price
+            inputs: Validated inputs (a dict, or a list for batches)
+            outputs: Prediction result(s) as returned to the client
+            model_version (str): ModelHandler.model_version at prediction time
+            latency_ms (float): Time spent handling the request
+            **extra: Additional fields stored with the record
+
+        Returns:
+            bool: False if the queue was full and the record was dropped
+        """
+        self._ensure_writer()
+        entry = {
+            'ts': time.time(),
+            'endpoint': endpoint,
+            'model_version': model_version,
+            'latency_ms': round(latency_ms, 3),
+            'inputs': inputs,
+            'outputs': outputs,
+            **extra
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+            return False
+        with self._lock:
+            self._stats['records'] += 1
+        return True
+
+    def _next_batch(self):
+        """Block for the first record, then collect more until the batch is full or due"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _open_file(self):
+        self._file_sequence += 1
+        name = f"audit-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._file_sequence}{FILE_SUFFIX}"
+        self._file = open(self.log_dir / name, 'ab')
+        self._file.write(MAGIC)
+        self._file.flush()
+        self._file_opened = time.monotonic()
+        with self._lock:
+            self._stats['files'] += 1
+
+    def _rotate_if_due(self):
+        if self._file is None:
+            return
+        if self._file.tell() >= self.max_file_bytes or time.monotonic() - self._file_opened >= self.max_file_age:
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, batch):
+        payload = zlib.compress(
+            b'\n'.join(json.dumps(entry, default=_json_default).encode() for entry in batch),
+            self.compression_level
+        )
+        if self._file is None:
+            self._open_file()
+        self._file.write(FRAME_HEADER.pack(len(payload), len(batch), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        with self._lock:
+            self._stats['written'] += len(batch)
+            self._stats['frames'] += 1
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            try:
+                if batch:
+                    self._write_batch(batch)
+                self._rotate_if_due()
+            except (OSError, TypeError, ValueError) as e:
+                # The batch is lost; keep serving and count it
+                print(f"⚠️ Audit log write failed ({len(batch)} records): {e}")
+                with self._lock:
+                    self._stats['write_errors'] += len(batch)
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self, timeout=5.0):
+        """Write the queued records and stop the writer thread"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def get_stats(self):
+        """Queued, written and dropped record counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_capacity'] = self._queue.maxsize
+        return stats
+
+
+def read_log(path):
+    """
+    Yield the records of one audit log file, oldest first
+
+    A truncated or corrupt trailing frame (e.g. after a crash) ends the
+    file with a warning.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an audit log")
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if not header:
+                return
+            if len(header) < FRAME_HEADER.size:
+                print(f"⚠️ {path}: truncated frame header", file=sys.stderr)
+                return
+            length, count, crc = FRAME_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                print(f"⚠️ {path}: truncated or corrupt frame", file=sys.stderr)
+                return
+            for line in zlib.decompress(payload).split(b'\n'):
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print audit log records as JSON lines')
+    parser.add_argument('files', nargs='+', help='Audit log files (globs are expanded)')
+    parser.add_argument('--endpoint', default=None, help='Only records of this endpoint')
+    parser.add_argument('--since', type=float, default=None, help='Only records at or after this Unix time')
+    args = parser.parse_args()
+
+    paths = sorted(path for pattern in args.files for path in (glob.glob(pattern) or [pattern]))
+    for path in paths:
+        for entry in read_log(path):
+            if args.endpoint and entry['endpoint'] != args.endpoint:
+                continue
+            if args.since is not None and entry['ts'] < args.since:
+                continue
+            print(json.dumps(entry))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Build the materialized price lookup cube (offline job)
+
+Usage (from the backend directory):
+    python build_price_cube.py                      # default cube
+    python build_price_cube.py --config cube.json   # custom dimensions
+
+Serve it by pointing PRICE_CUBE_DIR at the output directory. Rebuild after
+every model update: a cube built for another model version is ignored.
+"""
+import argparse
+import json
+import time
+from model_handler import ModelHandler
+from price_cube import build_cube
+
+# Dimensions of the cube and the fixed values of every other input.
+# A dimension is "all" (every value the encoder knows), a list of values,
+# or {"start": x, "stop": y} for years. Requests only hit the cube when
+# their non-dimension fields equal the fixed values (the API defaults).
+DEFAULT_CONFIG = {
+    'dimensions': {
+        'manufacturer': 'all',
+        'type': ['sedan', 'SUV', 'pickup', 'truck', 'coupe', 'hatchback'],
+        'year': {'start': 2005, 'stop': 2021},
+        'condition': 'all',
+        'state': ['ca', 'fl', 'tx', 'ny', 'oh', 'mi']
+    },
+    'odometer_edges': list(range(0, 300001, 20000)),
+    'samples_per_bucket': 3,
+    # Random odometer values per bucket checked against live inference
+    'validation_samples': 16,
+    'fixed': {
+        'fuel': 'gas',
+        'transmission': 'automatic',
+        'lat': 33.7490,
+        'long': -84.3880,
+        'title_status': 'clean',
+        'drive': 'fwd',
+        'size': 'mid-size',
+        'paint_color': 'white',
+        'region': 'los angeles'
+    }
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute the price lookup cube')
+    parser.add_argument('--config', help='JSON file with dimensions, odometer_edges, fixed, samples_per_bucket and validation_samples')
+    parser.add_argument('--models-dir', default='models', help='Directory with the trained models')
+    parser.add_argument('--output', default='models/price_cube', help='Output directory')
+    args = parser.parse_args()
+
+    config = DEFAULT_CONFIG
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+
+    model_handler = ModelHandler(models_dir=args.models_dir)
+
+    print(f"\n🧊 Building price cube in {args.output}")
+    started = time.perf_counter()
+    index = build_cube(model_handler, config, args.output)
+
+    print(f"\n✅ Built {' x '.join(map(str, index['shape']))} cube in {time.perf_counter() - started:.1f}s")
+    print(f"Model version: {index['model_version']}")
+    print("Largest relative error vs live inference per cell (p50 / p90 / p99): " + " / ".join(
+        f"{value:.2%}" for value in index['error_quantiles'].values()
+    ))
+
+
+if __name__ == '__main__':
+    main()
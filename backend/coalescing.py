@@ -0,0 +1,94 @@
+"""
+Single-flight coalescing of identical in-flight predictions
+Concurrent requests with the same canonical input wait on one computation
+and share its result, so a burst of identical payloads costs one
+encode + predict.
+"""
+import json
+import threading
+
+
+def canonical_key(data):
+    """
+    Canonical string for a (validated) input dict
+
+    Keys are sorted and numbers are compared as floats, so 50000 and
+    50000.0 coalesce.
+    """
+    canonical = {
+        key: float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+        for key, value in data.items()
+    }
+    return json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """Tracks in-flight computations per (namespace, key)"""
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}
+
+    def do(self, namespace, key, fn):
+        """
+        Run fn() unless an identical call is already in flight
+
+        The first caller (leader) runs fn(); callers arriving while it runs
+        (followers) wait and receive the same result, or the same exception.
+
+        Args:
+            namespace (str): Endpoint name (keys are only shared within it)
+            key (str): Canonical input, see canonical_key()
+            fn (callable): Computation to run
+
+        Returns:
+            The result of fn()
+        """
+        with self._lock:
+            stats = self._stats.setdefault(namespace, {'requests': 0, 'executions': 0, 'coalesced': 0})
+            stats['requests'] += 1
+            call = self._calls.get((namespace, key))
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[(namespace, key)] = call
+                stats['executions'] += 1
+            else:
+                stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[(namespace, key)]
+            call.done.set()
+
+        return call.result
+
+    def get_stats(self):
+        """Per-endpoint request, execution and coalescing counts"""
+        with self._lock:
+            return {
+                namespace: {
+                    **stats,
+                    'in_flight': sum(1 for ns, _ in self._calls if ns == namespace),
+                    'coalescing_ratio': stats['coalesced'] / stats['requests'] if stats['requests'] else 0.0
+                }
+                for namespace, stats in self._stats.items()
+            }
@@ -0,0 +1,232 @@
+"""
+Comparable listings from a precomputed nearest-neighbour index
+The index (see training/build_comparables.py) holds one KD-tree per
+manufacturer/type group over scaled year, mileage, location and condition.
+Its arrays are memory-mapped read-only, so every worker process shares the
+same pages, and a query visits only the tree nodes that can still contain
+one of the k nearest listings.
+"""
+import heapq
+import json
+import math
+import threading
+import numpy as np
+from pathlib import Path
+
+INDEX_FILE = 'index.json'
+
+# Point dimensions, in the order written by the builder
+DIMENSIONS = ('year', 'odometer', 'x', 'y', 'condition')
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat, long, lats, longs):
+    """Great-circle distance (km) from one point to arrays of points"""
+    lat, long = math.radians(lat), math.radians(long)
+    lats, longs = np.radians(lats), np.radians(longs)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((longs - long) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class ComparablesIndex:
+    def __init__(self, index_dir, max_k=100):
+        """
+        Memory-map an index written by build_comparables.py
+
+        Args:
+            index_dir (str): Directory holding index.json and the arrays
+            max_k (int): Largest number of comparables per query
+        """
+        self.max_k = max_k
+
+        index_dir = Path(index_dir)
+        with open(index_dir / INDEX_FILE) as f:
+            index = json.load(f)
+        self.points = np.load(index_dir / 'points.npy', mmap_mode='r')
+        self.numeric = np.load(index_dir / 'numeric.npy', mmap_mode='r')
+        self.codes = np.load(index_dir / 'codes.npy', mmap_mode='r')
+        self.node_ranges = np.load(index_dir / 'node_ranges.npy', mmap_mode='r')
+        self.node_bounds = np.load(index_dir / 'node_bounds.npy', mmap_mode='r')
+
+        self.built_at = index['built_at']
+        self.units = index['units']
+        self.km_per_degree = index['km_per_degree']
+        self.condition_rank = {condition: level for level, condition in enumerate(index['condition_order'])}
+        self.group_by = index['group_by']
+        self.numeric_columns = index['numeric_columns']
+        self.categorical_columns = index['categorical_columns']
+        self.vocab = index['vocab']
+        self.code_of = {
+            column: {value: code for code, value in enumerate(values)}
+            for column, values in self.vocab.items()
+        }
+        self.groups = index['groups']
+
+        self._lock = threading.Lock()
+        self._stats = {'queries': 0, 'empty': 0, 'nodes_visited': 0, 'rows_scanned': 0}
+
+    @property
+    def rows(self):
+        return len(self.points)
+
+    def _query_point(self, vehicle):
+        """Scaled query coordinates and per-dimension weights (0 for missing values)"""
+        point = np.zeros(len(DIMENSIONS))
+        weights = np.zeros(len(DIMENSIONS))
+
+        for position, column in enumerate(('year', 'odometer')):
+            if vehicle.get(column) is not None:
+                point[position] = float(vehicle[column]) / self.units[column]
+                weights[position] = 1.0
+
+        has_lat, has_long = vehicle.get('lat') is not None, vehicle.get('long') is not None
+        if has_lat != has_long:
+            raise ValueError('lat and long must be given together')
+        if has_lat:
+            lat, long = float(vehicle['lat']), float(vehicle['long'])
+            if not -90 <= lat <= 90 or not -180 <= long <= 180:
+                raise ValueError('lat/long out of range')
+            point[2] = long * self.km_per_degree * math.cos(math.radians(lat)) / self.units['location_km']
+            point[3] = lat * self.km_per_degree / self.units['location_km']
+            weights[2:4] = 1.0
+
+        if vehicle.get('condition') is not None:
+            if vehicle['condition'] not in self.condition_rank:
+                raise ValueError(f"Unknown condition '{vehicle['condition']}'")
+            point[4] = self.condition_rank[vehicle['condition']] / self.units['condition']
+            weights[4] = 1.0
+        return point, weights
+
+    def _filter_codes(self, filters):
+        """Exact-match filters as (column position, code); None if a value never occurs"""
+        conditions = []
+        for column, value in (filters or {}).items():
+            if column not in self.code_of or column in self.group_by:
+                raise ValueError(f"Cannot filter on '{column}'")
+            code = self.code_of[column].get(str(value))
+            if code is None:
+                return None
+            conditions.append((self.categorical_columns.index(column), code))
+        return conditions
+
+    def _search(self, first_node, n_nodes, point, weights, conditions, k):
+        """Best-first KD-tree search; returns [(squared distance, row)] nearest first"""
+        nearest = []  # max-heap of (-squared distance, row)
+        frontier = [(0.0, 0)]
+        nodes_visited = rows_scanned = 0
+
+        while frontier:
+            bound, node = heapq.heappop(frontier)
+            if len(nearest) == k and bound > -nearest[0][0]:
+                break
+            nodes_visited += 1
+            left = 2 * node + 1
+
+            if left < n_nodes:
+                for child in (left, left + 1):
+                    start, end = self.node_ranges[first_node + child]
+                    if end > start:
+                        low, high = self.node_bounds[first_node + child]
+                        gap = np.maximum(np.maximum(low - point, point - high), 0.0)
+                        heapq.heappush(frontier, (float(np.dot(weights, gap * gap)), child))
+                continue
+
+            start, end = self.node_ranges[first_node + node]
+            rows_scanned += end - start
+            distances = ((self.points[start:end] - point) ** 2) @ weights
+            keep = np.ones(end - start, dtype=bool)
+            for column, code in conditions:
+                keep &= self.codes[start:end, column] == code
+            for offset in np.flatnonzero(keep):
+                entry = (-float(distances[offset]), start + int(offset))
+                if len(nearest) < k:
+                    heapq.heappush(nearest, entry)
+                elif entry > nearest[0]:
+                    heapq.heapreplace(nearest, entry)
+
+        with self._lock:
+            self._stats['nodes_visited'] += nodes_visited
+            self._stats['rows_scanned'] += int(rows_scanned)
+        return sorted((-distance, row) for distance, row in nearest)
+
+    def query(self, vehicle, k=10, filters=None):
+        """
+        The k listings nearest to a vehicle in the same manufacturer/type group
+
+        Args:
+            vehicle (dict): manufacturer and type (required); year, odometer,
+                            lat/long and condition are used when present
+            k (int): Number of comparables
+            filters (dict): Exact values of other categorical columns, e.g. {"state": "ca"}
+
+        Returns:
+            dict: Comparables (nearest first) and a summary of their prices
+
+        Raises:
+            ValueError: Invalid vehicle, k or filters
+        """
+        if not isinstance(vehicle, dict):
+            raise ValueError('vehicle must be an object')
+        missing = [column for column in self.group_by if not isinstance(vehicle.get(column), str)]
+        if missing:
+            raise ValueError(f"Missing field(s): {', '.join(missing)}")
+        if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= self.max_k:
+            raise ValueError(f'k must be an integer between 1 and {self.max_k}')
+        if filters is not None and not isinstance(filters, dict):
+            raise ValueError('filters must be an object')
+
+        point, weights = self._query_point(vehicle)
+        conditions = self._filter_codes(filters)
+        group = self.groups.get('|'.join(vehicle[column] for column in self.group_by))
+
+        with self._lock:
+            self._stats['queries'] += 1
+        nearest = []
+        if group is not None and conditions is not None:
+            first_node, n_nodes = group['nodes']
+            nearest = self._search(first_node, n_nodes, point, weights, conditions, k)
+        if not nearest:
+            with self._lock:
+                self._stats['empty'] += 1
+            return {'comparables': [], 'group_size': group['rows'] if group else 0, 'price_summary': None}
+
+        rows = np.array([row for _, row in nearest])
+        numeric = np.asarray(self.numeric[rows], dtype=np.float64)
+        codes = np.asarray(self.codes[rows])
+        distances_km = None
+        if weights[2]:
+            lats, longs = numeric[:, self.numeric_columns.index('lat')], numeric[:, self.numeric_columns.index('long')]
+            distances_km = haversine_km(float(vehicle['lat']), float(vehicle['long']), lats, longs)
+
+        comparables = []
+        for position, (distance, _) in enumerate(nearest):
+            listing = {column: round(float(numeric[position, i]), 4) for i, column in enumerate(self.numeric_columns)}
+            listing['year'] = int(listing['year'])
+            listing.update({
+                column: self.vocab[column][codes[position, i]] for i, column in enumerate(self.categorical_columns)
+            })
+            listing['distance'] = round(math.sqrt(distance), 4)
+            if distances_km is not None:
+                listing['distance_km'] = round(float(distances_km[position]), 1)
+            comparables.append(listing)
+
+        prices = numeric[:, self.numeric_columns.index('price')]
+        return {
+            'comparables': comparables,
+            'group_size': group['rows'],
+            'price_summary': {
+                'median': float(np.median(prices)),
+                'p25': float(np.percentile(prices, 25)),
+                'p75': float(np.percentile(prices, 75))
+            }
+        }
+
+    def get_stats(self):
+        """Query counters and the index size"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['rows'] = self.rows
+        stats['groups'] = len(self.groups)
+        stats['built_at'] = self.built_at
+        return stats
@@ -0,0 +1,331 @@
+"""
+Streaming drift monitor over prediction inputs
+Every /predict/* request is folded into fixed-size, mergeable sketches: a
+histogram on the training data's quantile bin edges for each numeric feature,
+and for each categorical one exact counts of the reference's most common
+values (plus one "other" bucket) with a Misra-Gries heavy-hitter summary of
+the values never seen in training. They are compared with the reference
+written at training time (training/drift_reference.py) using the population
+stability index (PSI).
+
+Sketches cover the current window of requests and the one before it, so
+scores follow recent traffic while memory stays constant.
+"""
+import bisect
+import json
+import math
+import threading
+from pathlib import Path
+
+REFERENCE_FILE = 'drift_reference.json'
+
+# PSI above which a feature is reported as drifting
+PSI_MODERATE = 0.1
+PSI_DRIFT = 0.25
+
+# Smallest bucket share used in PSI (avoids log(0) for empty buckets)
+PSI_FLOOR = 1e-4
+
+# Reference values counted exactly per categorical feature (the rest share one bucket)
+REFERENCE_BUCKETS = 32
+
+# Unknown values tracked per categorical feature
+HEAVY_HITTERS = 64
+
+# Values reported in the top / unknown lists
+TOP_VALUES = 5
+
+
+def psi(expected, actual):
+    """Population stability index between two lists of bucket counts"""
+    expected_total, actual_total = sum(expected), sum(actual)
+    score = 0.0
+    for e, a in zip(expected, actual):
+        e = max(e / expected_total, PSI_FLOOR)
+        a = max(a / actual_total, PSI_FLOOR)
+        score += (a - e) * math.log(a / e)
+    return score
+
+
+def histogram_quantile(edges, counts, low, high, q):
+    """Quantile estimated from bin counts (uniform within each bin; outer bins end at low/high)"""
+    bounds = [low] + list(edges) + [high]
+    target = q * sum(counts)
+    seen = 0
+    for position, count in enumerate(counts):
+        if count and seen + count >= target:
+            start, end = bounds[position], max(bounds[position], bounds[position + 1])
+            return start + (end - start) * (target - seen) / count
+        seen += count
+    return high
+
+
+class Histogram:
+    """Counts of values per bin of fixed, sorted interior edges"""
+
+    def __init__(self, edges):
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+
+    def add(self, value):
+        self.counts[bisect.bisect_right(self.edges, value)] += 1
+
+    def merge(self, other):
+        merged = Histogram(self.edges)
+        merged.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return merged
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+
+class BucketCounts:
+    """Exact counts of a fixed list of values, plus one bucket for every other value"""
+
+    def __init__(self, values):
+        self.values = values
+        self.positions = {value: position for position, value in enumerate(values)}
+        self.counts = [0] * (len(values) + 1)
+
+    def add(self, value):
+        self.counts[self.positions.get(value, len(self.values))] += 1
+
+    def merge(self, other):
+        merged = BucketCounts(self.values)
+        merged.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return merged
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+
+def reference_buckets(spec):
+    """A categorical reference's most common values and its bucket counts (those values, then "other")"""
+    top = sorted(spec['counts'].items(), key=lambda item: -item[1])[:REFERENCE_BUCKETS]
+    values = [value for value, _ in top]
+    counts = [count for _, count in top]
+    return values, counts + [sum(spec['counts'].values()) - sum(counts)]
+
+
+class MisraGries:
+    """
+    Heavy hitters of a stream in a fixed number of counters
+
+    A value's count is underestimated by at most total / (capacity + 1);
+    values absent from the summary occurred at most that often.
+    """
+
+    def __init__(self, capacity=HEAVY_HITTERS):
+        self.capacity = capacity
+        self.counters = {}
+        self.total = 0
+
+    def add(self, value):
+        self.total += 1
+        counters = self.counters
+        if value in counters:
+            counters[value] += 1
+        elif len(counters) < self.capacity:
+            counters[value] = 1
+        else:
+            for key in list(counters):
+                counters[key] -= 1
+                if not counters[key]:
+                    del counters[key]
+
+    def merge(self, other):
+        """Summary of both streams (keeps the same error bound)"""
+        merged = MisraGries(self.capacity)
+        merged.total = self.total + other.total
+        counters = dict(self.counters)
+        for value, count in other.counters.items():
+            counters[value] = counters.get(value, 0) + count
+        if len(counters) > self.capacity:
+            cut = sorted(counters.values(), reverse=True)[self.capacity]
+            counters = {value: count - cut for value, count in counters.items() if count > cut}
+        merged.counters = counters
+        return merged
+
+    def top(self, n):
+        return sorted(self.counters.items(), key=lambda item: -item[1])[:n]
+
+
+class FeatureSketches:
+    """
+    One histogram per numeric feature; per categorical feature, exact bucket
+    counts and a summary of the unknown values
+    """
+
+    def __init__(self, reference, buckets):
+        """
+        Args:
+            reference (dict): Training reference
+            buckets (dict): Categorical feature -> values counted exactly
+        """
+        self.numeric = {feature: Histogram(spec['edges']) for feature, spec in reference['numeric'].items()}
+        self.categorical = {feature: BucketCounts(buckets[feature]) for feature in reference['categorical']}
+        self.unknown = {feature: MisraGries() for feature in reference['categorical']}
+        self.vocabulary = {feature: spec['counts'] for feature, spec in reference['categorical'].items()}
+        self.records = 0
+
+    def add(self, record):
+        self.records += 1
+        for feature, histogram in self.numeric.items():
+            value = record.get(feature)
+            if value is not None:
+                histogram.add(value)
+        for feature, counts in self.categorical.items():
+            value = record.get(feature)
+            if value is not None:
+                value = str(value)
+                counts.add(value)
+                if value not in self.vocabulary[feature]:
+                    self.unknown[feature].add(value)
+
+    def merge(self, other):
+        merged = FeatureSketches.__new__(FeatureSketches)
+        merged.numeric = {feature: h.merge(other.numeric[feature]) for feature, h in self.numeric.items()}
+        merged.categorical = {feature: s.merge(other.categorical[feature]) for feature, s in self.categorical.items()}
+        merged.unknown = {feature: s.merge(other.unknown[feature]) for feature, s in self.unknown.items()}
+        merged.vocabulary = self.vocabulary
+        merged.records = self.records + other.records
+        return merged
+
+
+class DriftMonitor:
+    def __init__(self, reference_path, window=10000, min_observations=200):
+        """
+        Load the training reference and start empty sketches
+
+        Args:
+            reference_path (str): drift_reference.json written at training time
+            window (int): Records per window (scores cover up to two windows)
+            min_observations (int): Records a feature needs before it is scored
+        """
+        with open(reference_path) as f:
+            self.reference = json.load(f)
+        self.window = window
+        self.min_observations = min_observations
+
+        # Reference buckets of each categorical feature: its most common values, then "other"
+        self.reference_buckets = {
+            feature: reference_buckets(spec) for feature, spec in self.reference['categorical'].items()
+        }
+        self._buckets = {feature: values for feature, (values, _) in self.reference_buckets.items()}
+
+        self._lock = threading.Lock()
+        self._current = FeatureSketches(self.reference, self._buckets)
+        self._previous = None
+        self._observed = 0
+
+    @classmethod
+    def from_models_dir(cls, models_dir, **kwargs):
+        """Monitor for the reference next to the models, or None if there is none"""
+        path = Path(models_dir) / REFERENCE_FILE
+        return cls(path, **kwargs) if path.exists() else None
+
+    def observe(self, records, sent=None):
+        """
+        Add validated request records to the sketches
+
+        Args:
+            records (list): Validated input dicts
+            sent (list): The same inputs as the client sent them. Fields
+                         absent or null there hold schema defaults and are
+                         not observed, since a default would read as drift.
+        """
+        if sent is not None:
+            records = [
+                {name: value for name, value in record.items() if raw.get(name) is not None}
+                for record, raw in zip(records, sent)
+            ]
+        with self._lock:
+            for record in records:
+                self._current.add(record)
+                if self._current.records >= self.window:
+                    self._previous = self._current
+                    self._current = FeatureSketches(self.reference, self._buckets)
+            self._observed += len(records)
+
+    def _sketches(self):
+        with self._lock:
+            current, previous = self._current, self._previous
+            if previous is None:
+                previous = FeatureSketches(self.reference, self._buckets)
+            return current.merge(previous)
+
+    def _status(self, score, observed):
+        if observed < self.min_observations:
+            return 'insufficient_data'
+        if score >= PSI_DRIFT:
+            return 'drift'
+        return 'moderate' if score >= PSI_MODERATE else 'stable'
+
+    def _numeric_report(self, feature, histogram):
+        spec = self.reference['numeric'][feature]
+        observed = histogram.total
+        report = {'observed': observed, 'psi': None}
+        quantiles = {'p10': 0.1, 'p50': 0.5, 'p90': 0.9}
+        report['reference'] = {
+            name: round(histogram_quantile(spec['edges'], spec['counts'], spec['min'], spec['max'], q), 4)
+            for name, q in quantiles.items()
+        }
+        if observed:
+            report['psi'] = round(psi(spec['counts'], histogram.counts), 4)
+            report['live'] = {
+                name: round(histogram_quantile(spec['edges'], histogram.counts, spec['min'], spec['max'], q), 4)
+                for name, q in quantiles.items()
+            }
+        report['status'] = self._status(report['psi'] or 0.0, observed)
+        return report
+
+    def _categorical_report(self, feature, counts, unknown):
+        _, expected = self.reference_buckets[feature]
+        observed = counts.total
+        report = {'observed': observed, 'psi': None}
+        if observed:
+            # Exact counts, so traffic drawn from the reference scores ~0
+            report['psi'] = round(psi(expected, counts.counts), 4)
+            report['unknown_rate'] = round(unknown.total / observed, 4)
+            frequent = [item for item in zip(counts.values, counts.counts) if item[1]] + unknown.top(TOP_VALUES)
+            report['top_values'] = sorted(frequent, key=lambda item: -item[1])[:TOP_VALUES]
+            report['top_unknown_values'] = unknown.top(TOP_VALUES)
+        report['status'] = self._status(report['psi'] or 0.0, observed)
+        return report
+
+    def report(self):
+        """
+        Drift scores of every feature over the recent windows
+
+        Returns:
+            dict: Per-feature PSI, status and live vs reference summaries
+        """
+        sketches = self._sketches()
+        features = {
+            feature: self._numeric_report(feature, histogram) for feature, histogram in sketches.numeric.items()
+        }
+        features.update({
+            feature: self._categorical_report(feature, counts, sketches.unknown[feature])
+            for feature, counts in sketches.categorical.items()
+        })
+
+        statuses = [report['status'] for report in features.values()]
+        status = next(
+            (level for level in ('drift', 'moderate', 'stable') if level in statuses), 'insufficient_data'
+        )
+        with self._lock:
+            observed = self._observed
+        return {
+            'status': status,
+            'window': self.window,
+            'records_in_windows': sketches.records,
+            'records_observed': observed,
+            'reference': {
+                'built_at': self.reference['built_at'],
+                'rows': self.reference['rows']
+            },
+            'thresholds': {'moderate': PSI_MODERATE, 'drift': PSI_DRIFT},
+            'features': features
+        }
@@ -0,0 +1,184 @@
+"""
+Per-feature contribution explainer for tree-based models
+Decomposes each prediction along its decision path: every split moves the
+expected value from the parent node to the child node, and that change is
+credited to the split feature. Per-node deltas are precomputed once when the
+model loads, so explaining a row costs one traversal per tree.
+"""
+import numpy as np
+from scipy import sparse
+
+# Rows explained per chunk (bounds the size of the decision-path matrix)
+EXPLAIN_CHUNK_SIZE = 1024
+
+
+class TreeExplainer:
+    def __init__(self, model, n_features):
+        """
+        Precompute per-node contributions for a fitted tree model
+
+        Supports scikit-learn decision trees, random forests / extra trees,
+        gradient boosting and XGBoost models.
+
+        Args:
+            model: Fitted estimator
+            n_features (int): Number of input features
+
+        Raises:
+            ValueError: If the model type is not supported
+        """
+        self.model = model
+        self.n_features = n_features
+        self.is_classifier = hasattr(model, 'predict_proba')
+
+        if hasattr(model, 'get_booster'):
+            self.kind = 'xgboost'
+            self.output_space = 'margin' if self.is_classifier else 'raw'
+            self.n_outputs = None  # Known after the first booster call
+        elif hasattr(model, 'tree_'):
+            self.kind = 'forest'
+            self._init_forest([model], weight=1.0)
+        elif hasattr(model, 'estimators_') and hasattr(model, 'decision_path'):
+            self.kind = 'forest'
+            self._init_forest(list(model.estimators_), weight=1.0 / len(model.estimators_))
+        elif hasattr(model, 'estimators_') and hasattr(model, 'learning_rate'):
+            self.kind = 'boosting'
+            self._init_boosting()
+        else:
+            raise ValueError(f"Unsupported model for explanations: {type(model).__name__}")
+
+    def _node_deltas(self, tree, normalize):
+        """
+        Compute value changes from each node's parent to the node
+
+        Args:
+            tree: sklearn ``Tree`` object
+            normalize (bool): Normalize node values to class probabilities
+
+        Returns:
+            tuple: (node values, child node ids, parent split features, deltas)
+        """
+        values = tree.value[:, 0, :].astype(np.float64)
+        if normalize:
+            values = values / values.sum(axis=1, keepdims=True)
+
+        internal = np.flatnonzero(tree.children_left >= 0)
+        children = np.concatenate([tree.children_left[internal], tree.children_right[internal]])
+        parents = np.concatenate([internal, internal])
+        deltas = values[children] - values[parents]
+
+        return values, children, tree.feature[parents], deltas
+
+    def _delta_matrix(self, trees, weight, normalize, n_outputs):
+        """
+        Stack per-node deltas of several trees into one sparse matrix
+
+        Row ``offset + node`` holds the weighted contribution of reaching
+        ``node``, placed in column ``feature * n_outputs + output``.
+
+        Returns:
+            tuple: (csr matrix of shape (total_nodes, n_features * n_outputs),
+                    summed weighted root values)
+        """
+        rows, cols, data = [], [], []
+        root_value = np.zeros(n_outputs)
+        offset = 0
+
+        for tree in trees:
+            values, children, features, deltas = self._node_deltas(tree, normalize)
+            root_value += weight * values[0]
+            for output in range(n_outputs):
+                rows.append(children + offset)
+                cols.append(features * n_outputs + output)
+                data.append(weight * deltas[:, output])
+            offset += tree.node_count
+
+        matrix = sparse.csr_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(offset, self.n_features * n_outputs)
+        )
+        return matrix, root_value
+
+    def _init_forest(self, estimators, weight):
+        """Precompute contributions for averaged trees (forests, single trees)"""
+        trees = [estimator.tree_ for estimator in estimators]
+        self.n_outputs = trees[0].value.shape[2]
+        self.output_space = 'probability' if self.is_classifier else 'raw'
+        self.node_deltas, self.base_value = self._delta_matrix(
+            trees, weight, normalize=self.is_classifier, n_outputs=self.n_outputs
+        )
+
+    def _init_boosting(self):
+        """Precompute contributions for each stage of a gradient boosting model"""
+        stages = self.model.estimators_
+        self.n_outputs = stages.shape[1]
+        self.output_space = 'margin' if self.is_classifier else 'raw'
+        # One matrix per (stage, output) tree; each tree only feeds its own output
+        self.node_deltas = [
+            [self._delta_matrix([stage[k].tree_], self.model.learning_rate, False, 1)[0]
+             for k in range(self.n_outputs)]
+            for stage in stages
+        ]
+
+    def _raw_output(self, X):
+        """Model output in the space the contributions are expressed in"""
+        if self.is_classifier:
+            raw = self.model.decision_function(X)
+        else:
+            raw = self.model.predict(X)
+        return np.asarray(raw, dtype=np.float64).reshape(len(X), -1)
+
+    def _explain_chunk(self, X):
+        """Explain a chunk of rows, returning (base values, contributions)"""
+        n_rows = len(X)
+
+        if self.kind == 'xgboost':
+            import xgboost as xgb
+            contribs = self.model.get_booster().predict(
+                xgb.DMatrix(X), pred_contribs=True, approx_contribs=True
+            )
+            contribs = contribs.reshape(n_rows, -1, self.n_features + 1)
+            contribs = np.transpose(contribs, (0, 2, 1))
+            self.n_outputs = contribs.shape[2]
+            return contribs[:, -1, :], contribs[:, :-1, :]
+
+        if self.kind == 'forest':
+            indicator = self.model.decision_path(X)
+            if isinstance(indicator, tuple):
+                indicator = indicator[0]
+            contributions = (indicator @ self.node_deltas).toarray()
+            contributions = contributions.reshape(n_rows, self.n_features, self.n_outputs)
+            base = np.tile(self.base_value, (n_rows, 1))
+            return base, contributions
+
+        # Gradient boosting: sum stage contributions, base value absorbs the init estimator
+        contributions = np.zeros((n_rows, self.n_features, self.n_outputs))
+        for stage, stage_deltas in zip(self.model.estimators_, self.node_deltas):
+            for k, deltas in enumerate(stage_deltas):
+                indicator = stage[k].decision_path(X)
+                contributions[:, :, k] += (indicator @ deltas).toarray()
+        base = self._raw_output(X) - contributions.sum(axis=1)
+        return base, contributions
+
+    def explain(self, X):
+        """
+        Compute per-feature contributions for a feature matrix
+
+        Args:
+            X (np.ndarray): Feature matrix of shape (n_rows, n_features)
+
+        Returns:
+            tuple: (base values of shape (n_rows, n_outputs),
+                    contributions of shape (n_rows, n_features, n_outputs)).
+                    For every row, base + contributions summed over features
+                    equals the model output in ``output_space``.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        bases, contributions = [], []
+
+        for start in range(0, len(X), EXPLAIN_CHUNK_SIZE):
+            base, contrib = self._explain_chunk(X[start:start + EXPLAIN_CHUNK_SIZE])
+            bases.append(base)
+            contributions.append(contrib)
+
+        return np.concatenate(bases), np.concatenate(contributions)
@@ -0,0 +1,391 @@
+"""
+Process-pool inference
+Tree inference holds the GIL, so request threads of one server process
+cannot score in parallel. With an InferencePool attached, ModelHandler.score
+hands the encoded feature matrix to one of N worker processes, each holding
+its own copy of the models. Matrices and model outputs move through a pair
+of shared-memory buffers per worker; only a short control message per call
+goes over the worker's socket.
+
+Workers are separate interpreters (``python inference_pool.py --worker``)
+rather than forks of the threaded server. A monitor thread pings idle
+workers and restarts any that crashed, hung or stopped answering, each
+restart on its own thread.
+
+Every call carries the model version of the calling model set. A worker
+whose models are another version (e.g. restarted after a newer export than
+the server has loaded) refuses the call instead of scoring features encoded
+for other models, and ModelHandler.score runs it in-process.
+"""
+import argparse
+import atexit
+import math
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+DTYPE = np.float64
+
+# Seconds between checks for running workers while waiting for an idle one
+POLL_INTERVAL = 0.1
+
+
+class WorkerError(RuntimeError):
+    """A worker crashed, hung or could not be reached"""
+
+
+class ModelVersionMismatch(RuntimeError):
+    """The worker's models are not the version the features were encoded for"""
+
+
+class _Worker:
+    """One worker process and its shared-memory buffers"""
+
+    def __init__(self, slot, input_buffer, output_buffer):
+        self.slot = slot
+        self.input = input_buffer
+        self.output = output_buffer
+        self.process = None
+        self.conn = None
+        self.model_version = None
+        self.started_at = None
+        self.calls = 0
+
+    def stop(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.conn.close()
+            self.conn = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+
+class InferencePool:
+    def __init__(self, model_store, n_workers, max_rows=4096, timeout=30.0,
+                 health_interval=5.0, start_timeout=120.0):
+        """
+        Args:
+            model_store (ModelStore): Store whose models the workers load
+            n_workers (int): Worker processes
+            max_rows (int): Rows per worker call (larger matrices are split)
+            timeout (float): Seconds a call may take before its worker is restarted
+            health_interval (float): Seconds between health checks
+            start_timeout (float): Seconds a worker may take to load the models
+        """
+        self.model_store = model_store
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.start_timeout = start_timeout
+        models = model_store.current
+        self.max_columns = max(len(models.REGRESSION_FEATURES), len(models.CLASSIFICATION_FEATURES))
+        self.output_columns = max(1, len(models.condition_encoder.classes_))
+
+        self._workers = []
+        for slot in range(n_workers):
+            input_buffer = SharedMemory(create=True, size=max_rows * self.max_columns * DTYPE().itemsize)
+            output_buffer = SharedMemory(create=True, size=max_rows * self.output_columns * DTYPE().itemsize)
+            self._workers.append(_Worker(slot, input_buffer, output_buffer))
+        self._idle = queue.Queue()
+        self._dead = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'rows': 0, 'errors': 0, 'crashes': 0, 'timeouts': 0,
+                       'restarts': 0, 'start_failures': 0, 'health_checks': 0, 'unavailable': 0,
+                       'version_mismatches': 0}
+        self._closed = threading.Event()
+        self._monitor = None
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _launch(self, worker):
+        """Start a worker process and wait until its models are loaded"""
+        parent_socket, child_socket = socket.socketpair()
+        command = [
+            sys.executable, os.path.abspath(__file__), '--worker',
+            '--fd', str(child_socket.fileno()),
+            '--models-dir', str(self.model_store.models_dir.resolve()),
+            '--segment-memory-mb', str(self.model_store.segment_memory_mb),
+            '--model-version', self.model_store.current.model_version,
+            '--input', worker.input.name, '--output', worker.output.name
+        ]
+        worker.process = subprocess.Popen(command, pass_fds=[child_socket.fileno()])
+        child_socket.close()
+        worker.conn = Connection(parent_socket.detach())
+
+        deadline = time.monotonic() + self.start_timeout
+        while not worker.conn.poll(0.5):
+            if worker.process.poll() is not None or time.monotonic() > deadline:
+                worker.stop()
+                raise WorkerError(f"Inference worker {worker.slot} failed to start")
+        try:
+            status, pid, model_version = worker.conn.recv()
+        except (EOFError, OSError):
+            worker.stop()
+            raise WorkerError(f"Inference worker {worker.slot} failed to start")
+        worker.model_version = model_version
+        worker.started_at = time.time()
+        worker.calls = 0
+        print(f"✓ Inference worker {worker.slot} ready (pid {pid})")
+
+    def start(self):
+        """Start every worker and the health monitor"""
+        for worker in self._workers:
+            self._launch(worker)
+            self._idle.put(worker)
+        self._monitor = threading.Thread(target=self._monitor_loop, name='inference-pool-monitor', daemon=True)
+        self._monitor.start()
+        atexit.register(self.close)
+        return self
+
+    def _restart(self, worker):
+        worker.stop()
+        if self._closed.is_set():
+            return
+        try:
+            self._launch(worker)
+        except WorkerError as e:
+            print(f"⚠️ {e}, retrying in {self.health_interval:.0f}s")
+            self._count('start_failures')
+            self._dead.put(worker)
+            return
+        self._count('restarts')
+        self._idle.put(worker)
+
+    def _call(self, worker, kind, segment, X, model_version):
+        rows, columns = X.shape
+        np.ndarray((rows, columns), dtype=DTYPE, buffer=worker.input.buf)[:] = X
+        worker.conn.send(('score', kind, segment, rows, columns, model_version))
+        if not worker.conn.poll(self.timeout):
+            self._count('timeouts')
+            raise WorkerError(f"Inference worker {worker.slot} timed out")
+        reply = worker.conn.recv()
+        worker.model_version = reply[-1]
+        if reply[0] == 'stale':
+            self._count('version_mismatches')
+            raise ModelVersionMismatch(f"Inference worker {worker.slot} has models {reply[-1]}, "
+                                       f"the call needs {model_version}")
+        if reply[0] == 'error':
+            raise RuntimeError(reply[1])
+        _, shape, model_name, _ = reply
+        output = np.ndarray(shape, dtype=DTYPE, buffer=worker.output.buf).copy()
+        worker.calls += 1
+        return output, model_name
+
+    def _any_running(self):
+        """Whether any worker process is running (ready, busy or starting)"""
+        return any(worker.process is not None and worker.process.poll() is None for worker in self._workers)
+
+    def _acquire(self):
+        """
+        Wait for an idle worker
+
+        Gives up at once when no worker process is running (e.g. all crashed
+        and are waiting for a restart) instead of waiting for the timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if not self._any_running():
+                self._count('unavailable')
+                raise WorkerError('No inference worker is running')
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count('unavailable')
+                raise WorkerError('No inference worker available')
+            try:
+                return self._idle.get(timeout=min(remaining, POLL_INTERVAL))
+            except queue.Empty:
+                pass
+
+    def score(self, kind, segment, X, model_version):
+        """
+        ModelHandler.score in a worker process
+
+        Args:
+            model_version (str): Version of the calling model set (the
+                                 matrix was encoded with its encoders)
+
+        Raises:
+            WorkerError: No worker is running or became free in time, or the
+                         worker failed (it is restarted in the background)
+            ModelVersionMismatch: The worker holds other models
+        """
+        worker = self._acquire()
+
+        X = np.asarray(X, dtype=DTYPE)
+        healthy = True
+        try:
+            outputs, model_name = [], None
+            for start in range(0, max(len(X), 1), self.max_rows):
+                output, model_name = self._call(worker, kind, segment, X[start:start + self.max_rows], model_version)
+                outputs.append(output)
+            self._count('calls')
+            self._count('rows', len(X))
+            return np.concatenate(outputs), model_name
+        except (EOFError, OSError, WorkerError) as e:
+            healthy = False
+            self._count('errors')
+            if not isinstance(e, WorkerError):
+                self._count('crashes')
+            raise WorkerError(f"Inference worker {worker.slot} failed: {e or type(e).__name__}")
+        except RuntimeError:
+            self._count('errors')
+            raise
+        finally:
+            (self._idle if healthy else self._dead).put(worker)
+
+    def _ping(self, worker):
+        try:
+            worker.conn.send(('ping',))
+            if not worker.conn.poll(self.timeout):
+                return False
+            reply = worker.conn.recv()
+            worker.model_version = reply[-1]
+            return reply[0] == 'pong'
+        except (EOFError, OSError):
+            return False
+
+    def _restart_in_background(self, worker):
+        """Restart a worker on its own thread, so one slow start does not hold up the others"""
+        threading.Thread(target=self._restart, args=(worker,),
+                         name=f'inference-worker-{worker.slot}-restart', daemon=True).start()
+
+    def _monitor_loop(self):
+        while not self._closed.wait(self.health_interval):
+            # Restart workers that failed a call (or failed to start); a
+            # restarting worker is in neither queue until it is back
+            for _ in range(self._dead.qsize()):
+                worker = self._dead.get()
+                print(f"♻️ Restarting inference worker {worker.slot}")
+                self._restart_in_background(worker)
+
+            # Ping the idle ones
+            for _ in range(self._idle.qsize()):
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self._count('health_checks')
+                if worker.process.poll() is None and self._ping(worker):
+                    self._idle.put(worker)
+                else:
+                    self._count('crashes')
+                    print(f"♻️ Inference worker {worker.slot} is not responding, restarting")
+                    self._restart_in_background(worker)
+
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        for worker in self._workers:
+            worker.stop()
+            for buffer in (worker.input, worker.output):
+                buffer.close()
+                buffer.unlink()
+
+    @property
+    def retry_after(self):
+        """Seconds a client should wait before retrying when no worker could serve it"""
+        return max(1, math.ceil(self.health_interval))
+
+    def get_stats(self):
+        """Call and restart counters and the workers' state"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['workers'] = [{
+            'slot': worker.slot,
+            'pid': worker.process.pid if worker.process else None,
+            'alive': worker.process is not None and worker.process.poll() is None,
+            'calls': worker.calls,
+            'model_version': worker.model_version
+        } for worker in self._workers]
+        stats['idle'] = self._idle.qsize()
+        return stats
+
+
+def _attach(name):
+    """Open a buffer created by the pool (the pool owns and unlinks it)"""
+    buffer = SharedMemory(name=name)
+    resource_tracker.unregister(buffer._name, 'shared_memory')
+    return buffer
+
+
+def run_worker(args):
+    """Worker process: load the models, then answer score and ping messages"""
+    from model_handler import ModelStore
+
+    conn = Connection(args.fd)
+    input_buffer, output_buffer = _attach(args.input), _attach(args.output)
+    store = ModelStore(args.models_dir, segment_memory_mb=args.segment_memory_mb, explainers=False)
+    if store.current.model_version != args.model_version:
+        print(f"⚠️ Inference worker loaded models {store.current.model_version}, the server uses "
+              f"{args.model_version}; its calls are refused until the versions match")
+    conn.send(('ready', os.getpid(), store.current.model_version))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return  # The server went away
+        if message is None:
+            return
+        if message[0] == 'ping':
+            conn.send(('pong', os.getpid(), store.current.model_version))
+            continue
+
+        _, kind, segment, rows, columns, model_version = message
+        try:
+            if model_version != store.current.model_version:
+                # The server may have loaded a newer export than this worker
+                store.reload_if_changed()
+            models = store.current
+            if model_version != models.model_version:
+                # Never score features encoded for other models
+                conn.send(('stale', models.model_version))
+                continue
+            X = np.ndarray((rows, columns), dtype=DTYPE, buffer=input_buffer.buf)
+            output, model_name = models.score_local(kind, segment, X)
+            output = np.asarray(output, dtype=DTYPE)
+            np.ndarray(output.shape, dtype=DTYPE, buffer=output_buffer.buf)[:] = output
+            del X
+            conn.send(('ok', output.shape, model_name, models.model_version))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}", store.current.model_version))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inference pool worker (started by InferencePool)')
+    parser.add_argument('--worker', action='store_true', required=True)
+    parser.add_argument('--fd', type=int, required=True)
+    parser.add_argument('--models-dir', required=True)
+    parser.add_argument('--segment-memory-mb', type=float, default=512)
+    parser.add_argument('--model-version', required=True, help="Version of the server's models")
+    parser.add_argument('--input', required=True)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+    try:
+        run_worker(args)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
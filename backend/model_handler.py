@@ -1,21 +1,99 @@
 """
 Model Handler for Vehicle Price and Condition Prediction
 Loads trained models and handles predictions using LabelEncoder (same as notebook)
+
+A ModelHandler is one loaded set of artifacts and is not modified after
+loading. ModelStore holds the set in service and replaces it with a single
+assignment when the files change, so a request that takes ``store.current``
+once uses matching models, encoders, explainers and version throughout.
 """
+import hashlib
+import json
 import pickle
+import threading
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
 from pathlib import Path
+from explainer import TreeExplainer
+from inference_pool import ModelVersionMismatch
+from segments import SegmentModelCache, load_manifest, manifest_files
+
+# Written by the training scripts after every other file of an export
+VERSION_FILE = 'model_version.json'
+
+
+def read_version_marker(models_dir):
+    """
+    Version marker of the last finished export
+    
+    Returns:
+        dict: {'version', 'files', 'created_at'}, or None for artifacts
+              exported without one (e.g. by the notebook)
+    """
+    path = Path(models_dir) / VERSION_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 class ModelHandler:
-    def __init__(self, models_dir='models'):
-        """Initialize and load all models and encoders"""
+    # Feature order for regression (16 features):
+    # year, vehicle_age, odometer, lat, long, + 11 encoded categorical
+    REGRESSION_FEATURES = [
+        'year', 'vehicle_age', 'odometer', 'lat', 'long',
+        'manufacturer', 'fuel', 'title_status', 'transmission', 'drive',
+        'size', 'type', 'paint_color', 'state', 'region', 'condition'
+    ]
+    
+    # Feature order for classification (16 features, no condition):
+    # price, year, vehicle_age, odometer, lat, long, + 10 encoded categorical
+    CLASSIFICATION_FEATURES = [
+        'price', 'year', 'vehicle_age', 'odometer', 'lat', 'long',
+        'manufacturer', 'fuel', 'title_status', 'transmission', 'drive',
+        'size', 'type', 'paint_color', 'state', 'region'
+    ]
+    
+    # Explainers of segment models kept at once (built on first use)
+    SEGMENT_EXPLAINERS = 8
+    
+    # Artifacts written by the training notebook
+    MODEL_FILES = [
+        'regression_model.pkl', 'classification_model.pkl',
+        'scaler_reg.pkl', 'scaler_clf.pkl',
+        'label_encoders.pkl', 'condition_encoder.pkl'
+    ]
+    
+    def __init__(self, models_dir='models', segment_memory_mb=512, explainers=True, inference_pool=None):
+        """
+        Initialize and load all models and encoders
+        
+        Args:
+            models_dir (str): Directory with the exported artifacts
+            segment_memory_mb (float): Memory budget of resident segment models
+            explainers (bool): Precompute the explanation tables (not needed
+                               by inference pool workers)
+            inference_pool (InferencePool): Run the models in worker processes
+        """
         self.models_dir = Path(models_dir)
         self.current_year = 2021  # Same as training
+        self.segment_memory_mb = segment_memory_mb
+        self.explainers = explainers
+        self.inference_pool = inference_pool
         self.load_models()
         
     def load_models(self):
         """Load all saved models and encoders"""
+        marker = read_version_marker(self.models_dir)
         try:
             # Load regression model
             with open(self.models_dir / 'regression_model.pkl', 'rb') as f:
@@ -51,6 +129,186 @@ class ModelHandler:
             
         except FileNotFoundError as e:
             raise Exception(f"Model files not found. Please train and export models first: {e}")
+        
+        # Value -> code lookup tables for vectorized batch encoding
+        self.category_index = {
+            feature: {value: code for code, value in enumerate(encoder.classes_)}
+            for feature, encoder in self.label_encoders.items()
+        }
+        self.category_index['condition'] = {
+            value: code for code, value in enumerate(self.condition_encoder.classes_)
+        }
+        
+        # Segment models are loaded on first use
+        self.segments = load_manifest(self.models_dir)
+        self.segment_cache = SegmentModelCache(self.segment_memory_mb)
+        self._segment_explainers = OrderedDict()
+        self._explainer_lock = threading.Lock()
+        for kind, spec in self.segments.items():
+            print(f"✓ {len(spec['files'])} {kind} segment model(s), routed by {spec['route_by']}")
+        
+        # With a marker, the files must be the ones of that finished export
+        self.model_version = self.compute_model_version()
+        if marker is not None:
+            if read_version_marker(self.models_dir) != marker or marker['version'] != self.model_version:
+                raise Exception(f"Model files do not match {VERSION_FILE} (export in progress?)")
+        else:
+            print(f"⚠️ No {VERSION_FILE}: the models will not be reloaded when the files change")
+        print(f"Model version: {self.model_version}")
+        
+        if self.explainers:
+            self.load_explainers()
+        else:
+            self.price_explainer = None
+            self.condition_explainer = None
+    
+    def compute_model_version(self):
+        """
+        Identify the artifacts on disk by their contents
+        
+        Includes the segment manifest and segment models, if any. Identical
+        artifacts have the same version on every host, however they were
+        copied or touched. The training scripts record the same digest in
+        VERSION_FILE.
+        
+        Returns:
+            str: Short hex digest that changes whenever a model file's contents change
+        """
+        digest = hashlib.sha256()
+        for name in self.MODEL_FILES + manifest_files(self.models_dir):
+            digest.update(f"{name}:{file_digest(self.models_dir / name)};".encode())
+        return digest.hexdigest()[:16]
+    
+    def segment_for(self, kind, record):
+        """
+        Segment serving a record
+        
+        Args:
+            kind (str): 'price' or 'condition'
+            record (dict): Raw (unencoded) input
+            
+        Returns:
+            str: Segment name, or None for the global model
+        """
+        spec = self.segments.get(kind)
+        if spec is None or spec['route_by'] not in record:
+            return None
+        return spec['routes'].get(str(record[spec['route_by']]))
+    
+    def get_model(self, kind, segment=None):
+        """
+        Model for a kind and segment (None: the global model)
+        
+        Segment models are loaded on first use and may be evicted later.
+        """
+        if segment is None:
+            return self.regression_model if kind == 'price' else self.classification_model
+        return self.segment_cache.get((kind, segment), self.segments[kind]['files'][segment])
+    
+    def group_by_segment(self, kind, records):
+        """
+        Row indices per segment, so each model is called once per batch
+        
+        Returns:
+            dict: Segment name (None for the global model) -> np.ndarray of row indices
+        """
+        if kind not in self.segments:
+            return {None: np.arange(len(records))}
+        groups = {}
+        for row, record in enumerate(records):
+            groups.setdefault(self.segment_for(kind, record), []).append(row)
+        return {segment: np.asarray(rows) for segment, rows in groups.items()}
+    
+    def score(self, kind, segment, X):
+        """
+        Run the model of a kind and segment on an encoded feature matrix
+        
+        Runs in the inference pool's worker processes when one is attached,
+        and in this process when the worker holds another model version.
+        
+        Returns:
+            tuple: (output, model class name). The output holds prices for
+                   'price'; for 'condition' it holds class probabilities
+                   aligned with condition_encoder.classes_, or predicted
+                   codes for models without predict_proba.
+        """
+        if self.inference_pool is not None:
+            try:
+                return self.inference_pool.score(kind, segment, X, self.model_version)
+            except ModelVersionMismatch:
+                pass  # The worker refused features encoded for other models
+        return self.score_local(kind, segment, X)
+    
+    def score_local(self, kind, segment, X):
+        """score() in this process"""
+        model = self.get_model(kind, segment)
+        if kind == 'condition' and hasattr(model, 'predict_proba'):
+            output = self.condition_probabilities(model, model.predict_proba(X))
+        else:
+            output = model.predict(X)
+        return output, type(model).__name__
+    
+    def condition_probabilities(self, model, probs):
+        """
+        Align predict_proba columns with condition_encoder.classes_
+        
+        Segment models may not have seen every condition; missing classes get
+        probability 0.
+        """
+        full = np.zeros((len(probs), len(self.condition_encoder.classes_)))
+        full[:, np.asarray(model.classes_, dtype=int)] = probs
+        return full
+    
+    def load_explainers(self):
+        """Precompute per-node contributions used by the explanation endpoints"""
+        self.price_explainer = None
+        self.condition_explainer = None
+        
+        try:
+            self.price_explainer = TreeExplainer(self.regression_model, len(self.REGRESSION_FEATURES))
+            print("✓ Price explainer ready")
+        except ValueError as e:
+            print(f"⚠️ Price explanations unavailable: {e}")
+        
+        try:
+            self.condition_explainer = TreeExplainer(self.classification_model, len(self.CLASSIFICATION_FEATURES))
+            print("✓ Condition explainer ready")
+        except ValueError as e:
+            print(f"⚠️ Condition explanations unavailable: {e}")
+    
+    def get_explainer(self, kind, segment=None):
+        """
+        Explainer of the model serving a kind and segment
+        
+        Segment explainers are built on first use; the most recently used
+        SEGMENT_EXPLAINERS are kept.
+        
+        Raises:
+            ValueError: If the model cannot be explained
+        """
+        model = self.get_model(kind, segment)
+        if segment is None:
+            explainer = self.price_explainer if kind == 'price' else self.condition_explainer
+            if explainer is None:
+                raise ValueError(f"Explanations not supported for {type(model).__name__}")
+            return explainer
+        
+        key = (kind, segment)
+        with self._explainer_lock:
+            explainer = self._segment_explainers.get(key)
+            # A segment model evicted and loaded again is a new object
+            if explainer is not None and explainer.model is model:
+                self._segment_explainers.move_to_end(key)
+                return explainer
+        
+        features = self.REGRESSION_FEATURES if kind == 'price' else self.CLASSIFICATION_FEATURES
+        explainer = TreeExplainer(model, len(features))
+        with self._explainer_lock:
+            self._segment_explainers[key] = explainer
+            self._segment_explainers.move_to_end(key)
+            while len(self._segment_explainers) > self.SEGMENT_EXPLAINERS:
+                self._segment_explainers.popitem(last=False)
+        return explainer
     
     def encode_categorical(self, data):
         """
@@ -83,6 +341,42 @@ class ModelHandler:
         
         return encoded_data
     
+    def build_feature_matrix(self, records, feature_order):
+        """
+        Build an encoded feature matrix for a batch of inputs
+        
+        Categorical columns are encoded with the precomputed lookup tables
+        (unknown values map to 0, same as ``encode_categorical``).
+        
+        Args:
+            records (list): List of input feature dicts
+            feature_order (list): Model feature order
+            
+        Returns:
+            np.ndarray: Feature matrix of shape (len(records), len(feature_order))
+        """
+        X = np.empty((len(records), len(feature_order)), dtype=np.float64)
+        
+        for column, feature in enumerate(feature_order):
+            if feature in self.category_index:
+                lookup = self.category_index[feature]
+                codes = [lookup.get(str(record[feature]), -1) for record in records]
+                X[:, column] = codes
+                
+                unknown = X[:, column] < 0
+                if unknown.any():
+                    print(f"⚠️ {int(unknown.sum())} unknown value(s) for {feature}, using most common")
+                    X[unknown, column] = 0
+            elif feature == 'vehicle_age':
+                X[:, column] = [
+                    record['vehicle_age'] if 'vehicle_age' in record else self.current_year - record['year']
+                    for record in records
+                ]
+            else:
+                X[:, column] = [record[feature] for record in records]
+        
+        return X
+    
     def predict_price(self, data):
         """
         Predict vehicle price
@@ -108,27 +402,22 @@ class ModelHandler:
                 print(f"⚠️ Unknown condition '{encoded_data['condition']}', using default")
                 encoded_data['condition'] = 0
         
-        # Feature order for regression (16 features): 
-        # year, vehicle_age, odometer, lat, long, + 11 encoded categorical
-        feature_order = [
-            'year', 'vehicle_age', 'odometer', 'lat', 'long',
-            'manufacturer', 'fuel', 'title_status', 'transmission', 'drive',
-            'size', 'type', 'paint_color', 'state', 'region', 'condition'
-        ]
-        
         # Create feature array in correct order
-        X = np.array([[encoded_data[feature] for feature in feature_order]])
+        X = np.array([[encoded_data[feature] for feature in self.REGRESSION_FEATURES]])
         
         # Make prediction (tree-based models don't need scaling)
-        predicted_price = self.regression_model.predict(X)[0]
-        
-        model_name = type(self.regression_model).__name__
+        segment = self.segment_for('price', data)
+        predictions, model_name = self.score('price', segment, X)
+        predicted_price = predictions[0]
         
-        return {
+        result = {
             'predicted_price': float(predicted_price),
             'model_used': model_name,
             'currency': 'USD'
         }
+        if segment is not None:
+            result['segment'] = segment
+        return result
     
     def predict_condition(self, data):
         """
@@ -146,31 +435,25 @@ class ModelHandler:
         # Encode categorical features using LabelEncoder
         encoded_data = self.encode_categorical(data)
         
-        # Feature order for classification (16 features, no condition):
-        # price, year, vehicle_age, odometer, lat, long, + 10 encoded categorical
-        feature_order = [
-            'price', 'year', 'vehicle_age', 'odometer', 'lat', 'long',
-            'manufacturer', 'fuel', 'title_status', 'transmission', 'drive',
-            'size', 'type', 'paint_color', 'state', 'region'
-        ]
-        
         # Create feature array in correct order
-        X = np.array([[encoded_data[feature] for feature in feature_order]])
+        X = np.array([[encoded_data[feature] for feature in self.CLASSIFICATION_FEATURES]])
         
         # Make prediction (tree-based models don't need scaling)
-        predicted_encoded = self.classification_model.predict(X)[0]
-        predicted_condition = self.condition_encoder.inverse_transform([predicted_encoded])[0]
+        segment = self.segment_for('condition', data)
+        output, model_name = self.score('condition', segment, X)
         
         # Get probability if available
         probabilities = None
-        if hasattr(self.classification_model, 'predict_proba'):
-            probs = self.classification_model.predict_proba(X)[0]
+        if output.ndim == 2:
+            probs = output[0]
+            predicted_encoded = int(probs.argmax())
             probabilities = {
                 condition: float(prob) 
                 for condition, prob in zip(self.condition_encoder.classes_, probs)
             }
-        
-        model_name = type(self.classification_model).__name__
+        else:
+            predicted_encoded = int(output[0])
+        predicted_condition = self.condition_encoder.inverse_transform([predicted_encoded])[0]
         
         result = {
             'predicted_condition': predicted_condition,
@@ -179,9 +462,188 @@ class ModelHandler:
         
         if probabilities:
             result['probabilities'] = probabilities
+        if segment is not None:
+            result['segment'] = segment
         
         return result
     
+    def predict_price_batch(self, records):
+        """
+        Predict prices for a batch of vehicles with one model call per segment
+        
+        Args:
+            records (list): List of input feature dicts (same fields as predict_price)
+            
+        Returns:
+            list: One prediction dict per record (same format as predict_price)
+        """
+        X = self.build_feature_matrix(records, self.REGRESSION_FEATURES)
+        results = [None] * len(records)
+        
+        for segment, rows in self.group_by_segment('price', records).items():
+            predictions, model_name = self.score('price', segment, X[rows])
+            for row, price in zip(rows, predictions):
+                results[row] = {
+                    'predicted_price': float(price),
+                    'model_used': model_name,
+                    'currency': 'USD'
+                }
+                if segment is not None:
+                    results[row]['segment'] = segment
+        
+        return results
+    
+    def predict_price_grid(self, data, axes):
+        """
+        Predict prices over a grid of values for one or two numeric features
+        
+        The base vehicle is encoded once; the grid is generated as one
+        feature matrix and scored with a single model call.
+        
+        Args:
+            data (dict): Base vehicle (same fields as predict_price)
+            axes (list): (feature, values array) per axis, e.g.
+                         [('odometer', np.arange(0, 300001, 10000))]
+                         
+        Returns:
+            dict: Axis values and the predicted prices as a nested list of
+                  shape (len(axis 1), len(axis 2))
+        """
+        base = self.build_feature_matrix([data], self.REGRESSION_FEATURES)[0]
+        grids = np.meshgrid(*[values for _, values in axes], indexing='ij')
+        
+        X = np.tile(base, (grids[0].size, 1))
+        for (feature, _), grid in zip(axes, grids):
+            X[:, self.REGRESSION_FEATURES.index(feature)] = grid.ravel()
+            if feature == 'year' and 'vehicle_age' not in data:
+                X[:, self.REGRESSION_FEATURES.index('vehicle_age')] = self.current_year - grid.ravel()
+        
+        segment = self.segment_for('price', data)
+        predictions, model_name = self.score('price', segment, X)
+        predictions = predictions.reshape(grids[0].shape)
+        
+        result = {
+            'axes': [{'feature': feature, 'values': values.tolist()} for feature, values in axes],
+            'predicted_price': np.round(predictions, 2).tolist(),
+            'model_used': model_name,
+            'currency': 'USD'
+        }
+        if segment is not None:
+            result['segment'] = segment
+        return result
+    
+    def predict_condition_batch(self, records):
+        """
+        Predict conditions for a batch of vehicles with one model call per segment
+        
+        Args:
+            records (list): List of input feature dicts (same fields as predict_condition)
+            
+        Returns:
+            list: One prediction dict per record (same format as predict_condition)
+        """
+        X = self.build_feature_matrix(records, self.CLASSIFICATION_FEATURES)
+        classes = list(self.condition_encoder.classes_)
+        results = [None] * len(records)
+        
+        for segment, rows in self.group_by_segment('condition', records).items():
+            output, model_name = self.score('condition', segment, X[rows])
+            
+            if output.ndim == 1:
+                predicted = self.condition_encoder.inverse_transform(output.astype(int))
+                for row, condition in zip(rows, predicted):
+                    results[row] = {'predicted_condition': condition, 'model_used': model_name}
+            else:
+                probs = output
+                predicted = self.condition_encoder.inverse_transform(probs.argmax(axis=1))
+                for row, condition, probabilities in zip(rows, predicted, probs):
+                    results[row] = {
+                        'predicted_condition': condition,
+                        'model_used': model_name,
+                        'probabilities': dict(zip(classes, probabilities.tolist()))
+                    }
+            
+            if segment is not None:
+                for row in rows:
+                    results[row]['segment'] = segment
+        
+        return results
+    
+    def explain_price(self, records):
+        """
+        Explain price predictions as per-feature contributions
+        
+        Args:
+            records (list): List of input feature dicts (same fields as predict_price)
+            
+        Returns:
+            list: One dict per record with the predicted price, the base value
+                  and the contribution of every feature (in USD), from the
+                  model that predicts the record (plus "segment" for segment models)
+        """
+        explanations = [None] * len(records)
+        for segment, rows in self.group_by_segment('price', records).items():
+            explainer = self.get_explainer('price', segment)
+            X = self.build_feature_matrix([records[row] for row in rows], self.REGRESSION_FEATURES)
+            base, contributions = explainer.explain(X)
+            predictions = base[:, 0] + contributions[:, :, 0].sum(axis=1)
+            
+            for position, row in enumerate(rows):
+                explanations[row] = {
+                    'predicted_price': float(predictions[position]),
+                    'base_value': float(base[position, 0]),
+                    'contributions': dict(zip(self.REGRESSION_FEATURES, contributions[position, :, 0].tolist()))
+                }
+                if segment is not None:
+                    explanations[row]['segment'] = segment
+        
+        return explanations
+    
+    def explain_condition(self, records):
+        """
+        Explain condition predictions as per-feature contributions
+        
+        Args:
+            records (list): List of input feature dicts (same fields as predict_condition)
+            
+        Returns:
+            list: One dict per record with the predicted condition, and for each
+                  condition class the base value and per-feature contributions
+                  (probabilities for forests, margins for boosted models), from
+                  the model that predicts the record (plus "segment" for segment models)
+        """
+        explanations = [None] * len(records)
+        for segment, rows in self.group_by_segment('condition', records).items():
+            explainer = self.get_explainer('condition', segment)
+            X = self.build_feature_matrix([records[row] for row in rows], self.CLASSIFICATION_FEATURES)
+            base, contributions = explainer.explain(X)
+            outputs = base + contributions.sum(axis=1)
+            
+            # Segment models may not have seen every condition
+            class_codes = np.asarray(explainer.model.classes_, dtype=int)
+            class_names = list(self.condition_encoder.inverse_transform(class_codes))
+            if outputs.shape[1] == 1:
+                # Binary boosted models only expose the positive class margin
+                predicted = [class_names[1] if output > 0 else class_names[0] for output in outputs[:, 0]]
+                class_names = class_names[1:]
+            else:
+                predicted = [class_names[index] for index in outputs.argmax(axis=1)]
+            
+            for position, row in enumerate(rows):
+                explanations[row] = {
+                    'predicted_condition': predicted[position],
+                    'output_space': explainer.output_space,
+                    'base_value': dict(zip(class_names, base[position].tolist())),
+                    'contributions': {
+                        feature: dict(zip(class_names, contributions[position, column].tolist()))
+                        for column, feature in enumerate(self.CLASSIFICATION_FEATURES)
+                    }
+                }
+                if segment is not None:
+                    explanations[row]['segment'] = segment
+        
+        return explanations
+    
     def get_supported_values(self):
         """Get all supported categorical values for inputs"""
         # Return example values or common categories
@@ -240,3 +702,47 @@ class ModelHandler:
             'encoding_method': 'LabelEncoder (same as training notebook)',
             'current_year': self.current_year
         }
+
+
+class ModelStore:
+    def __init__(self, models_dir='models', segment_memory_mb=512, explainers=True):
+        """
+        Load the models and keep the loaded set in service
+        
+        Args:
+            models_dir (str): Directory with the exported artifacts
+            segment_memory_mb (float): Memory budget of resident segment models
+            explainers (bool): Precompute the explanation tables
+        """
+        self.models_dir = Path(models_dir)
+        self.segment_memory_mb = segment_memory_mb
+        self.explainers = explainers
+        self.inference_pool = None
+        self._reload_lock = threading.Lock()
+        # Replaced as a whole, never modified: read it once per request
+        self.current = ModelHandler(self.models_dir, segment_memory_mb, explainers)
+    
+    def attach_inference_pool(self, inference_pool):
+        """Run the models of this and every later set in the pool's worker processes"""
+        self.inference_pool = inference_pool
+        self.current.inference_pool = inference_pool
+    
+    def reload_if_changed(self):
+        """
+        Reload the models if a new export has finished
+        
+        Only the version marker is read, so a poll during an export (files
+        replaced, marker not yet) changes nothing. The new set is loaded next
+        to the one in service and published with a single assignment;
+        requests in flight finish on the set they took. If loading fails, the
+        old set stays in service.
+        
+        Returns:
+            bool: Whether the models were reloaded
+        """
+        with self._reload_lock:
+            marker = read_version_marker(self.models_dir)
+            if marker is None or marker['version'] == self.current.model_version:
+                return False
+            self.current = ModelHandler(self.models_dir, self.segment_memory_mb, self.explainers, self.inference_pool)
+            return True
@@ -0,0 +1,267 @@
+"""
+Materialized price lookup cube
+Precomputed predict_price outputs over a grid of high-traffic configurations
+(manufacturer / type / year / condition / state x odometer bucket), stored as
+memory-mapped arrays so a hit costs a few dict lookups and one array read.
+Requests outside the grid, or in cells whose price was found to differ too
+much from live inference somewhere in the odometer bucket, fall back to live
+inference.
+"""
+import bisect
+import json
+import threading
+import time
+import numpy as np
+from pathlib import Path
+
+INDEX_FILE = 'index.json'
+PRICES_FILE = 'prices.npy'
+ERRORS_FILE = 'errors.npy'
+
+# Cells scored per model call while building
+BUILD_CHUNK_CELLS = 20000
+
+
+def _expand_values(model_handler, name, values):
+    """Resolve a dimension spec ("all", a list, or a year range) to a list of values"""
+    if values == 'all':
+        return list(model_handler.category_index[name])
+    if isinstance(values, dict):
+        return list(range(int(values['start']), int(values['stop']) + 1))
+    return list(values)
+
+
+def build_cube(model_handler, config, output_dir, chunk_cells=BUILD_CHUNK_CELLS):
+    """
+    Precompute predicted prices for every cell of the configured cube
+
+    Each cell is scored at ``samples_per_bucket`` evenly spaced odometer
+    values inside its bucket, and stores their mean. The cell is then
+    validated against live inference at ``validation_samples`` random
+    odometer values in the bucket: the largest relative difference between
+    the cell price and any live prediction (evenly spaced or random) is
+    stored as the cell's error. It is the error observed at those points,
+    not a bound over the whole bucket.
+
+    Args:
+        model_handler (ModelHandler): Loaded models
+        config (dict): {"dimensions": {feature: values}, "odometer_edges": [...],
+                        "fixed": {feature: value}, "samples_per_bucket": n,
+                        "validation_samples": n, "seed": n}
+        output_dir (str): Directory for the index and arrays
+        chunk_cells (int): Cells scored per model call
+
+    Returns:
+        dict: The written index
+    """
+    features = model_handler.REGRESSION_FEATURES
+    dimensions = [
+        (name, _expand_values(model_handler, name, values))
+        for name, values in config['dimensions'].items()
+    ]
+    edges = np.asarray(config['odometer_edges'], dtype=np.float64)
+    samples = int(config.get('samples_per_bucket', 3))
+    validation = int(config.get('validation_samples', 16))
+    rng = np.random.default_rng(config.get('seed', 0))
+    fixed = dict(config['fixed'])
+
+    names = [name for name, _ in dimensions]
+    derived = {'odometer', 'vehicle_age'}
+    missing = [f for f in features if f not in names and f not in fixed and f not in derived]
+    if missing:
+        raise ValueError(f"Features neither a dimension nor fixed: {', '.join(missing)}")
+    if len(edges) < 2 or np.any(np.diff(edges) <= 0):
+        raise ValueError('odometer_edges must be increasing with at least two edges')
+
+    # Encoded value of every dimension position
+    codes = []
+    for name, values in dimensions:
+        if name in model_handler.category_index:
+            lookup = model_handler.category_index[name]
+            unknown = [value for value in values if str(value) not in lookup]
+            if unknown:
+                raise ValueError(f"Unknown {name} value(s): {', '.join(map(str, unknown))}")
+            codes.append(np.array([lookup[str(value)] for value in values], dtype=np.float64))
+        else:
+            codes.append(np.asarray(values, dtype=np.float64))
+
+    # Fixed fields are encoded once; dimensions and odometer overwrite their columns
+    base_record = {feature: fixed.get(feature, 0) for feature in features}
+    base_record.update({name: values[0] for name, values in dimensions})
+    base_record['vehicle_age'] = 0
+    base = model_handler.build_feature_matrix([base_record], features)[0]
+
+    offsets = (np.arange(samples) + 0.5) / samples
+    bucket_samples = edges[:-1, None] + np.diff(edges)[:, None] * offsets
+
+    shape = tuple(len(values) for _, values in dimensions) + (len(edges) - 1,)
+    n_cells = int(np.prod(shape))
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    prices = np.lib.format.open_memmap(output_dir / PRICES_FILE, mode='w+', dtype=np.float32, shape=shape)
+    errors = np.lib.format.open_memmap(output_dir / ERRORS_FILE, mode='w+', dtype=np.float32, shape=shape)
+    flat_prices = prices.reshape(-1)
+    flat_errors = errors.reshape(-1)
+
+    started = time.perf_counter()
+    for start in range(0, n_cells, chunk_cells):
+        cells = np.arange(start, min(start + chunk_cells, n_cells))
+        positions = np.unravel_index(cells, shape)
+
+        # Evenly spaced points (the cell value), then random points (validation)
+        buckets = positions[-1]
+        random_points = edges[buckets, None] + np.diff(edges)[buckets, None] * rng.random((len(cells), validation))
+        odometers = np.hstack([bucket_samples[buckets], random_points])
+        points = samples + validation
+
+        X = np.tile(base, (len(cells) * points, 1))
+        for (name, _), code, position in zip(dimensions, codes, positions[:-1]):
+            X[:, features.index(name)] = np.repeat(code[position], points)
+        X[:, features.index('odometer')] = odometers.ravel()
+        X[:, features.index('vehicle_age')] = model_handler.current_year - X[:, features.index('year')]
+
+        predictions = model_handler.get_model('price').predict(X).reshape(len(cells), points)
+        means = predictions[:, :samples].mean(axis=1)
+        deviation = np.abs(predictions - means[:, None]).max(axis=1)
+
+        flat_prices[cells] = means
+        flat_errors[cells] = deviation / np.maximum(np.abs(means), 1.0)
+        print(f"  {cells[-1] + 1:,}/{n_cells:,} cells ({time.perf_counter() - started:.1f}s)")
+
+    prices.flush()
+    errors.flush()
+
+    index = {
+        'model_version': model_handler.model_version,
+        'model_used': type(model_handler.get_model('price')).__name__,
+        'dimensions': [{'feature': name, 'values': values} for name, values in dimensions],
+        'odometer_edges': edges.tolist(),
+        'fixed': fixed,
+        'samples_per_bucket': samples,
+        'validation_samples': validation,
+        'shape': list(shape),
+        'error_quantiles': {
+            q: float(np.quantile(errors, float(q))) for q in ('0.5', '0.9', '0.99')
+        }
+    }
+    # Written last: a cube without an index is never loaded
+    with open(output_dir / INDEX_FILE, 'w') as f:
+        json.dump(index, f, indent=2)
+
+    return index
+
+
+class PriceCube:
+    def __init__(self, cube_dir, max_error=0.05):
+        """
+        Memory-map a cube written by build_cube
+
+        Args:
+            cube_dir (str): Directory holding the index and arrays
+            max_error (float): Largest per-cell relative error (vs live
+                               inference at the build's sample points)
+                               served from the cube; other cells use
+                               live inference
+        """
+        self.max_error = max_error
+
+        cube_dir = Path(cube_dir)
+        with open(cube_dir / INDEX_FILE) as f:
+            index = json.load(f)
+        self.prices = np.load(cube_dir / PRICES_FILE, mmap_mode='r')
+        self.errors = np.load(cube_dir / ERRORS_FILE, mmap_mode='r')
+
+        self.model_version = index['model_version']
+        self.model_used = index['model_used']
+        self.fixed = index['fixed']
+        self.edges = index['odometer_edges']
+        self.positions = [
+            (dimension['feature'], {
+                str(value) if isinstance(value, str) else float(value): position
+                for position, value in enumerate(dimension['values'])
+            })
+            for dimension in index['dimensions']
+        ]
+
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'over_error': 0, 'stale': 0, 'segmented': 0}
+
+    def _count(self, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def _cell(self, record, current_year):
+        """Array index of the cell covering a validated input, or None"""
+        for feature, value in self.fixed.items():
+            if record.get(feature) != value:
+                return None
+        if 'vehicle_age' in record and record['vehicle_age'] != current_year - record['year']:
+            return None
+
+        cell = []
+        for feature, lookup in self.positions:
+            value = record.get(feature)
+            if value is None:
+                return None
+            position = lookup.get(value if isinstance(value, str) else float(value))
+            if position is None:
+                return None
+            cell.append(position)
+
+        odometer = record['odometer']
+        if not self.edges[0] <= odometer <= self.edges[-1]:
+            return None
+        bucket = min(bisect.bisect_right(self.edges, odometer), len(self.edges) - 1) - 1
+        cell.append(bucket)
+        return tuple(cell)
+
+    def lookup(self, record, models):
+        """
+        Answer a price prediction from the cube
+
+        Args:
+            record (dict): Validated predict_price input (defaults filled in)
+            models (ModelHandler): Model set serving the request (a cube built
+                                   for another version is stale)
+
+        Returns:
+            dict: Prediction in the predict_price format, or None on a miss
+        """
+        if self.model_version != models.model_version:
+            self._count('stale')
+            return None
+
+        # The cube holds global-model prices; segment models answer their own records
+        if models.segment_for('price', record) is not None:
+            self._count('segmented')
+            return None
+
+        cell = self._cell(record, models.current_year)
+        if cell is None:
+            self._count('misses')
+            return None
+
+        error = float(self.errors[cell])
+        if error > self.max_error:
+            self._count('over_error')
+            return None
+
+        self._count('hits')
+        return {
+            'predicted_price': float(self.prices[cell]),
+            'model_used': self.model_used,
+            'currency': 'USD',
+            'source': 'price_cube',
+            'max_relative_error': round(error, 4)
+        }
+
+    def get_stats(self):
+        """Hit / miss counters and the cube's size"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = sum(stats.values())
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        stats['cells'] = int(self.prices.size)
+        stats['max_error'] = self.max_error
+        return stats
@@ -0,0 +1,288 @@
+"""
+Replay recorded prediction traffic against a backend
+Reads audit logs written with AUDIT_LOG_DIR (see audit_log.py), or their JSON
+lines export, rebuilds each /predict/* request and sends it with the
+recorded inter-arrival times (optionally sped up) or at a fixed rate. Reports
+latency percentiles, an error breakdown and differences between the new
+responses and the recorded outputs, so a model or server change can be
+checked for speed and correctness in one run.
+
+Recorded inputs are the validated ones (defaults filled in, unknown
+categories kept as they were sent).
+
+Usage (from the backend directory):
+    python replay.py 'audit/*.audit' --start-backend --speed 4
+    python replay.py traffic.jsonl --url http://localhost:5000 --rate 200
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from audit_log import read_log, FILE_SUFFIX
+
+# Endpoint name -> (path, request body from the recorded inputs, response field compared with the outputs)
+ENDPOINTS = {
+    'predict_price': ('/predict/price', lambda inputs: inputs, 'prediction'),
+    'predict_condition': ('/predict/condition', lambda inputs: inputs, 'prediction'),
+    'predict_price_batch': ('/predict/price/batch', lambda inputs: {'instances': inputs}, 'predictions'),
+    'predict_condition_batch': ('/predict/condition/batch', lambda inputs: {'instances': inputs}, 'predictions'),
+    'predict_price_sweep': ('/predict/price/sweep', lambda inputs: inputs, 'sweep')
+}
+
+# Differences listed in the report
+MAX_DIFF_EXAMPLES = 20
+
+# Sends behind schedule by more than this are reported
+LATE_SEND_SECONDS = 0.005
+
+
+def load_records(patterns, endpoints=None, limit=None):
+    """Recorded requests from audit logs or JSON lines, oldest first"""
+    paths = sorted(path for pattern in patterns for path in (glob.glob(pattern) or [pattern]))
+    records = []
+    for path in paths:
+        if path.endswith(FILE_SUFFIX):
+            entries = read_log(path)
+        else:
+            with open(path) as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        for entry in entries:
+            if entry['endpoint'] in ENDPOINTS and (not endpoints or entry['endpoint'] in endpoints):
+                records.append(entry)
+    records.sort(key=lambda entry: entry['ts'])
+    return records[:limit] if limit else records
+
+
+def schedule(records, speed=1.0, rate=None):
+    """Send offsets (seconds from the start) for each record"""
+    if rate:
+        return [position / rate for position in range(len(records))]
+    start = records[0]['ts']
+    return [(entry['ts'] - start) / speed for entry in records]
+
+
+def diff(expected, actual, tolerance, path=''):
+    """
+    Differences between a recorded and a new response
+
+    Numbers match within a relative tolerance.
+
+    Returns:
+        list: (path, expected, actual) of each difference
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = []
+        for key in sorted(set(expected) | set(actual)):
+            if key not in expected or key not in actual:
+                differences.append((f"{path}.{key}", expected.get(key), actual.get(key)))
+            else:
+                differences.extend(diff(expected[key], actual[key], tolerance, f"{path}.{key}"))
+        return differences
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [(f"{path}[len]", len(expected), len(actual))]
+        return [
+            difference
+            for position, (e, a) in enumerate(zip(expected, actual))
+            for difference in diff(e, a, tolerance, f"{path}[{position}]")
+        ]
+    numbers = (int, float)
+    if isinstance(expected, numbers) and isinstance(actual, numbers) and not isinstance(expected, bool):
+        if math.isclose(expected, actual, rel_tol=tolerance, abs_tol=tolerance):
+            return []
+        return [(path, expected, actual)]
+    return [] if expected == actual else [(path, expected, actual)]
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = np.asarray(values)
+    return {
+        'count': len(values),
+        'p50': round(float(np.percentile(values, 50)), 2),
+        'p90': round(float(np.percentile(values, 90)), 2),
+        'p99': round(float(np.percentile(values, 99)), 2),
+        'max': round(float(values.max()), 2)
+    }
+
+
+def send(session, url, entry, timeout):
+    """Send one recorded request; returns (status or exception name, latency ms, response body)"""
+    path, body, _ = ENDPOINTS[entry['endpoint']]
+    started = time.perf_counter()
+    try:
+        response = session.post(f"{url}{path}", json=body(entry['inputs']), timeout=timeout)
+        latency = (time.perf_counter() - started) * 1000
+        try:
+            return response.status_code, latency, response.json()
+        except ValueError:
+            return response.status_code, latency, None
+    except requests.exceptions.RequestException as e:
+        return type(e).__name__, (time.perf_counter() - started) * 1000, None
+
+
+def replay(records, url, speed=1.0, rate=None, concurrency=8, timeout=30.0, tolerance=1e-6):
+    """
+    Send the records on schedule and compare the responses
+
+    Returns:
+        dict: Latency percentiles, error breakdown and response differences
+    """
+    offsets = schedule(records, speed, rate)
+    results = [None] * len(records)
+    lags = []
+    local = threading.local()
+
+    def run(position):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        # Behind schedule when every worker was busy (list.append is thread-safe)
+        lag = time.perf_counter() - started - offsets[position]
+        if lag > LATE_SEND_SECONDS:
+            lags.append(lag * 1000)
+        results[position] = send(local.session, url, records[position], timeout)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for position, offset in enumerate(offsets):
+            delay = offset - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(run, position)
+    elapsed = time.perf_counter() - started
+
+    latencies = defaultdict(list)
+    errors = Counter()
+    compared = Counter()
+    mismatched = Counter()
+    examples = []
+    for entry, (status, latency, body) in zip(records, results):
+        endpoint = entry['endpoint']
+        latencies[endpoint].append(latency)
+        if status != 200:
+            message = body.get('error', '') if isinstance(body, dict) else ''
+            errors[f"{endpoint} {status} {message[:80]}".strip()] += 1
+            continue
+
+        compared[endpoint] += 1
+        field = ENDPOINTS[endpoint][2]
+        differences = diff(entry['outputs'], body.get(field) if isinstance(body, dict) else None, tolerance)
+        if differences:
+            mismatched[endpoint] += 1
+            for path, expected, actual in differences[:3]:
+                if len(examples) < MAX_DIFF_EXAMPLES:
+                    examples.append({
+                        'endpoint': endpoint, 'recorded_at': entry['ts'],
+                        'path': path, 'recorded': expected, 'replayed': actual
+                    })
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    return {
+        'requests': len(records),
+        'seconds': round(elapsed, 2),
+        'throughput_rps': round(len(records) / elapsed, 1) if elapsed else None,
+        'mode': f"rate {rate}/s" if rate else f"recorded timing x{speed}",
+        'recorded_model_versions': sorted({str(entry.get('model_version')) for entry in records}),
+        'latency_ms': {
+            'all': percentiles(all_latencies),
+            **{endpoint: percentiles(values) for endpoint, values in sorted(latencies.items())}
+        },
+        # Requests sent later than scheduled (the client could not keep up)
+        'late_sends': {'count': len(lags), 'max_ms': round(max(lags), 2) if lags else 0.0},
+        'errors': dict(errors.most_common()),
+        'responses': {
+            endpoint: {'compared': compared[endpoint], 'mismatched': mismatched[endpoint]}
+            for endpoint in sorted(compared)
+        },
+        'diff_examples': examples
+    }
+
+
+def start_backend(port, timeout=120.0):
+    """Start app.py from this directory on a port and wait until /health answers"""
+    env = {**os.environ, 'PORT': str(port), 'FLASK_ENV': 'production'}
+    # Replayed requests must not end up in the audit log being replayed
+    env.pop('AUDIT_LOG_DIR', None)
+    process = subprocess.Popen(
+        [sys.executable, 'app.py'], cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Backend exited with code {process.returncode}")
+        try:
+            if requests.get(f"{url}/health", timeout=1).json().get('models_loaded'):
+                return process, url
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Backend did not become healthy within {timeout:.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded /predict/* traffic against a backend')
+    parser.add_argument('files', nargs='+', help='Audit logs (*.audit) or their JSON lines export; globs are expanded')
+    parser.add_argument('--url', default='http://localhost:5000', help='Backend to replay against')
+    parser.add_argument('--start-backend', action='store_true', help='Start app.py from this directory first')
+    parser.add_argument('--port', type=int, default=5055, help='Port of the started backend')
+    timing = parser.add_mutually_exclusive_group()
+    timing.add_argument('--speed', type=float, default=1.0, help='Multiplier of the recorded request rate')
+    timing.add_argument('--rate', type=float, default=None, help='Send at this many requests per second instead')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at most')
+    parser.add_argument('--endpoint', action='append', choices=list(ENDPOINTS), help='Replay only these endpoints')
+    parser.add_argument('--limit', type=int, default=None, help='Replay only the first N requests')
+    parser.add_argument('--tolerance', type=float, default=1e-6, help='Relative tolerance of numeric output diffs')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout (seconds)')
+    parser.add_argument('--report', default=None, help='Also write the report to this JSON file')
+    args = parser.parse_args()
+
+    records = load_records(args.files, args.endpoint, args.limit)
+    if not records:
+        parser.error('No /predict/* records found')
+    print(f"📂 {len(records):,} recorded requests")
+
+    process, url = None, args.url
+    if args.start_backend:
+        print(f"🚀 Starting backend on port {args.port}")
+        process, url = start_backend(args.port)
+    try:
+        report = replay(records, url, args.speed, args.rate, args.concurrency, args.timeout, args.tolerance)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    overall = report['latency_ms']['all']
+    print(f"\n⏱️  {report['requests']:,} requests in {report['seconds']}s ({report['throughput_rps']} req/s)")
+    print(f"   p50 {overall['p50']} ms, p90 {overall['p90']} ms, p99 {overall['p99']} ms, max {overall['max']} ms")
+    if report['late_sends']['count']:
+        print(f"⚠️ {report['late_sends']['count']:,} requests sent late (up to {report['late_sends']['max_ms']:.0f} ms); "
+              f"raise --concurrency")
+    for error, count in report['errors'].items():
+        print(f"❌ {count:,} x {error}")
+    for endpoint, responses in report['responses'].items():
+        print(f"   {endpoint}: {responses['mismatched']:,} of {responses['compared']:,} responses differ")
+    for example in report['diff_examples'][:5]:
+        print(f"   {example['endpoint']} {example['path']}: {example['recorded']} -> {example['replayed']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Request schemas for the prediction endpoints
+Declarative field specs are compiled once at startup into column-wise
+validators, so whole batches are type- and range-checked before any
+encoding or model work is done.
+"""
+import math
+import numpy as np
+
+# Maximum number of field errors reported back to the client
+MAX_REPORTED_ERRORS = 100
+
+_MISSING = object()
+
+# Fields shared by both endpoints
+_VEHICLE_FIELDS = {
+    'year': {'type': 'int', 'required': True, 'min': 1900, 'max': 2030},
+    'odometer': {'type': 'number', 'required': True, 'min': 0, 'max': 1_000_000},
+    'lat': {'type': 'number', 'default': 33.7490, 'min': -90, 'max': 90},
+    'long': {'type': 'number', 'default': -84.3880, 'min': -180, 'max': 180},
+    'vehicle_age': {'type': 'number', 'min': -10, 'max': 150},
+    'manufacturer': {'type': 'string', 'required': True},
+    'fuel': {'type': 'string', 'required': True},
+    'transmission': {'type': 'string', 'required': True},
+    'title_status': {'type': 'string', 'default': 'clean'},
+    'drive': {'type': 'string', 'default': 'fwd'},
+    'size': {'type': 'string', 'default': 'mid-size'},
+    'type': {'type': 'string', 'default': 'sedan'},
+    'paint_color': {'type': 'string', 'default': 'white'},
+    'state': {'type': 'string', 'default': 'ca'},
+    'region': {'type': 'string', 'default': 'los angeles'},
+}
+
+# POST /predict/price
+PRICE_SCHEMA = {
+    **_VEHICLE_FIELDS,
+    'condition': {'type': 'string', 'default': 'good'},
+}
+
+# POST /predict/condition
+CONDITION_SCHEMA = {
+    'price': {'type': 'number', 'required': True, 'min': 0, 'max': 500_000},
+    **_VEHICLE_FIELDS,
+}
+
+# Features that can be swept by /predict/price/sweep
+SWEEP_FEATURES = ['year', 'odometer', 'lat', 'long']
+
+_TYPE_NAMES = {'int': 'an integer', 'number': 'a number', 'string': 'a string'}
+
+
+class ValidationError(ValueError):
+    def __init__(self, errors, is_batch):
+        """
+        Raised when one or more inputs fail schema validation
+
+        Args:
+            errors (list): Dicts with 'row' (batch only), 'field' and 'message'
+            is_batch (bool): Whether the request was a batch
+        """
+        self.errors = errors
+        self.is_batch = is_batch
+        super().__init__(self.summary())
+
+    def summary(self):
+        """One-line description of the validation failure"""
+        first = self.errors[0]
+        if not self.is_batch:
+            return f"Invalid input: {first['field']}: {first['message']}"
+        rows = len({error['row'] for error in self.errors})
+        return (f"Invalid input in {rows} instance(s), first at instance {first['row']}: "
+                f"{first['field']}: {first['message']}")
+
+
+class CompiledSchema:
+    def __init__(self, spec):
+        """
+        Compile a declarative field spec into column validators
+
+        Args:
+            spec (dict): Field name -> {'type': 'int' | 'number' | 'string',
+                         'required': bool, 'default': value, 'min': x, 'max': y}
+        """
+        self.fields = list(spec)
+        self.required = [name for name, rule in spec.items() if rule.get('required')]
+        self.defaults = {name: rule['default'] for name, rule in spec.items() if 'default' in rule}
+        self.numeric = [
+            (name, rule['type'] == 'int', rule.get('min', -math.inf), rule.get('max', math.inf))
+            for name, rule in spec.items() if rule['type'] in ('int', 'number')
+        ]
+        self.strings = [name for name, rule in spec.items() if rule['type'] == 'string']
+        self.types = {name: rule['type'] for name, rule in spec.items()}
+        self.bounds = {name: (low, high) for name, _, low, high in self.numeric}
+
+    def validate(self, record):
+        """
+        Validate a single input and fill in defaults
+
+        Returns:
+            dict: Normalized copy of the input
+
+        Raises:
+            ValidationError: If the input is invalid
+        """
+        return self._validate(self._check_objects([record]), is_batch=False)[0]
+
+    def validate_batch(self, records):
+        """
+        Validate a batch column by column and fill in defaults
+
+        Returns:
+            list: Normalized copies of the inputs
+
+        Raises:
+            ValidationError: If any input is invalid
+        """
+        return self._validate(self._check_objects(records), is_batch=True)
+
+    def validate_axes(self, axes, max_points):
+        """
+        Validate sweep axes and expand them into value arrays
+
+        Each axis is {"feature": name, "values": [...]} or
+        {"feature": name, "start": x, "stop": y, "step": z} (stop inclusive).
+
+        Args:
+            axes (list): One or two axis specs
+            max_points (int): Maximum number of grid points
+
+        Returns:
+            list: (feature, np.ndarray of values) per axis
+
+        Raises:
+            ValueError: If the axes are invalid
+        """
+        if not isinstance(axes, list) or not 1 <= len(axes) <= 2:
+            raise ValueError('"axes" must be a list of one or two axes')
+
+        expanded = []
+        for axis in axes:
+            feature = axis.get('feature') if isinstance(axis, dict) else None
+            if feature not in SWEEP_FEATURES or feature not in self.bounds:
+                raise ValueError(f'Axis feature must be one of: {", ".join(SWEEP_FEATURES)}')
+            if feature in (name for name, _ in expanded):
+                raise ValueError(f'Duplicate axis: {feature}')
+
+            if 'values' in axis:
+                values = axis['values']
+                if not isinstance(values, list) or not values or \
+                        not all(type(value) in (int, float) for value in values):
+                    raise ValueError(f'{feature}: "values" must be a non-empty list of numbers')
+                values = np.asarray(values, dtype=np.float64)
+            else:
+                try:
+                    start, stop, step = (float(axis[key]) for key in ('start', 'stop', 'step'))
+                except (KeyError, TypeError, ValueError):
+                    raise ValueError(f'{feature}: give either "values" or numeric "start", "stop" and "step"')
+                if step <= 0 or stop < start:
+                    raise ValueError(f'{feature}: need step > 0 and stop >= start')
+                if (stop - start) / step + 1 > max_points:
+                    raise ValueError(f'{feature}: axis has more than {max_points} points')
+                values = np.arange(start, stop + step / 2, step)
+
+            low, high = self.bounds[feature]
+            if not np.isfinite(values).all() or values.min() < low or values.max() > high:
+                raise ValueError(f'{feature}: values out of range [{low}, {high}]')
+            expanded.append((feature, values))
+
+        n_points = int(np.prod([len(values) for _, values in expanded]))
+        if n_points > max_points:
+            raise ValueError(f'Grid has {n_points} points, the limit is {max_points}')
+
+        return expanded
+
+    def _check_objects(self, records):
+        if not all(isinstance(record, dict) for record in records):
+            raise ValueError('Every input must be a JSON object')
+        return records
+
+    def _validate(self, records, is_batch):
+        if not records:
+            return []
+
+        errors = []
+        normalized = [dict(record) for record in records]
+
+        def add_errors(rows, field, message):
+            for row in rows:
+                errors.append({'row': int(row), 'field': field, 'message': message})
+
+        # Required fields
+        for name in self.required:
+            missing = [row for row, record in enumerate(records) if record.get(name) is None]
+            add_errors(missing, name, 'missing required field')
+
+        # Numeric fields: type check per value, range check on the whole column
+        for name, is_int, low, high in self.numeric:
+            column = [record.get(name, _MISSING) for record in records]
+            present = np.array([value is not _MISSING and value is not None for value in column])
+            typed = np.array([
+                type(value) in (int, float) for value in column
+            ])
+            bad_type = present & ~typed
+            add_errors(np.flatnonzero(bad_type), name, f'expected {_TYPE_NAMES[self.types[name]]}')
+
+            rows = np.flatnonzero(present & typed)
+            if len(rows) == 0:
+                continue
+            values = np.array([column[row] for row in rows], dtype=np.float64)
+
+            not_finite = ~np.isfinite(values)
+            add_errors(rows[not_finite], name, 'must be a finite number')
+
+            out_of_range = np.isfinite(values) & ((values < low) | (values > high))
+            add_errors(rows[out_of_range], name, f'out of range [{low}, {high}]')
+
+            if is_int:
+                fractional = np.isfinite(values) & (values != np.floor(values))
+                add_errors(rows[fractional], name, f'expected {_TYPE_NAMES["int"]}')
+                for row, value in zip(rows, values):
+                    normalized[row][name] = int(value) if math.isfinite(value) else value
+
+        # String fields
+        for name in self.strings:
+            bad = [
+                row for row, record in enumerate(records)
+                if record.get(name) is not None and (not isinstance(record[name], str) or not record[name].strip())
+            ]
+            add_errors(bad, name, 'expected a non-empty string')
+
+        if errors:
+            errors.sort(key=lambda error: error['row'])
+            errors = errors[:MAX_REPORTED_ERRORS]
+            if not is_batch:
+                for error in errors:
+                    del error['row']
+            raise ValidationError(errors, is_batch)
+
+        # Defaults for absent (or null) optional fields
+        for name, default in self.defaults.items():
+            for record in normalized:
+                if record.get(name) is None:
+                    record[name] = default
+
+        return normalized
+
+
+def compile_schema(spec):
+    """Compile a declarative schema (see CompiledSchema)"""
+    return CompiledSchema(spec)
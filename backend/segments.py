@@ -0,0 +1,138 @@
+"""
+Per-segment models loaded on demand
+A manifest (segments.json next to the global models) maps values of a routing
+field, e.g. manufacturer or state, to models trained on that slice of the
+data. Segment models are unpickled on first use and kept in an LRU cache
+bounded by a memory budget; requests outside every segment use the global
+model.
+
+Manifest format:
+    {
+      "price": {
+        "route_by": "manufacturer",
+        "segments": {
+          "luxury": {"model": "segments/price_luxury.pkl", "values": ["audi", "bmw"]}
+        }
+      },
+      "condition": {...}
+    }
+"""
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from coalescing import SingleFlight
+
+MANIFEST_FILE = 'segments.json'
+
+KINDS = ('price', 'condition')
+
+
+def load_manifest(models_dir):
+    """
+    Read and check the segment manifest
+
+    Args:
+        models_dir (Path): Models directory
+
+    Returns:
+        dict: kind -> {'route_by': field, 'routes': {value: segment}, 'files': {segment: Path}}
+              (empty when there is no manifest)
+    """
+    path = Path(models_dir) / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        manifest = json.load(f)
+
+    segments = {}
+    for kind, spec in manifest.items():
+        if kind not in KINDS:
+            raise ValueError(f"Unknown segment kind '{kind}' in {MANIFEST_FILE}")
+        routes, files = {}, {}
+        for name, segment in spec['segments'].items():
+            files[name] = Path(models_dir) / segment['model']
+            if not files[name].exists():
+                raise ValueError(f"Segment model not found: {files[name]}")
+            for value in segment['values']:
+                if routes.setdefault(str(value), name) != name:
+                    raise ValueError(f"{spec['route_by']} '{value}' is in segments '{routes[str(value)]}' and '{name}'")
+        segments[kind] = {'route_by': spec['route_by'], 'routes': routes, 'files': files}
+    return segments
+
+
+def manifest_files(models_dir):
+    """Manifest and segment model paths, relative to models_dir (for versioning)"""
+    path = Path(models_dir) / MANIFEST_FILE
+    if not path.exists():
+        return []
+    with open(path) as f:
+        manifest = json.load(f)
+    return [MANIFEST_FILE] + sorted(
+        segment['model'] for spec in manifest.values() for segment in spec['segments'].values()
+    )
+
+
+class SegmentModelCache:
+    def __init__(self, memory_budget_mb):
+        """
+        LRU cache of unpickled segment models
+
+        Sizes are estimated from the pickle files. The most recently used
+        model is always kept, even if it alone exceeds the budget.
+
+        Args:
+            memory_budget_mb (float): Largest total size of resident models
+        """
+        self.memory_budget = memory_budget_mb * 1024 ** 2
+        self._lock = threading.Lock()
+        self._models = OrderedDict()  # key -> (model, size in bytes)
+        self._loads = SingleFlight()
+        self._stats = {'hits': 0, 'loads': 0, 'evictions': 0}
+
+    def _load(self, key, path):
+        with open(path, 'rb') as f:
+            model = pickle.load(f)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            self._stats['loads'] += 1
+            self._models[key] = (model, size)
+            self._models.move_to_end(key)
+            resident = sum(size for _, size in self._models.values())
+            while resident > self.memory_budget and len(self._models) > 1:
+                evicted, (_, evicted_size) = self._models.popitem(last=False)
+                resident -= evicted_size
+                self._stats['evictions'] += 1
+                print(f"♻️ Evicted segment model {evicted[0]}/{evicted[1]}")
+        print(f"✓ Segment model {key[0]}/{key[1]} loaded ({size / 1024 ** 2:.1f} MB)")
+        return model
+
+    def get(self, key, path):
+        """
+        Model for a segment, loading it on first use
+
+        Concurrent first requests for the same segment share one load.
+
+        Args:
+            key (tuple): (kind, segment name)
+            path (Path): Pickle file of the segment model
+        """
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._models[key][0]
+        return self._loads.do('segment', f"{key[0]}/{key[1]}", lambda: self._load(key, path))
+
+    def get_stats(self):
+        """Cache counters and the resident models"""
+        with self._lock:
+            return {
+                **self._stats,
+                'resident': [f"{kind}/{segment}" for kind, segment in self._models],
+                'resident_mb': sum(size for _, size in self._models.values()) / 1024 ** 2,
+                'memory_budget_mb': self.memory_budget / 1024 ** 2
+            }
@@ -0,0 +1,205 @@
+"""
+Prediction cache shared by every worker process on a host
+A fixed-size, set-associative hash table in a memory-mapped file (put it on
+/dev/shm for a RAM-backed table). Each worker maps the same file, so a
+repeated input hits the cache whichever worker computed it first.
+
+- Keys are 128-bit digests of (endpoint, canonical input); values are the
+  JSON-encoded predictions, up to one slot each.
+- Reads take no lock: every slot carries a sequence number that writers make
+  odd while they write (a seqlock) and a CRC of the value, so a torn read is
+  detected and treated as a miss.
+- Writers lock one of a fixed number of stripes of sets: a threading lock
+  within the process and an fcntl record lock across processes.
+- Each set evicts with CLOCK: hits set a reference bit, and the writer's hand
+  skips (and clears) referenced slots.
+- Entries carry a tag of the model version; entries of another version are
+  misses and are overwritten first, so a model reload invalidates the cache.
+"""
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+MAGIC = b'VPCACHE1'
+FORMAT = 1
+
+# magic, format, sets, ways, slot size, stripes
+HEADER = struct.Struct('<8sIIIII')
+HEADER_SIZE = 64
+
+# seq, reference bit, key digest, model version tag, value length, value crc32
+SLOT_HEADER = struct.Struct('<IB3x16s8sHI2x')
+SEQ = struct.Struct('<I')
+REF_OFFSET = 4
+
+# Attempts to read a slot that is being written before giving up (a miss)
+READ_RETRIES = 3
+
+
+def _digest(namespace, key):
+    return hashlib.blake2b(f"{namespace}\0{key}".encode(), digest_size=16).digest()
+
+
+def _version_tag(model_version):
+    return hashlib.blake2b(str(model_version).encode(), digest_size=8).digest()
+
+
+class SharedPredictionCache:
+    def __init__(self, path, size_mb=64, ways=8, slot_size=512, stripes=64):
+        """
+        Map (creating if needed) the shared table
+
+        Every process must use the same geometry; a file created with another
+        one is rejected.
+
+        Args:
+            path (str): Backing file, e.g. /dev/shm/vehicle-predictor-cache
+            size_mb (float): Size of the slot area
+            ways (int): Slots per set
+            slot_size (int): Bytes per slot (header + JSON value)
+            stripes (int): Writer lock stripes
+        """
+        self.path = path
+        self.ways = ways
+        self.slot_size = slot_size
+        self.stripes = stripes
+        self.n_sets = max(1, int(size_mb * 1024 ** 2) // (ways * slot_size))
+        self.max_value = slot_size - SLOT_HEADER.size
+        self._slots_offset = HEADER_SIZE + -(-self.n_sets // 64) * 64  # after the CLOCK hands
+        size = self._slots_offset + self.n_sets * ways * slot_size
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, FORMAT, self.n_sets, ways, slot_size, stripes), 0)
+            else:
+                header = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))
+                if header != (MAGIC, FORMAT, self.n_sets, ways, slot_size, stripes):
+                    raise ValueError(f"{path} was created with another cache geometry; remove it or match its settings")
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+        self._stripe_locks = [threading.Lock() for _ in range(stripes)]
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stale': 0, 'stores': 0, 'evictions': 0,
+                       'too_large': 0, 'busy_reads': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _slot(self, set_index, way):
+        return self._slots_offset + (set_index * self.ways + way) * self.slot_size
+
+    def _set_index(self, digest):
+        return int.from_bytes(digest[:8], 'little') % self.n_sets
+
+    def _read(self, offset, digest):
+        """Value bytes of a slot holding digest, (None, version tag) otherwise"""
+        for _ in range(READ_RETRIES):
+            seq, _, key, version, length, crc = SLOT_HEADER.unpack_from(self._map, offset)
+            if key != digest:
+                return None, None
+            if seq & 1:
+                continue
+            value = self._map[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + min(length, self.max_value)]
+            if SEQ.unpack_from(self._map, offset)[0] == seq and zlib.crc32(value) == crc:
+                return value, version
+        self._count('busy_reads')
+        return None, None
+
+    def get(self, namespace, key, model_version):
+        """
+        Cached prediction for a canonical input, or None
+
+        Args:
+            namespace (str): Endpoint name
+            key (str): Canonical input (coalescing.canonical_key)
+            model_version (str): Version the prediction must have been made with
+        """
+        digest = _digest(namespace, key)
+        tag = _version_tag(model_version)
+        set_index = self._set_index(digest)
+        for way in range(self.ways):
+            offset = self._slot(set_index, way)
+            value, version = self._read(offset, digest)
+            if value is None:
+                continue
+            if version != tag:
+                self._count('stale')
+                break
+            self._map[offset + REF_OFFSET] = 1
+            self._count('hits')
+            return json.loads(value)
+        self._count('misses')
+        return None
+
+    def put(self, namespace, key, model_version, value):
+        """
+        Store a prediction, evicting within its set if needed
+
+        Returns:
+            bool: False if the value does not fit in a slot
+        """
+        encoded = json.dumps(value, separators=(',', ':')).encode()
+        if len(encoded) > self.max_value:
+            self._count('too_large')
+            return False
+        digest = _digest(namespace, key)
+        tag = _version_tag(model_version)
+        set_index = self._set_index(digest)
+        stripe = set_index % self.stripes
+
+        # Advisory record lock on byte `stripe` of the file (other processes)
+        with self._stripe_locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                way = self._victim(set_index, digest, tag)
+                offset = self._slot(set_index, way)
+                # Odd while writing (already odd if a writer died mid-write)
+                writing = (SEQ.unpack_from(self._map, offset)[0] + 1) & 0xFFFFFFFF | 1
+                SEQ.pack_into(self._map, offset, writing)
+                self._map[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + len(encoded)] = encoded
+                SLOT_HEADER.pack_into(self._map, offset, writing, 1, digest, tag, len(encoded), zlib.crc32(encoded))
+                SEQ.pack_into(self._map, offset, (writing + 1) & 0xFFFFFFFF)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+        self._count('stores')
+        return True
+
+    def _victim(self, set_index, digest, tag):
+        """Way to write: the same key, else an empty or stale slot, else CLOCK (caller holds the stripe)"""
+        refs = []
+        for way in range(self.ways):
+            _, ref, key, version, length, _ = SLOT_HEADER.unpack_from(self._map, self._slot(set_index, way))
+            if key == digest or not length or version != tag:
+                return way
+            refs.append(ref)
+
+        hand_offset = HEADER_SIZE + set_index
+        hand = self._map[hand_offset] % self.ways
+        while refs[hand]:
+            refs[hand] = 0
+            self._map[self._slot(set_index, hand) + REF_OFFSET] = 0
+            hand = (hand + 1) % self.ways
+        self._map[hand_offset] = (hand + 1) % self.ways
+        self._count('evictions')
+        return hand
+
+    def get_stats(self):
+        """This process's counters and the table geometry"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        stats['slots'] = self.n_sets * self.ways
+        stats['path'] = self.path
+        return stats
@@ -0,0 +1,102 @@
+"""
+Prebuilt /supported-values response
+The payload is serialized (and compressed) once per model version and served
+as bytes with a strong ETag, so repeated fetches cost a dict lookup and
+conditional fetches a 304.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class SupportedValuesPayload:
+    def __init__(self, model_store):
+        """
+        Args:
+            model_store (ModelStore): Source of categories and feature info
+        """
+        self.model_store = model_store
+        self._lock = threading.Lock()
+        self._version = None
+        self._variants = {}
+        self._stats = {'builds': 0, 'responses': 0, 'not_modified': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _build(self, models):
+        """Serialize the payload and its compressed variants for a model set"""
+        body = json.dumps({
+            'success': True,
+            'valid_categories': models.get_valid_categories(),
+            'feature_info': models.get_feature_info()
+        }, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        variants = {'identity': (body, f'"{digest}"')}
+        variants['gzip'] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"')
+        if brotli is not None:
+            variants['br'] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+
+        return variants
+
+    def get_variants(self):
+        """Prebuilt variants, regenerated when the model version changes"""
+        models = self.model_store.current
+        version = models.model_version
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._variants = self._build(models)
+                    self._version = version
+                    self._stats['builds'] += 1
+        return self._variants
+
+    def response(self):
+        """
+        Serve the payload for the current request
+
+        Picks the best precomputed encoding from Accept-Encoding and answers
+        a matching If-None-Match with 304 Not Modified.
+        """
+        variants = self.get_variants()
+        self._count('responses')
+
+        encoding = 'identity'
+        for candidate in ('br', 'gzip'):
+            if candidate in variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        body, etag = variants[encoding]
+
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
+        }
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+
+        # Any variant's ETag identifies the same content version
+        if any(request.if_none_match.contains_weak(variant_etag.strip('"'))
+               for _, variant_etag in variants.values()):
+            self._count('not_modified')
+            return Response(status=304, headers=headers)
+
+        return Response(body, status=200, mimetype='application/json', headers=headers)
+
+    def get_stats(self):
+        """Build and response counters and the size of each prebuilt variant"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['model_version'] = self._version
+            stats['variant_bytes'] = {encoding: len(body) for encoding, (body, _) in self._variants.items()}
+        return stats
@@ -0,0 +1,126 @@
+import threading
+import time
+import pytest
+from flask import Flask
+from admission import AdmissionController, AdmissionRejected
+
+
+def test_limits_in_flight_requests():
+    admission = AdmissionController(max_in_flight=2, max_queued=0)
+
+    assert admission.acquire('price') is None
+    assert admission.acquire('condition') is None
+    assert admission.acquire('price') == 'queue_full'
+
+    admission.release('price')
+    assert admission.acquire('price') is None
+    assert admission.get_stats()['in_flight'] == 2
+
+
+def test_endpoint_limit_does_not_block_other_endpoints():
+    admission = AdmissionController(max_in_flight=4, endpoint_limits={'batch': 1}, max_queued=0)
+
+    assert admission.acquire('batch') is None
+    assert admission.acquire('batch') == 'queue_full'
+    assert admission.acquire('price') is None
+
+
+def test_batch_rows_are_budgeted():
+    admission = AdmissionController(max_batch_rows=100, max_queued=0)
+
+    assert admission.acquire('batch', rows=101) == 'too_large'
+    assert admission.acquire('batch', rows=60) is None
+    assert admission.acquire('batch', rows=60) == 'queue_full'
+    # Single requests carry no rows and are not held back by the row budget
+    assert admission.acquire('price') is None
+
+    admission.release('batch', rows=60)
+    assert admission.acquire('batch', rows=60) is None
+    assert admission.get_stats()['batch_rows_in_flight'] == 60
+
+
+def test_queued_request_times_out():
+    admission = AdmissionController(max_in_flight=1, queue_timeout=0.05)
+    admission.acquire('price')
+
+    started = time.monotonic()
+    assert admission.acquire('price') == 'timeout'
+    assert 0.05 <= time.monotonic() - started < 1
+    assert admission.get_stats()['queued'] == 0
+
+
+def test_queued_request_gets_freed_slot():
+    admission = AdmissionController(max_in_flight=1, queue_timeout=5)
+    admission.acquire('price')
+    outcome = []
+
+    waiter = threading.Thread(target=lambda: outcome.append(admission.acquire('price')))
+    waiter.start()
+    while admission.get_stats()['queued'] == 0:
+        time.sleep(0.001)
+    admission.release('price')
+    waiter.join(timeout=5)
+
+    assert outcome == [None]
+    assert admission.get_stats()['in_flight'] == 1
+
+
+def test_admit_context_manager():
+    admission = AdmissionController(max_in_flight=1, max_queued=0)
+
+    with admission.admit('price'):
+        with pytest.raises(AdmissionRejected) as info:
+            with admission.admit('price'):
+                pass
+        assert info.value.reason == 'queue_full'
+
+    assert admission.get_stats()['in_flight'] == 0
+
+
+def test_counters_per_endpoint():
+    admission = AdmissionController(max_in_flight=1, max_batch_rows=10, max_queued=0)
+    admission.acquire('price')
+    admission.acquire('price')
+    admission.acquire('batch', rows=11)
+
+    endpoints = admission.get_stats()['endpoints']
+    assert endpoints['price'] == {
+        'admitted': 1, 'rejected_queue_full': 1, 'rejected_timeout': 0, 'rejected_too_large': 0
+    }
+    assert endpoints['batch']['rejected_too_large'] == 1
+
+
+def test_guard_sheds_with_retry_after():
+    admission = AdmissionController(max_in_flight=1, max_batch_rows=10, max_queued=0, retry_after=7)
+    app = Flask(__name__)
+    entered, leave = threading.Event(), threading.Event()
+
+    @app.route('/slow')
+    @admission.guard('slow')
+    def slow():
+        entered.set()
+        leave.wait(5)
+        return 'ok'
+
+    @app.route('/batch')
+    @admission.guard('batch', rows=lambda: 11)
+    def batch():
+        return 'ok'
+
+    client = app.test_client()
+    holder = threading.Thread(target=lambda: client.get('/slow'))
+    holder.start()
+    entered.wait(5)
+
+    busy = client.get('/slow')
+    assert busy.status_code == 503
+    assert busy.headers['Retry-After'] == '7'
+    assert busy.get_json()['reason'] == 'queue_full'
+
+    leave.set()
+    holder.join(timeout=5)
+    assert client.get('/slow').status_code == 200
+
+    too_large = client.get('/batch')
+    assert too_large.status_code == 413
+    assert 'limit of 10 rows' in too_large.get_json()['error']
@@ -0,0 +1,83 @@
+import os
+import numpy as np
+import pytest
+from audit_log import AuditLogger, FILE_SUFFIX, read_log
+
+
+def log_files(log_dir):
+    return sorted(log_dir.glob(f'*{FILE_SUFFIX}'))
+
+
+def read_all(log_dir):
+    return [entry for path in log_files(log_dir) for entry in read_log(path)]
+
+
+def test_round_trip(tmp_path):
+    logger = AuditLogger(tmp_path, batch_size=2, flush_interval=0.05)
+    for i in range(5):
+        assert logger.record('predict_price', {'year': 2010 + i}, {'price': np.float32(1000.5 * i)},
+                             'abc123', latency_ms=1.23456, client='test')
+    logger.close()
+
+    entries = read_all(tmp_path)
+    assert [entry['inputs']['year'] for entry in entries] == [2010, 2011, 2012, 2013, 2014]
+    assert entries[1]['outputs'] == {'price': 1000.5}
+    assert entries[0]['endpoint'] == 'predict_price'
+    assert entries[0]['model_version'] == 'abc123'
+    assert entries[0]['latency_ms'] == 1.235
+    assert entries[0]['client'] == 'test'
+
+    stats = logger.get_stats()
+    assert stats['records'] == stats['written'] == 5
+    assert stats['frames'] >= 3
+    assert stats['dropped'] == stats['write_errors'] == 0
+
+
+def test_rotates_by_size(tmp_path):
+    # Every frame is larger than the limit, so each one ends its file
+    logger = AuditLogger(tmp_path, batch_size=1, flush_interval=0.05, max_file_mb=1e-6)
+    for i in range(3):
+        logger.record('predict_price', {'i': i}, {}, 'v', 0.0)
+    logger.close()
+
+    files = log_files(tmp_path)
+    assert len(files) == 3 == logger.get_stats()['files']
+    assert [entry['inputs']['i'] for entry in read_all(tmp_path)] == [0, 1, 2]
+
+
+def test_truncated_last_frame_is_skipped(tmp_path, capsys):
+    logger = AuditLogger(tmp_path, batch_size=1, flush_interval=0.05)
+    for i in range(3):
+        logger.record('predict_price', {'i': i}, {}, 'v', 0.0)
+    logger.close()
+
+    path, = log_files(tmp_path)
+    complete = path.read_bytes()
+
+    path.write_bytes(complete[:-3])
+    assert [entry['inputs']['i'] for entry in read_log(path)] == [0, 1]
+    assert 'truncated or corrupt frame' in capsys.readouterr().err
+
+    # A crash inside the frame header is tolerated too
+    path.write_bytes(complete + b'\x01\x02')
+    assert [entry['inputs']['i'] for entry in read_log(path)] == [0, 1, 2]
+    assert 'truncated frame header' in capsys.readouterr().err
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / f'other{FILE_SUFFIX}'
+    path.write_bytes(b'not an audit log')
+    with pytest.raises(ValueError, match='not an audit log'):
+        list(read_log(path))
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    logger = AuditLogger(tmp_path, max_queue=2)
+    # Pretend the writer is already running so nothing drains the queue
+    logger._pid = os.getpid()
+
+    results = [logger.record('predict_price', {}, {}, 'v', 0.0) for _ in range(4)]
+
+    assert results == [True, True, False, False]
+    stats = logger.get_stats()
+    assert (stats['records'], stats['dropped'], stats['queue_depth']) == (2, 2, 2)
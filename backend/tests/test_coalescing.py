@@ -0,0 +1,99 @@
+import threading
+import time
+import pytest
+from coalescing import SingleFlight, canonical_key
+
+
+def test_canonical_key_ignores_order_and_int_float():
+    assert canonical_key({'year': 2015, 'odometer': 50000}) == \
+        canonical_key({'odometer': 50000.0, 'year': 2015.0})
+    assert canonical_key({'fuel': 'gas'}) != canonical_key({'fuel': 'diesel'})
+    # Booleans are not numbers
+    assert canonical_key({'flag': True}) != canonical_key({'flag': 1})
+
+
+def start_callers(flight, namespace, key, n, fn):
+    """Run flight.do(namespace, key, fn) from n threads, collecting results or exceptions"""
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(_outcome(flight, namespace, key, fn)))
+        for _ in range(n)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _outcome(flight, namespace, key, fn):
+    try:
+        return flight.do(namespace, key, fn)
+    except Exception as e:
+        return e
+
+
+def wait_for_requests(flight, namespace, n):
+    while flight.get_stats().get(namespace, {}).get('requests', 0) < n:
+        time.sleep(0.001)
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    executions = []
+
+    def compute():
+        executions.append(1)
+        started.set()
+        release.wait(5)
+        return {'price': 12000}
+
+    leader, leader_results = start_callers(flight, 'price', 'k', 1, compute)
+    started.wait(5)
+    followers, results = start_callers(flight, 'price', 'k', 5, compute)
+    wait_for_requests(flight, 'price', 6)
+    release.set()
+    for thread in leader + followers:
+        thread.join(timeout=5)
+
+    assert len(executions) == 1
+    assert leader_results + results == [{'price': 12000}] * 6
+    stats = flight.get_stats()['price']
+    assert (stats['requests'], stats['executions'], stats['coalesced']) == (6, 1, 5)
+    assert stats['in_flight'] == 0
+    assert stats['coalescing_ratio'] == pytest.approx(5 / 6)
+
+
+def test_followers_receive_leader_exception():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('model failed')
+
+    leader, leader_results = start_callers(flight, 'price', 'k', 1, fail)
+    started.wait(5)
+    followers, results = start_callers(flight, 'price', 'k', 2, fail)
+    wait_for_requests(flight, 'price', 3)
+    release.set()
+    for thread in leader + followers:
+        thread.join(timeout=5)
+
+    errors = leader_results + results
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert len({id(error) for error in errors}) == 1
+
+    # The failed call is not remembered
+    assert flight.do('price', 'k', lambda: 'ok') == 'ok'
+
+
+def test_namespaces_and_sequential_calls_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do('price', 'k', lambda: 1) == 1
+    assert flight.do('price', 'k', lambda: 2) == 2
+    assert flight.do('condition', 'k', lambda: 3) == 3
+
+    stats = flight.get_stats()
+    assert stats['price']['executions'] == 2 and stats['price']['coalesced'] == 0
+    assert stats['condition']['executions'] == 1
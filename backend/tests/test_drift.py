@@ -0,0 +1,130 @@
+import json
+import numpy as np
+import pytest
+from drift import DriftMonitor, MisraGries, psi, REFERENCE_BUCKETS
+
+
+@pytest.fixture
+def reference_path(tmp_path):
+    """Reference with one numeric feature and a long-tailed 400-value categorical one"""
+    rng = np.random.default_rng(0)
+    odometer = rng.normal(100000, 30000, 50000)
+    edges = np.unique(np.quantile(odometer, np.arange(1, 20) / 20))
+    counts = np.bincount(np.searchsorted(edges, odometer, side='right'), minlength=len(edges) + 1)
+
+    weights = 1.0 / np.arange(1, 401)
+    regions = {f"region-{i}": int(count) for i, count in enumerate(np.round(weights / weights.sum() * 100000))}
+    reference = {
+        'built_at': '2021-01-01T00:00:00',
+        'rows': 50000,
+        'numeric': {'odometer': {
+            'edges': edges.tolist(), 'counts': counts.tolist(),
+            'min': float(odometer.min()), 'max': float(odometer.max())
+        }},
+        'categorical': {'region': {'counts': regions}}
+    }
+    path = tmp_path / 'drift_reference.json'
+    path.write_text(json.dumps(reference))
+    return path
+
+
+def sample_records(reference_path, n, seed, odometer_shift=0.0, unknown_share=0.0):
+    reference = json.loads(reference_path.read_text())
+    regions = reference['categorical']['region']['counts']
+    rng = np.random.default_rng(seed)
+    values = rng.choice(list(regions), size=n, p=np.array(list(regions.values())) / sum(regions.values()))
+    odometers = rng.normal(100000 + odometer_shift, 30000, n)
+    records = [{'odometer': float(o), 'region': str(v)} for o, v in zip(odometers, values)]
+    for record in records[:int(n * unknown_share)]:
+        record['region'] = 'nowhere'
+    return records
+
+
+def test_in_distribution_traffic_is_stable(reference_path):
+    monitor = DriftMonitor(reference_path, window=5000, min_observations=200)
+    monitor.observe(sample_records(reference_path, 8000, seed=1))
+    report = monitor.report()
+
+    region = report['features']['region']
+    assert region['psi'] < 0.05
+    assert region['status'] == 'stable'
+    assert report['features']['odometer']['status'] == 'stable'
+    assert report['status'] == 'stable'
+
+
+def test_shifted_numeric_feature_drifts(reference_path):
+    monitor = DriftMonitor(reference_path, window=5000)
+    monitor.observe(sample_records(reference_path, 3000, seed=2, odometer_shift=40000))
+    report = monitor.report()
+
+    assert report['features']['odometer']['status'] == 'drift'
+    assert report['features']['region']['status'] == 'stable'
+    assert report['status'] == 'drift'
+
+
+def test_unknown_values_are_reported(reference_path):
+    monitor = DriftMonitor(reference_path, window=5000)
+    monitor.observe(sample_records(reference_path, 3000, seed=3, unknown_share=0.3))
+    region = monitor.report()['features']['region']
+
+    assert region['unknown_rate'] == pytest.approx(0.3)
+    assert region['top_unknown_values'][0][0] == 'nowhere'
+    assert region['status'] in ('moderate', 'drift')
+
+
+def test_too_few_observations_are_not_scored(reference_path):
+    monitor = DriftMonitor(reference_path, min_observations=200)
+    monitor.observe(sample_records(reference_path, 50, seed=4, odometer_shift=80000))
+    report = monitor.report()
+
+    assert report['features']['odometer']['status'] == 'insufficient_data'
+    assert report['status'] == 'insufficient_data'
+
+
+def test_defaulted_fields_are_not_observed(reference_path):
+    monitor = DriftMonitor(reference_path, window=5000)
+    records = sample_records(reference_path, 3000, seed=6)
+    # The client sent odometer only; region holds the schema default
+    sent = [{'odometer': record['odometer'], 'region': None} for record in records]
+    monitor.observe([{**record, 'region': 'region-399'} for record in records], sent)
+    features = monitor.report()['features']
+
+    assert features['region']['observed'] == 0
+    assert features['odometer']['observed'] == 3000
+    assert features['odometer']['status'] == 'stable'
+
+
+def test_scores_cover_current_and_previous_window(reference_path):
+    monitor = DriftMonitor(reference_path, window=1000)
+    monitor.observe(sample_records(reference_path, 2500, seed=5))
+    report = monitor.report()
+
+    assert report['records_observed'] == 2500
+    assert report['records_in_windows'] == 1500
+
+
+def test_reference_buckets_are_the_most_common_values(reference_path):
+    monitor = DriftMonitor(reference_path)
+    values, counts = monitor.reference_buckets['region']
+
+    assert len(values) == REFERENCE_BUCKETS
+    assert values[0] == 'region-0'
+    assert sum(counts) == sum(json.loads(reference_path.read_text())['categorical']['region']['counts'].values())
+
+
+def test_psi_of_identical_distributions_is_zero():
+    assert psi([10, 20, 30], [1, 2, 3]) == pytest.approx(0.0)
+    assert psi([10, 20, 30], [30, 20, 10]) > 0.25
+
+
+def test_misra_gries_keeps_heavy_hitters_and_merges():
+    left, right = MisraGries(capacity=4), MisraGries(capacity=4)
+    for position in range(1000):
+        left.add('a' if position % 2 else f"noise-{position}")
+        right.add('b' if position % 3 else f"noise-{position}")
+    merged = left.merge(right)
+
+    assert merged.total == 2000
+    assert {value for value, _ in merged.top(2)} == {'a', 'b'}
+    # Counts are underestimated by at most total / (capacity + 1)
+    assert dict(merged.counters)['a'] >= 500 - merged.total / 5
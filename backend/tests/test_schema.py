@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+from schema import (PRICE_SCHEMA, CONDITION_SCHEMA, MAX_REPORTED_ERRORS,
+                    ValidationError, compile_schema)
+
+
+@pytest.fixture(scope='module')
+def price_schema():
+    return compile_schema(PRICE_SCHEMA)
+
+
+def vehicle(**overrides):
+    record = {
+        'year': 2015, 'odometer': 60000, 'manufacturer': 'toyota',
+        'fuel': 'gas', 'transmission': 'automatic'
+    }
+    record.update(overrides)
+    return record
+
+
+def test_defaults_fill_absent_and_null_fields(price_schema):
+    record = vehicle(drive=None)
+    normalized = price_schema.validate(record)
+
+    assert normalized['drive'] == PRICE_SCHEMA['drive']['default']
+    assert normalized['condition'] == 'good'
+    assert normalized['lat'] == PRICE_SCHEMA['lat']['default']
+    # The caller's dict is left alone
+    assert record['drive'] is None and 'condition' not in record
+
+
+def test_integral_floats_become_ints(price_schema):
+    normalized = price_schema.validate(vehicle(year=2015.0))
+    assert normalized['year'] == 2015 and type(normalized['year']) is int
+
+
+@pytest.mark.parametrize('field, value, message', [
+    ('year', None, 'missing required field'),
+    ('year', '2015', 'expected an integer'),
+    ('year', 2015.5, 'expected an integer'),
+    ('year', 1800, 'out of range [1900, 2030]'),
+    ('odometer', float('nan'), 'must be a finite number'),
+    ('odometer', -1, 'out of range [0, 1000000]'),
+    ('odometer', True, 'expected a number'),
+    ('manufacturer', '  ', 'expected a non-empty string'),
+    ('manufacturer', 7, 'expected a non-empty string'),
+])
+def test_single_input_errors(price_schema, field, value, message):
+    with pytest.raises(ValidationError) as info:
+        price_schema.validate(vehicle(**{field: value}))
+
+    error = info.value
+    assert not error.is_batch
+    assert error.errors == [{'field': field, 'message': message}]
+    assert str(error) == f"Invalid input: {field}: {message}"
+
+
+def test_non_object_input_is_rejected(price_schema):
+    with pytest.raises(ValueError, match='JSON object'):
+        price_schema.validate_batch([vehicle(), ['not', 'a', 'dict']])
+
+
+def test_batch_errors_report_rows_in_order(price_schema):
+    records = [vehicle(), vehicle(odometer='far'), vehicle(), vehicle(year=None, fuel='')]
+    with pytest.raises(ValidationError) as info:
+        price_schema.validate_batch(records)
+
+    error = info.value
+    assert error.is_batch
+    assert [(e['row'], e['field']) for e in error.errors] == [(1, 'odometer'), (3, 'year'), (3, 'fuel')]
+    assert str(error).startswith('Invalid input in 2 instance(s), first at instance 1: odometer')
+
+
+def test_batch_error_list_is_capped(price_schema):
+    records = [vehicle(year=1000, odometer=-5)] * MAX_REPORTED_ERRORS
+    with pytest.raises(ValidationError) as info:
+        price_schema.validate_batch(records)
+    assert len(info.value.errors) == MAX_REPORTED_ERRORS
+
+
+def test_valid_batch_and_empty_batch(price_schema):
+    normalized = price_schema.validate_batch([vehicle(), vehicle(state='tx')])
+    assert [record['state'] for record in normalized] == ['ca', 'tx']
+    assert price_schema.validate_batch([]) == []
+
+
+def test_condition_schema_requires_price():
+    schema = compile_schema(CONDITION_SCHEMA)
+    with pytest.raises(ValidationError) as info:
+        schema.validate(vehicle())
+    assert info.value.errors == [{'field': 'price', 'message': 'missing required field'}]
+    assert 'condition' not in schema.validate(vehicle(price=12000))
+
+
+def test_axes_expand_ranges_inclusively(price_schema):
+    axes = price_schema.validate_axes([
+        {'feature': 'odometer', 'start': 0, 'stop': 100000, 'step': 25000},
+        {'feature': 'year', 'values': [2010, 2020]},
+    ], max_points=100)
+
+    assert [feature for feature, _ in axes] == ['odometer', 'year']
+    np.testing.assert_array_equal(axes[0][1], [0, 25000, 50000, 75000, 100000])
+    np.testing.assert_array_equal(axes[1][1], [2010, 2020])
+
+
+@pytest.mark.parametrize('axes, message', [
+    ([], 'one or two axes'),
+    ([{'feature': 'price', 'values': [1]}], 'Axis feature must be one of'),
+    ([{'feature': 'year', 'values': [2010]}, {'feature': 'year', 'values': [2011]}], 'Duplicate axis'),
+    ([{'feature': 'year', 'values': ['2010']}], 'non-empty list of numbers'),
+    ([{'feature': 'year', 'start': 2010, 'stop': 2000, 'step': 1}], 'stop >= start'),
+    ([{'feature': 'year', 'values': [1800]}], 'out of range'),
+    ([{'feature': 'odometer', 'start': 0, 'stop': 1000, 'step': 1}], 'more than 50 points'),
+    ([{'feature': 'year', 'start': 2000, 'stop': 2009, 'step': 1},
+      {'feature': 'lat', 'start': 0, 'stop': 9, 'step': 1}], 'Grid has 100 points'),
+])
+def test_invalid_axes(price_schema, axes, message):
+    with pytest.raises(ValueError, match=message):
+        price_schema.validate_axes(axes, max_points=50)
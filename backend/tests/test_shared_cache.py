@@ -0,0 +1,120 @@
+import multiprocessing
+import pytest
+from shared_cache import SharedPredictionCache, SEQ, SLOT_HEADER
+
+WAYS = 4
+SLOT_SIZE = 128
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+def one_set_cache(path):
+    """A table with a single set, so every key competes for the same WAYS slots"""
+    return SharedPredictionCache(path, size_mb=WAYS * SLOT_SIZE / 1024 ** 2, ways=WAYS,
+                                 slot_size=SLOT_SIZE, stripes=2)
+
+
+def test_round_trip_across_mappings(path):
+    cache = SharedPredictionCache(path, size_mb=1)
+    other = SharedPredictionCache(path, size_mb=1)
+
+    assert cache.get('predict_price', 'k', 'v1') is None
+    assert cache.put('predict_price', 'k', 'v1', {'predicted_price': 12345.67})
+    assert other.get('predict_price', 'k', 'v1') == {'predicted_price': 12345.67}
+    # Keys are separate per endpoint
+    assert other.get('predict_condition', 'k', 'v1') is None
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['stores']) == (0, 1, 1)
+    assert other.get_stats()['hit_ratio'] == 0.5
+
+
+def _put_in_child(path):
+    SharedPredictionCache(path, size_mb=1).put('predict_price', 'child', 'v1', [1, 2, 3])
+
+
+def test_shared_with_forked_worker(path):
+    cache = SharedPredictionCache(path, size_mb=1)
+    child = multiprocessing.get_context('fork').Process(target=_put_in_child, args=(path,))
+    child.start()
+    child.join(timeout=10)
+
+    assert child.exitcode == 0
+    assert cache.get('predict_price', 'child', 'v1') == [1, 2, 3]
+
+
+def test_other_model_version_is_a_miss_and_replaced(path):
+    cache = one_set_cache(path)
+    cache.put('predict_price', 'k', 'v1', 1)
+
+    assert cache.get('predict_price', 'k', 'v2') is None
+    assert cache.get_stats()['stale'] == 1
+
+    # A store under the new version reuses the stale slot instead of evicting
+    for i in range(WAYS):
+        cache.put('predict_price', f'new-{i}', 'v2', i)
+    assert cache.get_stats()['evictions'] == 0
+    assert [cache.get('predict_price', f'new-{i}', 'v2') for i in range(WAYS)] == list(range(WAYS))
+
+
+def test_clock_spares_recently_used_slots(path):
+    cache = one_set_cache(path)
+    for i in range(WAYS):
+        cache.put('predict_price', f'k{i}', 'v', i)
+
+    # Everything was just written: the hand sweeps once and evicts k0
+    cache.put('predict_price', 'k4', 'v', 4)
+    assert cache.get('predict_price', 'k0', 'v') is None
+
+    # k1 is used again, so the next eviction passes it over for k2
+    assert cache.get('predict_price', 'k1', 'v') == 1
+    cache.put('predict_price', 'k5', 'v', 5)
+    assert cache.get('predict_price', 'k1', 'v') == 1
+    assert cache.get('predict_price', 'k2', 'v') is None
+    assert cache.get_stats()['evictions'] == 2
+
+
+def test_rewriting_a_key_keeps_one_slot(path):
+    cache = one_set_cache(path)
+    for value in range(WAYS + 2):
+        cache.put('predict_price', 'k', 'v', value)
+
+    assert cache.get('predict_price', 'k', 'v') == WAYS + 1
+    assert cache.get_stats()['evictions'] == 0
+
+
+def test_torn_or_corrupt_slot_reads_as_miss(path):
+    cache = one_set_cache(path)
+    cache.put('predict_price', 'k', 'v', 'value')
+    offset = cache._slot(0, 0)
+    seq = SEQ.unpack_from(cache._map, offset)[0]
+
+    # A writer is mid-write
+    SEQ.pack_into(cache._map, offset, seq | 1)
+    assert cache.get('predict_price', 'k', 'v') is None
+    assert cache.get_stats()['busy_reads'] == 1
+
+    # The value no longer matches its CRC
+    SEQ.pack_into(cache._map, offset, seq)
+    value_offset = offset + SLOT_HEADER.size
+    cache._map[value_offset] ^= 0xFF
+    assert cache.get('predict_price', 'k', 'v') is None
+
+    cache._map[value_offset] ^= 0xFF
+    assert cache.get('predict_price', 'k', 'v') == 'value'
+
+
+def test_too_large_values_are_not_stored(path):
+    cache = one_set_cache(path)
+    assert not cache.put('predict_price', 'k', 'v', 'x' * SLOT_SIZE)
+    assert cache.get_stats()['too_large'] == 1
+    assert cache.get('predict_price', 'k', 'v') is None
+
+
+def test_rejects_file_with_other_geometry(path):
+    SharedPredictionCache(path, size_mb=1, ways=8)
+    with pytest.raises(ValueError, match='another cache geometry'):
+        SharedPredictionCache(path, size_mb=1, ways=4)
@@ -1,16 +1,62 @@
 """
 API client for communicating with the Flask backend
 """
+import math
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import requests
 import streamlit as st
-from config import API_URL, TIMEOUT_HEALTH, TIMEOUT_SUPPORTED_VALUES, TIMEOUT_PREDICTION, CACHE_TTL
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import (
+    API_URL, TIMEOUT_CONNECT, TIMEOUT_HEALTH, TIMEOUT_SUPPORTED_VALUES, TIMEOUT_PREDICTION,
+    TIMEOUT_BATCH_PREDICTION, BULK_MAX_RETRIES, CACHE_TTL, POOL_CONNECTIONS, POOL_MAXSIZE, RETRY_TOTAL, RETRY_BACKOFF, HEALTH_POLL_INTERVAL
+)
+from health_monitor import HealthMonitor
+
+
+@st.cache_resource
+def get_session():
+    """
+    Process-wide HTTP session shared by every Streamlit session
+    
+    Keeps connections to the API alive in a sized pool and retries
+    transient failures with exponential backoff. Connection errors are
+    retried for every call (nothing reached the server); read errors and
+    502/503/504 responses only for idempotent GET requests.
+    
+    Returns:
+        requests.Session: Shared session
+    """
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry
+    )
+    
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
 
 
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_supported_values():
     """Fetch supported categorical values from API"""
     try:
-        response = requests.get(f"{API_URL}/supported-values", timeout=TIMEOUT_SUPPORTED_VALUES)
+        response = get_session().get(
+            f"{API_URL}/supported-values",
+            timeout=(TIMEOUT_CONNECT, TIMEOUT_SUPPORTED_VALUES)
+        )
         if response.status_code == 200:
             return response.json()
         return None
@@ -19,13 +65,31 @@ def fetch_supported_values():
         return None
 
 
+@st.cache_resource
+def get_health_monitor():
+    """Background /health poller shared by every Streamlit session"""
+    return HealthMonitor(
+        session=get_session(),
+        url=f"{API_URL}/health",
+        interval=HEALTH_POLL_INTERVAL,
+        timeout=(TIMEOUT_CONNECT, TIMEOUT_HEALTH)
+    )
+
+
+def get_api_health():
+    """
+    Last known API status from the background poller (never blocks)
+    
+    Returns:
+        dict: 'healthy' (bool, or None while the first check is running),
+              'checked_at' and 'age' (seconds since the last check)
+    """
+    return get_health_monitor().snapshot()
+
+
 def check_api_health():
-    """Check if API is running"""
-    try:
-        response = requests.get(f"{API_URL}/health", timeout=TIMEOUT_HEALTH)
-        return response.status_code == 200
-    except:
-        return False
+    """Check if API is running (last known status; optimistic until the first check completes)"""
+    return get_api_health()['healthy'] is not False
 
 
 def predict_price(data):
@@ -39,10 +103,62 @@ def predict_price(data):
         dict: API response with prediction
     """
     try:
-        response = requests.post(
+        response = get_session().post(
             f"{API_URL}/predict/price",
             json=data,
-            timeout=TIMEOUT_PREDICTION
+            timeout=(TIMEOUT_CONNECT, TIMEOUT_PREDICTION)
+        )
+        return response.json()
+    except requests.exceptions.Timeout:
+        return {"success": False, "error": "Request timed out. Please try again."}
+    except requests.exceptions.ConnectionError:
+        return {"success": False, "error": "Cannot connect to API. Is the Flask server running?"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def predict_price_sweep(data, axes):
+    """
+    Send a price sweep (what-if grid) request to API
+    
+    Args:
+        data (dict): Base vehicle features
+        axes (list): Axis specs, e.g. [{"feature": "odometer", "start": 0, "stop": 300000, "step": 10000}]
+        
+    Returns:
+        dict: API response with axis values and predicted prices under "sweep"
+    """
+    try:
+        response = get_session().post(
+            f"{API_URL}/predict/price/sweep",
+            json={"vehicle": data, "axes": axes},
+            timeout=(TIMEOUT_CONNECT, TIMEOUT_PREDICTION)
+        )
+        return response.json()
+    except requests.exceptions.Timeout:
+        return {"success": False, "error": "Request timed out. Please try again."}
+    except requests.exceptions.ConnectionError:
+        return {"success": False, "error": "Cannot connect to API. Is the Flask server running?"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def find_comparables(data, k):
+    """
+    Request the historical listings most similar to a vehicle
+    
+    Args:
+        data (dict): Vehicle features (manufacturer and type are required)
+        k (int): Number of listings
+        
+    Returns:
+        dict: API response with "comparables" and "price_summary"
+    """
+    try:
+        response = get_session().post(
+            f"{API_URL}/comparables",
+            json={"vehicle": data, "k": k},
+            timeout=(TIMEOUT_CONNECT, TIMEOUT_PREDICTION)
         )
         return response.json()
     except requests.exceptions.Timeout:
@@ -64,10 +180,10 @@ def predict_condition(data):
         dict: API response with prediction
     """
     try:
-        response = requests.post(
+        response = get_session().post(
             f"{API_URL}/predict/condition",
             json=data,
-            timeout=TIMEOUT_PREDICTION
+            timeout=(TIMEOUT_CONNECT, TIMEOUT_PREDICTION)
         )
         return response.json()
     except requests.exceptions.Timeout:
@@ -76,3 +192,56 @@ def predict_condition(data):
         return {"success": False, "error": "Cannot connect to API. Is the Flask server running?"}
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+
+def _retry_after(response, default=1.0):
+    """
+    Seconds to wait before retrying, from the Retry-After header
+
+    The header holds either a number of seconds or an HTTP-date; a missing
+    or unreadable value gives the default.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return default
+    return max(seconds, 0.0) if math.isfinite(seconds) else default
+
+
+def predict_batch(task, records):
+    """
+    Send a batch prediction request to API
+    
+    Requests shed by the API's admission control (503) are retried after
+    the advertised Retry-After delay, up to BULK_MAX_RETRIES times.
+    
+    Args:
+        task (str): "price" or "condition"
+        records (list): List of vehicle feature dicts
+        
+    Returns:
+        dict: API response with one prediction per record under "predictions",
+              or an error (with per-instance "details" for invalid input)
+    """
+    try:
+        for attempt in range(BULK_MAX_RETRIES + 1):
+            response = get_session().post(
+                f"{API_URL}/predict/{task}/batch",
+                json={"instances": records},
+                timeout=(TIMEOUT_CONNECT, TIMEOUT_BATCH_PREDICTION)
+            )
+            if response.status_code != 503 or attempt == BULK_MAX_RETRIES:
+                return response.json()
+            time.sleep(_retry_after(response))
+    except requests.exceptions.Timeout:
+        return {"success": False, "error": "Request timed out. Please try again."}
+    except requests.exceptions.ConnectionError:
+        return {"success": False, "error": "Cannot connect to API. Is the Flask server running?"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
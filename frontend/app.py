@@ -5,6 +5,8 @@ Interactive UI for ML model predictions
 import streamlit as st
 import requests
 import json
+from api_client import get_api_health
+from components.sidebar import render_api_status
 
 # ==================== CONFIGURATION ====================
 
@@ -32,14 +34,6 @@ def fetch_supported_values():
         st.error(f"Could not fetch supported values: {e}")
         return None
 
-def check_api_health():
-    """Check if API is running"""
-    try:
-        response = requests.get(f"{API_URL}/health", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
-
 # ==================== CUSTOM CSS ====================
 
 st.markdown("""
@@ -91,13 +85,10 @@ st.markdown("### Powered by Machine Learning 🤖")
 with st.sidebar:
     st.header("⚙️ Settings")
     
-    # API Health Check
-    api_status = check_api_health()
-    if api_status:
-        st.success("✅ API Connected")
-    else:
-        st.error("❌ API Offline")
-        st.warning("Please start the Flask backend:\n```bash\ncd backend && python app.py\n```")
+    # API Health Check (last known status from the shared background poller)
+    api_health = get_api_health()
+    api_status = api_health['healthy'] is not False
+    render_api_status(api_health)
     
     st.divider()
     
@@ -4,11 +4,13 @@ UI Components for the Streamlit application
 from .sidebar import render_sidebar
 from .price_tab import render_price_tab
 from .condition_tab import render_condition_tab
+from .bulk_tab import render_bulk_tab
 from .api_docs_tab import render_api_docs_tab
 
 __all__ = [
     'render_sidebar',
     'render_price_tab',
     'render_condition_tab',
+    'render_bulk_tab',
     'render_api_docs_tab'
 ]
@@ -0,0 +1,214 @@
+"""
+Bulk CSV scoring tab component
+"""
+import glob
+import os
+import tempfile
+import time
+import pandas as pd
+import streamlit as st
+from api_client import predict_batch
+from config import (
+    BULK_CHUNK_SIZE, BULK_PREVIEW_ROWS, BULK_RESULT_PREVIEW_ROWS, BULK_RESULT_MAX_AGE, BULK_FIELDS
+)
+
+NOT_MAPPED = "(not mapped)"
+
+# Prefix of the scored files in the temporary directory
+RESULT_PREFIX = "vehicle_predictor_scored_"
+
+
+def _count_rows(uploaded):
+    """Count data rows by streaming over the upload (used for progress only)"""
+    uploaded.seek(0)
+    rows = sum(1 for _ in uploaded) - 1
+    uploaded.seek(0)
+    return max(rows, 1)
+
+
+def _to_records(chunk, mapping):
+    """
+    Convert a CSV chunk into API instances using the column mapping
+
+    Empty cells are left out so the API applies its defaults. Columns are
+    selected per field, so one column may feed several fields.
+    """
+    frame = pd.DataFrame({
+        field: chunk[column] for field, column in mapping.items() if column != NOT_MAPPED
+    }, index=chunk.index)
+    return [
+        {field: value for field, value in row.items() if pd.notna(value)}
+        for row in frame.to_dict("records")
+    ]
+
+
+def _score_chunk(task, records):
+    """
+    Score one chunk, resending it without the instances the API rejected
+
+    The API reports only the first validation errors of a batch, so a chunk
+    may be rejected several times before its remaining rows are all valid.
+
+    Returns:
+        tuple: (list of predictions or None per record, list of error messages or None)
+    """
+    predictions = [None] * len(records)
+    errors = [None] * len(records)
+
+    # Rows of the chunk still to score; the API's "row" indexes this list
+    pending = list(range(len(records)))
+    while pending:
+        result = predict_batch(task, [records[row] for row in pending])
+
+        if result.get("success"):
+            for row, prediction in zip(pending, result["predictions"]):
+                predictions[row] = prediction
+            break
+
+        rejected = set()
+        for detail in result.get("details") or []:
+            if 0 <= detail.get("row", -1) < len(pending):
+                row = pending[detail["row"]]
+                message = f"{detail['field']}: {detail['message']}"
+                errors[row] = f"{errors[row]}; {message}" if errors[row] else message
+                rejected.add(row)
+        if not rejected:
+            # Not a validation error (or none attributable to a row): fail the rest
+            for row in pending:
+                errors[row] = result.get("error", "Unknown error")
+            break
+        pending = [row for row in pending if row not in rejected]
+
+    return predictions, errors
+
+
+def _add_predictions(chunk, task, predictions, errors):
+    """Append prediction columns to a CSV chunk"""
+    scored = chunk.copy()
+    if task == "price":
+        scored["predicted_price"] = [p["predicted_price"] if p else None for p in predictions]
+    else:
+        scored["predicted_condition"] = [p["predicted_condition"] if p else None for p in predictions]
+        scored["condition_probability"] = [
+            max(p["probabilities"].values()) if p and p.get("probabilities") else None
+            for p in predictions
+        ]
+    scored["error"] = errors
+    return scored
+
+
+def _remove_old_results(keep=None):
+    """Delete scored files older than BULK_RESULT_MAX_AGE (sessions may end without cleaning up)"""
+    cutoff = time.time() - BULK_RESULT_MAX_AGE
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{RESULT_PREFIX}*.csv")):
+        try:
+            if path != keep and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass  # Removed by another session
+
+
+def _score_file(uploaded, task, mapping):
+    """
+    Score the uploaded CSV chunk by chunk, writing results to a temporary file
+
+    Only the path of the scored file is kept in session state.
+    """
+    previous = st.session_state.get("bulk_result")
+    _remove_old_results(keep=previous["path"] if previous else None)
+
+    total_rows = _count_rows(uploaded)
+    output = tempfile.NamedTemporaryFile(mode="w", suffix=".csv", prefix=RESULT_PREFIX, delete=False)
+
+    progress = st.progress(0.0, text="Starting...")
+    summary = st.empty()
+    table = st.empty()
+
+    preview = []
+    done = failed = 0
+
+    with output:
+        for index, chunk in enumerate(pd.read_csv(uploaded, chunksize=BULK_CHUNK_SIZE)):
+            predictions, errors = _score_chunk(task, _to_records(chunk, mapping))
+            scored = _add_predictions(chunk, task, predictions, errors)
+            scored.to_csv(output, header=index == 0, index=False)
+
+            done += len(scored)
+            failed += sum(error is not None for error in errors)
+            if len(preview) < BULK_RESULT_PREVIEW_ROWS:
+                preview.append(scored.head(BULK_RESULT_PREVIEW_ROWS - len(preview)))
+
+            progress.progress(min(done / total_rows, 1.0), text=f"Scored {done:,} of ~{total_rows:,} rows")
+            summary.caption(f"✅ {done - failed:,} scored · ❌ {failed:,} failed")
+            table.dataframe(pd.concat(preview), use_container_width=True)
+
+    progress.progress(1.0, text=f"Done: scored {done:,} rows")
+
+    # Replace the previous result file for this session
+    if previous and os.path.exists(previous["path"]):
+        os.remove(previous["path"])
+    st.session_state["bulk_result"] = {
+        "path": output.name,
+        "task": task,
+        "file_name": f"scored_{uploaded.name}",
+        "rows": done,
+        "failed": failed
+    }
+
+
+def render_bulk_tab(api_status):
+    """
+    Render the bulk CSV scoring tab
+
+    Args:
+        api_status (bool): Whether the API is connected
+    """
+    st.header("Bulk Scoring")
+    st.markdown("Upload a CSV of vehicles, map its columns and score every row")
+
+    task = st.radio(
+        "Prediction", options=["price", "condition"], horizontal=True,
+        format_func=lambda value: "💰 Price" if value == "price" else "🔧 Condition"
+    )
+    uploaded = st.file_uploader("CSV file", type="csv")
+
+    if uploaded is not None:
+        uploaded.seek(0)
+        header = pd.read_csv(uploaded, nrows=BULK_PREVIEW_ROWS)
+        uploaded.seek(0)
+
+        st.subheader("👀 Preview")
+        st.dataframe(header, use_container_width=True)
+
+        # Column mapping (pre-filled where CSV columns match field names)
+        st.subheader("🔗 Column Mapping")
+        fields = BULK_FIELDS[task]
+        options = [NOT_MAPPED] + list(header.columns)
+        mapping = {}
+        columns = st.columns(3)
+        for position, field in enumerate(fields["required"] + fields["optional"]):
+            label = f"{field} *" if field in fields["required"] else field
+            default = options.index(field) if field in options else 0
+            mapping[field] = columns[position % 3].selectbox(
+                label, options=options, index=default, key=f"bulk_{task}_{field}"
+            )
+        st.caption("* required · unmapped optional fields use the API defaults")
+
+        missing = [field for field in fields["required"] if mapping[field] == NOT_MAPPED]
+        if missing:
+            st.warning(f"Map the required fields: {', '.join(missing)}")
+
+        if st.button("🚀 Score File", disabled=bool(missing), use_container_width=True):
+            if not api_status:
+                st.error("⚠️ API is not running. Please start the Flask backend first.")
+            else:
+                _score_file(uploaded, task, mapping)
+
+    result = st.session_state.get("bulk_result")
+    if result and os.path.exists(result["path"]):
+        st.success(f"Scored {result['rows']:,} rows ({result['failed']:,} failed)")
+        with open(result["path"], "rb") as scored_file:
+            st.download_button(
+                "📥 Download Scored CSV", data=scored_file,
+                file_name=result["file_name"], mime="text/csv", use_container_width=True
+            )
@@ -1,8 +1,65 @@
 """
 Price prediction tab component
 """
+import pandas as pd
 import streamlit as st
-from api_client import predict_price
+from api_client import predict_price, predict_price_sweep, find_comparables
+from config import SWEEP_ODOMETER_START, SWEEP_ODOMETER_STOP, SWEEP_ODOMETER_STEP, COMPARABLES_K
+
+
+def render_depreciation_curve(data):
+    """
+    Render predicted price against mileage for the submitted vehicle
+    
+    The whole curve comes from a single sweep request.
+    
+    Args:
+        data (dict): Vehicle features of the prediction
+    """
+    axes = [{
+        "feature": "odometer",
+        "start": SWEEP_ODOMETER_START,
+        "stop": SWEEP_ODOMETER_STOP,
+        "step": SWEEP_ODOMETER_STEP
+    }]
+    result = predict_price_sweep(data, axes)
+    
+    if not result.get('success'):
+        st.warning(f"Depreciation curve unavailable: {result.get('error', 'Unknown error')}")
+        return
+    
+    sweep = result['sweep']
+    curve = pd.DataFrame(
+        {"Predicted Price ($)": sweep['predicted_price']},
+        index=pd.Index(sweep['axes'][0]['values'], name="Odometer (miles)")
+    )
+    st.subheader("📉 Depreciation Curve")
+    st.line_chart(curve)
+
+
+def render_comparables(data):
+    """
+    Render the most similar historical listings for the submitted vehicle
+    
+    Nothing is shown when the API has no comparables index.
+    
+    Args:
+        data (dict): Vehicle features of the prediction
+    """
+    result = find_comparables(data, COMPARABLES_K)
+    
+    if not result.get('success') or not result['comparables']:
+        return
+    
+    listings = pd.DataFrame(result['comparables'])
+    columns = ["price", "year", "odometer", "condition", "state", "region", "distance_km"]
+    summary = result['price_summary']
+    st.subheader("🔎 Comparable Listings")
+    st.caption(
+        f"Median ${summary['median']:,.0f} "
+        f"(middle half ${summary['p25']:,.0f} - ${summary['p75']:,.0f})"
+    )
+    st.dataframe(listings[[column for column in columns if column in listings]], use_container_width=True)
 
 
 def render_price_tab(api_status, categories):
@@ -91,6 +148,9 @@ def render_price_tab(api_status, categories):
                         if 'confidence' in result['prediction']:
                             st.metric("Confidence Score", f"{result['prediction']['confidence']:.2%}")
                         
+                        render_depreciation_curve(data)
+                        render_comparables(data)
+                        
                         # Show input summary
                         with st.expander("📋 Input Summary"):
                             st.json(data)
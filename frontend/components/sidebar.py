@@ -2,25 +2,43 @@
 Sidebar component with API status and settings
 """
 import streamlit as st
-from config import API_URL
+from config import API_URL, HEALTH_STALE_AFTER
 
 
-def render_sidebar(api_status):
+def render_api_status(api_health):
+    """
+    Render the last known API status and how old it is
+    
+    Args:
+        api_health (dict): Snapshot from api_client.get_api_health()
+    """
+    if api_health['healthy'] is None:
+        st.info("⏳ Checking API status...")
+        return
+    
+    checked = f"checked {api_health['age']:.0f}s ago"
+    if api_health['healthy']:
+        st.success(f"✅ API Connected ({checked})")
+    else:
+        st.error(f"❌ API Offline ({checked})")
+        st.warning("Please start the Flask backend:\n```bash\ncd backend && python app.py\n```")
+    
+    if api_health['age'] > HEALTH_STALE_AFTER:
+        st.caption("⚠️ Status may be out of date")
+
+
+def render_sidebar(api_health):
     """
     Render the sidebar with API status and information
     
     Args:
-        api_status (bool): Whether the API is connected
+        api_health (dict): Last known API status (see api_client.get_api_health)
     """
     with st.sidebar:
         st.header("⚙️ Settings")
         
         # API Health Check
-        if api_status:
-            st.success("✅ API Connected")
-        else:
-            st.error("❌ API Offline")
-            st.warning("Please start the Flask backend:\n```bash\ncd backend && python app.py\n```")
+        render_api_status(api_health)
         
         st.divider()
         
@@ -9,9 +9,51 @@ API_URL = "http://localhost:5000"
 CACHE_TTL = 300  # 5 minutes
 
 # Timeout settings (in seconds)
+TIMEOUT_CONNECT = 3
 TIMEOUT_HEALTH = 5
 TIMEOUT_SUPPORTED_VALUES = 10
 TIMEOUT_PREDICTION = 10
+TIMEOUT_BATCH_PREDICTION = 60
+
+# Depreciation curve shown with a price prediction (odometer sweep, miles)
+SWEEP_ODOMETER_START = 0
+SWEEP_ODOMETER_STOP = 300000
+SWEEP_ODOMETER_STEP = 10000
+
+# Comparable listings shown with a price prediction
+COMPARABLES_K = 10
+
+# Background health polling
+HEALTH_POLL_INTERVAL = 5  # Seconds between /health probes
+HEALTH_STALE_AFTER = 30  # Seconds after which the last status is shown as stale
+
+# HTTP connection pool (one pool shared by all Streamlit sessions)
+POOL_CONNECTIONS = 4  # Number of hosts to keep pools for
+POOL_MAXSIZE = 32  # Keep-alive connections per host
+
+# Retry settings (connection failures on every call; 502/503/504 and
+# read errors only on idempotent GET requests)
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.3  # Sleeps 0.3s, 0.6s, 1.2s between attempts
+
+# Bulk CSV scoring
+BULK_CHUNK_SIZE = 1000  # Rows sent per batch request
+BULK_PREVIEW_ROWS = 5  # Rows shown when previewing an upload
+BULK_RESULT_PREVIEW_ROWS = 200  # Scored rows shown while scoring
+BULK_MAX_RETRIES = 5  # Retries of a chunk the API sheds with 503
+BULK_RESULT_MAX_AGE = 6 * 3600  # Seconds before a scored file is deleted
+BULK_FIELDS = {
+    "price": {
+        "required": ["year", "odometer", "manufacturer", "fuel", "transmission"],
+        "optional": ["lat", "long", "title_status", "drive", "size", "type",
+                     "paint_color", "state", "region", "condition"]
+    },
+    "condition": {
+        "required": ["price", "year", "odometer", "manufacturer", "fuel", "transmission"],
+        "optional": ["lat", "long", "title_status", "drive", "size", "type",
+                     "paint_color", "state", "region"]
+    }
+}
 
 # Page configuration
 PAGE_TITLE = "Vehicle Predictor"
@@ -0,0 +1,65 @@
+"""
+Background API health monitor shared by all Streamlit sessions
+Polls the backend's /health endpoint on a daemon thread so that page
+renders only read the last known status and never wait on the network.
+"""
+import threading
+import time
+
+
+class HealthMonitor:
+    def __init__(self, session, url, interval, timeout):
+        """
+        Start polling in the background
+
+        Args:
+            session (requests.Session): HTTP session used for the probes
+            url (str): Health endpoint URL
+            interval (float): Seconds between probes
+            timeout: Request timeout for a probe
+        """
+        self.session = session
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._healthy = None
+        self._checked_at = None
+
+        self._thread = threading.Thread(target=self._run, name='api-health-monitor', daemon=True)
+        self._thread.start()
+
+    def probe(self):
+        """Run one blocking health check and record the result"""
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+            healthy = response.status_code == 200
+        except Exception:
+            healthy = False
+
+        with self._lock:
+            self._healthy = healthy
+            self._checked_at = time.time()
+        return healthy
+
+    def _run(self):
+        while True:
+            self.probe()
+            time.sleep(self.interval)
+
+    def snapshot(self):
+        """
+        Last known API status (non-blocking)
+
+        Returns:
+            dict: 'healthy' (bool, or None before the first probe finished),
+                  'checked_at' (epoch seconds or None) and 'age' (seconds or None)
+        """
+        with self._lock:
+            healthy, checked_at = self._healthy, self._checked_at
+        return {
+            'healthy': healthy,
+            'checked_at': checked_at,
+            'age': time.time() - checked_at if checked_at is not None else None
+        }
@@ -5,12 +5,13 @@ Refactored into modular components
 import streamlit as st
 from config import PAGE_TITLE, PAGE_ICON, LAYOUT
 from styles import CUSTOM_CSS, FOOTER_HTML
-from api_client import check_api_health, fetch_supported_values
+from api_client import get_api_health, fetch_supported_values
 from utils import get_categories
 from components import (
     render_sidebar,
     render_price_tab,
     render_condition_tab,
+    render_bulk_tab,
     render_api_docs_tab
 )
 
@@ -33,18 +34,23 @@ def main():
     st.markdown('<p class="main-header">🚗 Vehicle Price & Condition Predictor</p>', unsafe_allow_html=True)
     st.markdown("### Powered by Machine Learning 🤖")
     
-    # Check API status
-    api_status = check_api_health()
+    # Last known API status from the background poller (does not block rendering).
+    # Until the first check completes the forms stay enabled; requests report
+    # connection errors themselves.
+    api_health = get_api_health()
+    api_status = api_health['healthy'] is not False
     
     # Render sidebar
-    render_sidebar(api_status)
+    render_sidebar(api_health)
     
     # Fetch supported values
     supported_data = fetch_supported_values()
     categories = get_categories(supported_data)
     
     # Create tabs
-    tab1, tab2, tab3 = st.tabs(["💰 Price Prediction", "🔧 Condition Prediction", "📖 API Documentation"])
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "💰 Price Prediction", "🔧 Condition Prediction", "📦 Bulk Scoring", "📖 API Documentation"
+    ])
     
     # Render tabs
     with tab1:
@@ -54,6 +60,9 @@ def main():
         render_condition_tab(api_status, categories)
     
     with tab3:
+        render_bulk_tab(api_status)
+    
+    with tab4:
         render_api_docs_tab()
     
     # Footer
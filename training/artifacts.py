@@ -0,0 +1,136 @@
+"""
+Writing exported model artifacts
+Each file is written under a temporary name and moved into place, and the
+version marker (model_version.json) is written after every other file of an
+export. The backend reloads only when the marker changes and checks the
+files against it, so it never loads a half-written export.
+
+Usage (from the training directory), to mark models exported by the notebook:
+    python artifacts.py --models ../backend/models
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+
+# Same as ModelHandler.MODEL_FILES
+MODEL_FILES = [
+    'regression_model.pkl', 'classification_model.pkl',
+    'scaler_reg.pkl', 'scaler_clf.pkl',
+    'label_encoders.pkl', 'condition_encoder.pkl'
+]
+
+# Segment manifest written by train_segments.py
+SEGMENT_MANIFEST = 'segments.json'
+
+VERSION_FILE = 'model_version.json'
+
+# Training set selection and split of train.py, so later tools hold out the same rows
+SPLIT_FILE = 'training_split.json'
+
+
+def write_pickle(path, obj):
+    """Write a pickle via a temporary file so readers never see a partial file"""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        pickle.dump(obj, f)
+    os.replace(tmp, path)
+    print(f"✓ Saved {os.path.basename(path)}")
+
+
+def write_json(path, obj):
+    """Write JSON via a temporary file so readers never see a partial file"""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp, path)
+
+
+def copy_artifacts(models_dir, output_dir, skip):
+    """
+    Copy every file and directory of models_dir except the names in skip
+
+    Used when a tool rewrites some artifacts into another directory: copy
+    everything first, then write the rewritten files over the copies. The
+    version marker is never copied; write it after the rewritten files.
+    """
+    output = os.path.realpath(output_dir)
+    for name in sorted(os.listdir(models_dir)):
+        source = os.path.join(models_dir, name)
+        if name in skip or name == VERSION_FILE or os.path.realpath(source) == output:
+            continue
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(output_dir, name), dirs_exist_ok=True)
+        else:
+            shutil.copy2(source, os.path.join(output_dir, name))
+
+
+def read_split(models_dir):
+    """
+    Training set selection and split recorded by train.py
+
+    Returns:
+        dict: data, config, include_increments, cache_key, test_size,
+              random_state and rows per task; None for exports without one
+    """
+    path = os.path.join(models_dir, SPLIT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def versioned_files(models_dir):
+    """Files the model version covers, relative to models_dir (same order as the backend)"""
+    files = list(MODEL_FILES)
+    manifest_path = os.path.join(models_dir, SEGMENT_MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        files += [SEGMENT_MANIFEST] + sorted(
+            segment['model'] for spec in manifest.values() for segment in spec['segments'].values()
+        )
+    return files
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_version_marker(models_dir):
+    """
+    Record the version of the finished export (call after every other file is written)
+
+    The version is the same content digest ModelHandler.compute_model_version
+    computes.
+
+    Returns:
+        str: Model version
+    """
+    files = {name: _sha256(os.path.join(models_dir, name)) for name in versioned_files(models_dir)}
+    version = hashlib.sha256(''.join(f"{name}:{digest};" for name, digest in files.items()).encode()).hexdigest()[:16]
+    write_json(os.path.join(models_dir, VERSION_FILE), {
+        'version': version,
+        'files': files,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    })
+    print(f"✓ Model version {version}")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write the version marker of an exported models directory')
+    parser.add_argument('--models', default='../backend/models', help='Directory with the exported models')
+    args = parser.parse_args()
+    write_version_marker(args.models)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Build the nearest-neighbour index behind POST /comparables
+Listings are grouped by manufacturer and type (queries filter on both
+exactly). Within a group, each listing is a point of year, mileage, location
+and condition, scaled so one unit of distance is DEFAULT_UNITS of each, and
+the group's points are organised as a KD-tree: an implicit binary tree of
+median splits whose nodes cover contiguous row ranges and store bounding
+boxes. Everything is written as flat .npy arrays that the backend
+memory-maps, so all worker processes share one copy.
+
+Usage (from the training directory):
+    python build_comparables.py --data ../vehicles.csv --output ../backend/models/comparables
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import time
+import numpy as np
+import data as dataset
+
+INDEX_FORMAT = 1
+
+# One unit of distance: 2 model years, 20,000 miles, 150 km or one condition level
+DEFAULT_UNITS = {'year': 2.0, 'odometer': 20000.0, 'location_km': 150.0, 'condition': 1.0}
+
+# Ordinal scale of the condition dimension
+CONDITION_ORDER = ['salvage', 'fair', 'good', 'excellent', 'like new', 'new']
+
+GROUP_BY = ['manufacturer', 'type']
+
+# Stored per listing and returned with each comparable
+NUMERIC_COLUMNS = ['price', 'year', 'odometer', 'lat', 'long']
+CATEGORICAL_COLUMNS = dataset.CATEGORICAL_FEATURES + ['condition']
+
+KM_PER_DEGREE = 111.2
+
+
+def listing_points(df, units):
+    """
+    Scaled coordinates (year, odometer, x, y, condition) of every listing
+
+    Location is projected to kilometres (longitude shrunk by cos(latitude)).
+    """
+    lat = df['lat'].to_numpy(dtype=np.float64)
+    rank = {condition: level for level, condition in enumerate(CONDITION_ORDER)}
+    condition = df['condition'].astype(str).map(rank).fillna(len(CONDITION_ORDER) / 2).to_numpy()
+    return np.column_stack([
+        df['year'].to_numpy(dtype=np.float64) / units['year'],
+        df['odometer'].to_numpy(dtype=np.float64) / units['odometer'],
+        df['long'].to_numpy(dtype=np.float64) * KM_PER_DEGREE * np.cos(np.radians(lat)) / units['location_km'],
+        lat * KM_PER_DEGREE / units['location_km'],
+        condition / units['condition']
+    ]).astype(np.float32)
+
+
+def build_tree(points, leaf_size):
+    """
+    Implicit KD-tree over a group's points
+
+    Node i has children 2i+1 and 2i+2; each node covers a contiguous range of
+    the reordered rows and splits it at the median of its widest dimension.
+
+    Returns:
+        tuple: (row order, node ranges (n_nodes, 2), node bounds (n_nodes, 2, dims))
+    """
+    n, dims = points.shape
+    depth = max(0, math.ceil(math.log2(n / leaf_size))) if n > leaf_size else 0
+    n_nodes = 2 ** (depth + 1) - 1
+    order = np.arange(n)
+    ranges = np.zeros((n_nodes, 2), dtype=np.int64)
+    bounds = np.empty((n_nodes, 2, dims), dtype=np.float32)
+    bounds[:, 0], bounds[:, 1] = np.inf, -np.inf
+    ranges[0] = (0, n)
+
+    for node in range(n_nodes):
+        start, end = ranges[node]
+        rows = order[start:end]
+        if end > start:
+            bounds[node, 0] = points[rows].min(axis=0)
+            bounds[node, 1] = points[rows].max(axis=0)
+
+        left = 2 * node + 1
+        if left < n_nodes:
+            middle = start + (end - start) // 2
+            if end - start > 1:
+                dim = int(np.argmax(bounds[node, 1] - bounds[node, 0]))
+                order[start:end] = rows[np.argpartition(points[rows, dim], middle - start)]
+            ranges[left] = (start, middle)
+            ranges[left + 1] = (middle, end)
+    return order, ranges, bounds
+
+
+def build_index(df, output_dir, units=None, leaf_size=64):
+    """
+    Write the comparables index for a cleaned listings frame
+
+    Args:
+        df (pd.DataFrame): Frame returned by data.read_source
+        output_dir (str): Index directory (replaced when complete)
+        units (dict): Overrides for DEFAULT_UNITS
+        leaf_size (int): Largest number of rows in a leaf
+
+    Returns:
+        dict: The written index description
+    """
+    units = {**DEFAULT_UNITS, **(units or {})}
+    points = listing_points(df, units)
+    codes = np.column_stack([df[column].cat.codes.to_numpy() for column in CATEGORICAL_COLUMNS]).astype(np.int16)
+    numeric = df[NUMERIC_COLUMNS].to_numpy(dtype=np.float32)
+
+    group_keys = df[GROUP_BY].astype(str).agg('|'.join, axis=1).to_numpy()
+    groups, all_rows, all_ranges, all_bounds = {}, [], [], []
+    row_offset = node_offset = 0
+    for key in sorted(set(group_keys)):
+        members = np.flatnonzero(group_keys == key)
+        order, ranges, bounds = build_tree(points[members], leaf_size)
+        all_rows.append(members[order])
+        all_ranges.append(ranges + row_offset)
+        all_bounds.append(bounds)
+        groups[key] = {'rows': len(members), 'nodes': [node_offset, len(ranges)]}
+        row_offset += len(members)
+        node_offset += len(ranges)
+
+    rows = np.concatenate(all_rows)
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, 'points.npy'), points[rows])
+    np.save(os.path.join(tmp_dir, 'numeric.npy'), numeric[rows])
+    np.save(os.path.join(tmp_dir, 'codes.npy'), codes[rows])
+    np.save(os.path.join(tmp_dir, 'node_ranges.npy'), np.concatenate(all_ranges))
+    np.save(os.path.join(tmp_dir, 'node_bounds.npy'), np.concatenate(all_bounds))
+
+    index = {
+        'format': INDEX_FORMAT,
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'rows': int(len(rows)),
+        'units': units,
+        'km_per_degree': KM_PER_DEGREE,
+        'condition_order': CONDITION_ORDER,
+        'group_by': GROUP_BY,
+        'numeric_columns': NUMERIC_COLUMNS,
+        'categorical_columns': CATEGORICAL_COLUMNS,
+        'vocab': {column: [str(value) for value in df[column].cat.categories] for column in CATEGORICAL_COLUMNS},
+        'leaf_size': leaf_size,
+        'groups': groups
+    }
+    with open(os.path.join(tmp_dir, 'index.json'), 'w') as f:
+        json.dump(index, f)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the comparable-listings index')
+    parser.add_argument('--data', default='../vehicles.csv', help='Path to vehicles.csv (or a clean.py directory)')
+    parser.add_argument('--output', default='../backend/models/comparables', help='Index directory')
+    parser.add_argument('--leaf-size', type=int, default=64, help='Largest number of listings per tree leaf')
+    for name, value in DEFAULT_UNITS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}-unit", type=float, default=value,
+                            help=f"{name} difference counted as one unit of distance")
+    args = parser.parse_args()
+    started = time.perf_counter()
+
+    print(f"📂 Loading {args.data}")
+    df = dataset.read_source(args.data)
+    print(f"✓ {len(df):,} listings")
+
+    units = {name: getattr(args, f"{name}_unit") for name in DEFAULT_UNITS}
+    index = build_index(df, args.output, units, args.leaf_size)
+    print(f"\n✅ Indexed {index['rows']:,} listings in {len(index['groups']):,} manufacturer/type groups "
+          f"to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Streaming cleaner for raw listing dumps
+Reads a raw Craigslist CSV in chunks, applies the notebook's cleaning (only
+the used columns are parsed, so url / VIN / description etc. are dropped;
+price range; rows with missing values removed), drops reposted listings and
+writes the result as Parquet partitioned by state and year:
+
+    vehicles_clean/state=ca/year=2015/part-0.parquet
+
+Reposts are recognized by VIN when the listing has one, otherwise by a hash
+of the listing's content (every kept column plus model and cylinders). Seen
+keys are tracked in a Bloom filter, so memory stays fixed however large the
+dump is; a small fraction (--error-rate) of unique listings may be dropped
+as false positives.
+
+train.py, compress.py and incremental.py accept the output directory in
+place of a CSV, and --states / --years read only the matching partitions.
+
+Usage (from the training directory):
+    python clean.py --raw ../vehicles.csv --output ../vehicles_clean
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import data as dataset
+
+# Written next to the partitions (ignored when the dataset is read)
+REPORT_FILE = '_clean_report.json'
+
+# Schema of the written rows (state and year become partition directories)
+OUTPUT_SCHEMA = pa.schema(
+    [(column, pa.string()) for column in dataset.CATEGORICAL_FEATURES + ['condition']] +
+    [(column, pa.int16() if column == 'year' else pa.float32()) for column in dataset.NUMERIC_DTYPES]
+)
+
+# Hash keys of the two independent row hashes (16 bytes each)
+HASH_KEYS = ('vehicle-listing1', 'vehicle-listing2')
+
+
+class BloomFilter:
+    """
+    Fixed-size set of 64-bit keys with false positives but no false negatives
+
+    Uses double hashing: the i-th bit position of a key is (h1 + i * h2) mod m.
+    """
+
+    def __init__(self, capacity, error_rate=1e-4):
+        self.capacity = capacity
+        self.n_bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, h1, h2):
+        steps = np.arange(self.n_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps * (h2[:, None] | np.uint64(1))) % np.uint64(self.n_bits)
+
+    def contains(self, h1, h2):
+        """Whether each key may have been added (definitely not, when False)"""
+        positions = self._positions(h1, h2)
+        return ((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7))) & 1).all(axis=1)
+
+    def add(self, h1, h2):
+        positions = self._positions(h1, h2).ravel()
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+        self.count += len(h1)
+
+    @property
+    def size_mb(self):
+        return self.bits.nbytes / 1024 ** 2
+
+
+def listing_hashes(chunk, content_columns):
+    """
+    Two 64-bit hashes per row: of the VIN when present, else of the listing's content
+
+    Returns:
+        tuple: (h1, h2, boolean mask of rows keyed by VIN)
+    """
+    if 'VIN' in chunk:
+        vin = chunk['VIN'].astype('string').str.strip().str.upper()
+        has_vin = (vin.notna() & (vin != '')).to_numpy()
+        vin = ('vin:' + vin.fillna('')).to_numpy(dtype=object)
+    else:
+        has_vin = np.zeros(len(chunk), dtype=bool)
+
+    hashes = []
+    for hash_key in HASH_KEYS:
+        content = pd.util.hash_pandas_object(chunk[content_columns], index=False, hash_key=hash_key).to_numpy()
+        if has_vin.any():
+            content = np.where(has_vin, pd.util.hash_array(vin, hash_key=hash_key), content)
+        hashes.append(content)
+    return hashes[0], hashes[1], has_vin
+
+
+def clean_batches(raw_path, config, seen, stats):
+    """
+    Yield cleaned, de-duplicated record batches from the raw CSV
+
+    Args:
+        raw_path (str): Raw CSV
+        config (dict): data.DEFAULT_CONFIG with overrides
+        seen (BloomFilter): Keys of listings already written (None: keep reposts)
+        stats (dict): Counters updated in place
+    """
+    header = pd.read_csv(raw_path, nrows=0).columns
+    null_only = config['null_check_columns']
+    dtypes = {
+        **dataset.NUMERIC_DTYPES,
+        **{column: 'category' for column in dataset.CATEGORICAL_FEATURES + ['condition'] + null_only}
+    }
+    usecols = list(dtypes) + (['VIN'] if 'VIN' in header and seen is not None else [])
+
+    for chunk in pd.read_csv(raw_path, usecols=usecols, dtype={**dtypes, 'VIN': 'string'},
+                             chunksize=config['chunk_size']):
+        stats['rows_read'] += len(chunk)
+        chunk = dataset.clean_chunk(chunk, config)
+        stats['rows_cleaned'] += len(chunk)
+
+        if seen is not None and len(chunk):
+            h1, h2, has_vin = listing_hashes(chunk, dataset.CLEAN_COLUMNS + null_only)
+            # Reposts within the chunk, then reposts of earlier chunks
+            first = ~pd.Series(h1).duplicated().to_numpy()
+            keep = first.copy()
+            keep[first] = ~seen.contains(h1[first], h2[first])
+            seen.add(h1[keep], h2[keep])
+            stats['duplicates_by_vin'] += int((~keep & has_vin).sum())
+            stats['duplicates_by_content'] += int((~keep & ~has_vin).sum())
+            chunk = chunk.loc[keep]
+
+        stats['rows_written'] += len(chunk)
+        frame = chunk[dataset.CLEAN_COLUMNS].astype({
+            column: 'string' for column in dataset.CATEGORICAL_FEATURES + ['condition']
+        }).astype({'year': np.int16})
+        yield pa.RecordBatch.from_pandas(frame, schema=OUTPUT_SCHEMA, preserve_index=False)
+        print(f"  {stats['rows_read']:,} rows read, {stats['rows_written']:,} written")
+
+
+def clean(raw_path, output_dir, config=None, dedup=True, expected_rows=1_000_000, error_rate=1e-4):
+    """
+    Clean a raw dump into a state/year-partitioned Parquet dataset
+
+    The dataset is written next to output_dir and moved into place when
+    complete, so readers never see a partial one.
+
+    Returns:
+        dict: Row counts and de-duplication statistics
+    """
+    config = {**dataset.DEFAULT_CONFIG, **(config or {})}
+    seen = BloomFilter(expected_rows, error_rate) if dedup else None
+    stats = dict.fromkeys(
+        ['rows_read', 'rows_cleaned', 'duplicates_by_vin', 'duplicates_by_content', 'rows_written'], 0
+    )
+    started = time.perf_counter()
+
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ds.write_dataset(
+        clean_batches(raw_path, config, seen, stats), tmp_dir, schema=OUTPUT_SCHEMA,
+        format='parquet', partitioning=dataset.PARTITIONING, basename_template='part-{i}.parquet'
+    )
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['source'] = os.path.abspath(raw_path)
+    stats['config'] = config
+    if seen is not None:
+        stats['bloom_filter'] = {
+            'capacity': seen.capacity, 'error_rate': error_rate,
+            'bits': seen.n_bits, 'hashes': seen.n_hashes, 'size_mb': seen.size_mb
+        }
+        if seen.count > seen.capacity:
+            print(f"⚠️ {seen.count:,} listings exceed --expected-rows ({seen.capacity:,}); "
+                  f"more unique listings than expected were dropped as false positives")
+    with open(os.path.join(tmp_dir, REPORT_FILE), 'w') as f:
+        json.dump(stats, f, indent=2)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Clean a raw listing dump into partitioned Parquet')
+    parser.add_argument('--raw', default='../vehicles.csv', help='Raw CSV (vehicles.csv layout)')
+    parser.add_argument('--output', default='../vehicles_clean', help='Output directory')
+    parser.add_argument('--chunk-size', type=int, default=dataset.DEFAULT_CONFIG['chunk_size'],
+                        help='Rows parsed at a time')
+    parser.add_argument('--no-dedup', action='store_true', help='Keep reposted listings')
+    parser.add_argument('--expected-rows', type=int, default=1_000_000,
+                        help='Unique listings the de-duplication filter is sized for')
+    parser.add_argument('--error-rate', type=float, default=1e-4,
+                        help='Share of unique listings that may be mistaken for reposts')
+    args = parser.parse_args()
+
+    print(f"🧹 Cleaning {args.raw}")
+    stats = clean(
+        args.raw, args.output, {'chunk_size': args.chunk_size},
+        dedup=not args.no_dedup, expected_rows=args.expected_rows, error_rate=args.error_rate
+    )
+    print(f"✓ {stats['rows_cleaned']:,} of {stats['rows_read']:,} rows passed cleaning")
+    if not args.no_dedup:
+        print(f"✓ Dropped {stats['duplicates_by_vin']:,} reposts by VIN and "
+              f"{stats['duplicates_by_content']:,} by content "
+              f"({stats['bloom_filter']['size_mb']:.1f} MB filter)")
+    print(f"\n✅ Wrote {stats['rows_written']:,} rows to {args.output} in {stats['seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
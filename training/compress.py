@@ -0,0 +1,313 @@
+"""
+Post-training compression of the exported models
+Builds smaller variants of the price and condition models and keeps the
+smallest one whose accuracy loss stays within a tolerance:
+
+- ensemble pruning: greedy forward selection of a subset of the forest's trees
+- depth capping: every tree truncated at a maximum depth (internal nodes
+  become leaves holding the average of the samples that reached them)
+- distillation: a shallow gradient-boosted student fitted to the model's
+  own predictions
+
+Usage (from the training directory):
+    python compress.py --models ../backend/models --output ../backend/models_small --tolerance 0.01
+"""
+import argparse
+import copy
+import json
+import os
+import pickle
+import numpy as np
+from sklearn.model_selection import train_test_split
+from xgboost import XGBRegressor, XGBClassifier
+from artifacts import SPLIT_FILE, copy_artifacts, read_split, write_pickle, write_version_marker
+from dataset_cache import load_cached
+from profiling import profile_model
+from train import regression_metrics, classification_metrics
+
+# Candidate sizes tried for each technique
+PRUNE_SIZES = [10, 25, 50]
+DEPTH_CAPS = [8, 12, 16]
+
+REPORT_FILE = 'compression_report.json'
+
+
+def is_forest(model):
+    """Whether the model averages sklearn decision trees (random forest / extra trees)"""
+    return hasattr(model, 'estimators_') and hasattr(model, 'decision_path') and \
+        all(hasattr(tree, 'tree_') for tree in model.estimators_)
+
+
+def tree_outputs(model, X):
+    """Per-tree predictions (class probabilities for classifiers), shape (n_trees, n_rows[, n_classes])"""
+    if hasattr(model, 'predict_proba'):
+        return np.stack([tree.predict_proba(X) for tree in model.estimators_])
+    return np.stack([tree.predict(X) for tree in model.estimators_])
+
+
+def greedy_tree_order(model, X_val, y_val):
+    """
+    Order trees by greedy forward selection on a validation set
+
+    At each step the tree whose addition gives the best validation score of
+    the averaged ensemble is appended. Any prefix of the order is a pruned
+    ensemble.
+
+    Returns:
+        list: Tree indices in selection order
+    """
+    outputs = tree_outputs(model, X_val)
+    is_classifier = outputs.ndim == 3
+    if is_classifier:
+        y_codes = np.searchsorted(model.classes_, y_val)
+
+    def score(total, count):
+        mean = total / count
+        if is_classifier:
+            return np.mean(mean.argmax(axis=1) == y_codes)
+        return -np.mean((mean - y_val) ** 2)
+
+    order, total = [], np.zeros_like(outputs[0])
+    remaining = list(range(len(outputs)))
+    while remaining:
+        scores = [score(total + outputs[i], len(order) + 1) for i in remaining]
+        best = remaining.pop(int(np.argmax(scores)))
+        order.append(best)
+        total += outputs[best]
+    return order
+
+
+def prune_forest(model, tree_indices):
+    """Copy of a forest keeping only the given trees"""
+    pruned = copy.copy(model)
+    pruned.estimators_ = [model.estimators_[i] for i in tree_indices]
+    pruned.n_estimators = len(tree_indices)
+    return pruned
+
+
+def cap_tree_depth(tree, max_depth):
+    """
+    Truncate a fitted sklearn ``Tree`` at ``max_depth``
+
+    Nodes at the cap become leaves. Their stored value is already the
+    prediction for all samples reaching them, so no refit is needed.
+    """
+    state = tree.__getstate__()
+    nodes = state['nodes']
+    if state['max_depth'] <= max_depth:
+        return tree
+
+    # Nodes are stored parents-first, so one pass assigns every depth
+    depth = np.zeros(state['node_count'], dtype=np.int64)
+    for node in range(state['node_count']):
+        left, right = nodes['left_child'][node], nodes['right_child'][node]
+        if left != -1:
+            depth[left] = depth[right] = depth[node] + 1
+
+    keep = depth <= max_depth
+    new_index = np.cumsum(keep) - 1
+    new_nodes = nodes[keep].copy()
+
+    internal = (new_nodes['left_child'] != -1) & (depth[keep] < max_depth)
+    new_nodes['left_child'] = np.where(internal, new_index[np.maximum(new_nodes['left_child'], 0)], -1)
+    new_nodes['right_child'] = np.where(internal, new_index[np.maximum(new_nodes['right_child'], 0)], -1)
+    new_nodes['feature'][~internal] = -2
+    new_nodes['threshold'][~internal] = -2.0
+
+    cls, args = tree.__reduce__()[:2]
+    capped = cls(*args)
+    capped.__setstate__({
+        **state,
+        'max_depth': max_depth,
+        'node_count': int(keep.sum()),
+        'nodes': new_nodes,
+        'values': state['values'][keep]
+    })
+    return capped
+
+
+def cap_forest_depth(model, max_depth):
+    """Copy of a forest with every tree truncated at max_depth"""
+    capped = copy.copy(model)
+    capped.estimators_ = []
+    for estimator in model.estimators_:
+        estimator = copy.copy(estimator)
+        estimator.tree_ = cap_tree_depth(estimator.tree_, max_depth)
+        estimator.max_depth = max_depth
+        capped.estimators_.append(estimator)
+    capped.max_depth = max_depth
+    return capped
+
+
+def distill(model, X_train):
+    """
+    Fit a shallow gradient-boosted student on the model's predictions
+
+    The price student regresses on the teacher's predicted prices. The
+    condition student learns the teacher's class probabilities (soft labels):
+    every row is repeated once per class, weighted by that class's probability.
+    """
+    if hasattr(model, 'predict_proba'):
+        proba = model.predict_proba(X_train)
+        n_rows, n_classes = proba.shape
+        student = XGBClassifier(n_estimators=200, max_depth=4, learning_rate=0.1, random_state=42,
+                                n_jobs=-1, eval_metric='mlogloss')
+        student.fit(
+            np.tile(X_train, (n_classes, 1)),
+            np.repeat(np.arange(n_classes), n_rows),
+            sample_weight=proba.T.ravel()
+        )
+    else:
+        student = XGBRegressor(n_estimators=200, max_depth=4, learning_rate=0.1, random_state=42, n_jobs=-1)
+        student.fit(X_train, model.predict(X_train))
+    return student
+
+
+def candidates(model, X_train, y_train, X_val, y_val):
+    """Compressed variants of a model, by name"""
+    variants = {}
+    if is_forest(model):
+        order = greedy_tree_order(model, X_val, y_val)
+        for size in PRUNE_SIZES:
+            if size < len(order):
+                variants[f'prune {size} trees'] = prune_forest(model, order[:size])
+        for depth in DEPTH_CAPS:
+            variants[f'depth <= {depth}'] = cap_forest_depth(model, depth)
+            for size in PRUNE_SIZES:
+                if size < len(order):
+                    variants[f'prune {size} trees, depth <= {depth}'] = \
+                        cap_forest_depth(prune_forest(model, order[:size]), depth)
+    variants['distilled student'] = distill(model, X_train)
+    return variants
+
+
+def compress_model(model, X, y, evaluate, metric, tolerance, stratify=False, test_size=0.2, random_state=42):
+    """
+    Evaluate compressed variants and pick the smallest within tolerance
+
+    Uses the training script's split of the same rows (see load_training_set),
+    so only its test rows were not seen by the exported model. Half of them is a validation set that orders
+    trees for pruning and selects the variant; the other half is the test
+    set whose metrics are reported. The distilled student learns the
+    teacher's predictions on the training rows.
+
+    Args:
+        model: Exported (teacher) model
+        X, y: Full training matrix and targets
+        evaluate (callable): (y_true, y_pred) -> dict of metrics
+        metric (str): Metric whose loss is bounded (higher is better)
+        tolerance (float): Largest allowed drop in ``metric``
+        stratify (bool): Stratify the split by y (classification)
+        test_size, random_state: train.py's split
+
+    Returns:
+        tuple: (selected name, selected model, table of results)
+    """
+    X_train, X_held_out, y_train, y_held_out = train_test_split(
+        X, y, test_size=test_size, random_state=random_state, stratify=y if stratify else None
+    )
+    X_val, X_test, y_val, y_test = train_test_split(
+        X_held_out, y_held_out, test_size=0.5, random_state=42, stratify=y_held_out if stratify else None
+    )
+
+    def predict(variant, X_eval):
+        y_pred = variant.predict(X_eval)
+        if hasattr(variant, 'classes_') and not np.array_equal(variant.classes_, model.classes_):
+            y_pred = model.classes_[y_pred]
+        return y_pred
+
+    def row(variant):
+        return {
+            'validation': evaluate(y_val, predict(variant, X_val)),
+            'test': evaluate(y_test, predict(variant, X_test)),
+            **profile_model(variant, X_test)
+        }
+
+    table = {'original': row(model)}
+    baseline = table['original']['validation'][metric]
+    variants = {'original': model, **candidates(model, X_train, y_train, X_val, y_val)}
+
+    for name, variant in variants.items():
+        if name != 'original':
+            table[name] = row(variant)
+        table[name]['loss'] = baseline - table[name]['validation'][metric]
+        table[name]['within_tolerance'] = table[name]['loss'] <= tolerance
+        print(f"  {name}: validation {metric}={table[name]['validation'][metric]:.4f} "
+              f"(loss {table[name]['loss']:+.4f}), test {metric}={table[name]['test'][metric]:.4f}, "
+              f"{table[name]['size_mb']:.1f} MB, loads in {table[name]['load_ms']:.0f} ms, "
+              f"p95 {table[name]['latency_ms_p95']:.2f} ms")
+
+    accepted = [name for name in table if table[name]['within_tolerance']]
+    selected = min(accepted, key=lambda name: table[name]['size_mb'])
+    return selected, variants[selected], table
+
+
+def load_training_set(data_path, models_dir, cache_dir):
+    """
+    Load the rows the exported models were trained and tested on
+
+    Applies the filters train.py recorded in SPLIT_FILE (states, years,
+    increments) and checks that the rows are the ones it split.
+
+    Returns:
+        tuple: (data dict from load_cached, split record)
+    """
+    split = read_split(models_dir)
+    if split is None:
+        print(f"⚠️ No {SPLIT_FILE} in {models_dir}: assuming train.py's defaults (all rows, no filters)")
+        split = {'config': None, 'include_increments': False, 'cache_key': None, 'rows': None,
+                 'test_size': 0.2, 'random_state': 42}
+
+    data = load_cached(data_path, split['config'], cache_dir=cache_dir, include_increments=split['include_increments'])
+    rows = {'price': len(data['y_reg']), 'condition': len(data['y_clf'])}
+    if (split['cache_key'] and data['cache_key'] != split['cache_key']) or (split['rows'] and rows != split['rows']):
+        raise ValueError(f"{data_path} does not hold the rows the models in {models_dir} were trained on "
+                         f"(expected {split['rows']} from {split.get('data')}, found {rows})")
+    return data, split
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compress the exported models within an accuracy tolerance')
+    parser.add_argument('--data', default='../vehicles.csv', help='Path to vehicles.csv')
+    parser.add_argument('--models', default='../backend/models', help='Directory with the exported models')
+    parser.add_argument('--output', default='../backend/models_compressed', help='Directory for the compressed models')
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help='Largest allowed drop in R² (price) and accuracy (condition)')
+    parser.add_argument('--cache-dir', default='.dataset_cache', help='Cache of the cleaned, encoded matrices')
+    args = parser.parse_args()
+
+    data, split = load_training_set(args.data, args.models, args.cache_dir)
+    os.makedirs(args.output, exist_ok=True)
+    report = {'tolerance': args.tolerance, 'tasks': {}}
+
+    tasks = [
+        ('price', 'regression_model.pkl', data['X_reg'], data['y_reg'], regression_metrics, 'r2'),
+        ('condition', 'classification_model.pkl', data['X_clf'], data['y_clf'], classification_metrics, 'accuracy')
+    ]
+    for task, file_name, X, y, evaluate, metric in tasks:
+        with open(os.path.join(args.models, file_name), 'rb') as f:
+            model = pickle.load(f)
+
+        print(f"\n🗜️ Compressing {task} model ({type(model).__name__})")
+        selected, compressed, table = compress_model(
+            model, X, y, evaluate, metric, args.tolerance, stratify=task == 'condition',
+            test_size=split['test_size'], random_state=split['random_state']
+        )
+        print(f"🏆 Selected: {selected} (test {metric}={table[selected]['test'][metric]:.4f}, "
+              f"original {table['original']['test'][metric]:.4f})")
+
+        write_pickle(os.path.join(args.output, file_name), compressed)
+        report['tasks'][task] = {'selected': selected, 'metric': metric, 'candidates': table}
+
+    # Everything else (scalers, encoders, drift reference, segment models, ...) is unchanged
+    copy_artifacts(args.models, args.output,
+                   skip=[file_name for _, file_name, *_ in tasks] + [REPORT_FILE])
+
+    with open(os.path.join(args.output, REPORT_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+    write_version_marker(args.output)
+    print(f"\n✅ Compressed models written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
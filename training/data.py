@@ -0,0 +1,233 @@
+"""
+Memory-lean loading of vehicles.csv for training
+Reads only the columns the models use, with compact dtypes, and applies the
+notebook's cleaning chunk by chunk so the full raw table never sits in memory.
+Categorical columns are encoded with category codes, which match the codes
+LabelEncoder assigns in the notebook (classes sorted as strings).
+
+The source can also be a Parquet directory written by clean.py, partitioned
+by state and year; then only the partitions selected by the configuration
+are read.
+"""
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pandas.api.types import union_categoricals
+from sklearn.preprocessing import LabelEncoder
+
+# Same as the notebook (and ModelHandler.current_year)
+CURRENT_YEAR = 2021
+
+CATEGORICAL_FEATURES = [
+    'manufacturer', 'fuel', 'title_status', 'transmission', 'drive',
+    'size', 'type', 'paint_color', 'state', 'region'
+]
+
+# Feature order used by the backend (ModelHandler.REGRESSION_FEATURES and
+# CLASSIFICATION_FEATURES). The notebook puts condition before state/region;
+# the served models must follow the backend's order.
+REGRESSION_FEATURES = [
+    'year', 'vehicle_age', 'odometer', 'lat', 'long',
+    'manufacturer', 'fuel', 'title_status', 'transmission', 'drive',
+    'size', 'type', 'paint_color', 'state', 'region', 'condition'
+]
+CLASSIFICATION_FEATURES = [
+    'price', 'year', 'vehicle_age', 'odometer', 'lat', 'long',
+    'manufacturer', 'fuel', 'title_status', 'transmission', 'drive',
+    'size', 'type', 'paint_color', 'state', 'region'
+]
+
+# Cleaning and parsing settings (defaults reproduce the notebook)
+DEFAULT_CONFIG = {
+    'min_price': 0,          # exclusive
+    'max_price': 500000,     # inclusive
+    # The notebook's dropna() also drops rows missing these unused columns
+    'null_check_columns': ['model', 'cylinders'],
+    'chunk_size': 200000,
+    # Row filters; on a partitioned Parquet source they select partitions
+    'states': None,          # list of state codes
+    'years': None            # [first, last], inclusive
+}
+
+NUMERIC_DTYPES = {
+    'price': 'float32',
+    'year': 'float32',  # int16 once missing values are dropped
+    'odometer': 'float32',
+    'lat': 'float32',
+    'long': 'float32'
+}
+
+# Columns the cleaned data keeps
+CLEAN_COLUMNS = CATEGORICAL_FEATURES + ['condition'] + list(NUMERIC_DTYPES)
+
+# Hive-style partitioning of the cleaned Parquet dataset (see clean.py)
+PARTITIONING = ds.partitioning(pa.schema([('state', pa.string()), ('year', pa.int16())]), flavor='hive')
+
+
+def clean_chunk(chunk, config):
+    """
+    Rows of a raw chunk that survive the notebook's cleaning
+
+    Keeps prices in (min_price, max_price] and rows without missing values
+    in the used columns or config['null_check_columns'], then applies the
+    optional states / years filters.
+    """
+    keep = (chunk['price'] > config['min_price']) & (chunk['price'] <= config['max_price'])
+    keep &= chunk[CLEAN_COLUMNS + config['null_check_columns']].notna().all(axis=1)
+    if config['states']:
+        keep &= chunk['state'].isin(config['states'])
+    if config['years']:
+        first, last = config['years']
+        keep &= chunk['year'].between(first, last)
+    return chunk.loc[keep]
+
+
+def _add_vehicle_age(df):
+    df['year'] = df['year'].astype(np.int16)
+    df['vehicle_age'] = (CURRENT_YEAR - df['year']).astype(np.int16)
+    return df
+
+
+def read_clean(csv_path, config=None):
+    """
+    Read and clean vehicles.csv in chunks
+
+    Applies the notebook's cleaning (price range, then drop rows with any
+    missing value) while streaming, and adds vehicle_age.
+
+    Args:
+        csv_path (str): Path to vehicles.csv
+        config (dict): Overrides for DEFAULT_CONFIG
+
+    Returns:
+        pd.DataFrame: Cleaned frame with categorical columns (sorted
+                      categories), float32 numerics and int16 year/vehicle_age
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    null_only = config['null_check_columns']
+    dtypes = {
+        **NUMERIC_DTYPES,
+        **{column: 'category' for column in CATEGORICAL_FEATURES + ['condition'] + null_only}
+    }
+
+    chunks = []
+    reader = pd.read_csv(csv_path, usecols=list(dtypes), dtype=dtypes, chunksize=config['chunk_size'])
+    for chunk in reader:
+        chunks.append(clean_chunk(chunk, config).drop(columns=null_only))
+
+    if not chunks:
+        raise ValueError(f"No rows left after cleaning {csv_path}")
+
+    # Per-chunk categories differ; merge them into one sorted vocabulary
+    columns = {}
+    for column in CATEGORICAL_FEATURES + ['condition']:
+        columns[column] = union_categoricals(
+            [chunk[column] for chunk in chunks], sort_categories=True, ignore_order=True
+        )
+        columns[column] = columns[column].remove_unused_categories()
+    for column in NUMERIC_DTYPES:
+        columns[column] = np.concatenate([chunk[column].to_numpy() for chunk in chunks])
+    del chunks
+
+    return _add_vehicle_age(pd.DataFrame(columns))
+
+
+def read_partitions(parquet_dir, config=None):
+    """
+    Read the cleaned, partitioned Parquet dataset written by clean.py
+
+    Only the partitions matching config['states'] / config['years'] are
+    opened; the price range is re-applied row by row.
+
+    Args:
+        parquet_dir (str): Output directory of clean.py
+        config (dict): Overrides for DEFAULT_CONFIG
+
+    Returns:
+        pd.DataFrame: Same layout as read_clean
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    expression = (ds.field('price') > config['min_price']) & (ds.field('price') <= config['max_price'])
+    if config['states']:
+        expression &= ds.field('state').isin(config['states'])
+    if config['years']:
+        first, last = config['years']
+        expression &= (ds.field('year') >= first) & (ds.field('year') <= last)
+
+    dataset = ds.dataset(parquet_dir, format='parquet', partitioning=PARTITIONING)
+    table = dataset.to_table(columns=CLEAN_COLUMNS, filter=expression)
+    if table.num_rows == 0:
+        raise ValueError(f"No rows in {parquet_dir} match the partition filters")
+
+    df = table.to_pandas(strings_to_categorical=True)
+    del table
+    # Dictionary order depends on the files read; sort as read_clean does
+    for column in CATEGORICAL_FEATURES + ['condition']:
+        df[column] = df[column].cat.remove_unused_categories()
+        df[column] = df[column].cat.reorder_categories(sorted(df[column].cat.categories))
+    for column, dtype in NUMERIC_DTYPES.items():
+        df[column] = df[column].astype(dtype)
+    return _add_vehicle_age(df)
+
+
+def read_source(path, config=None):
+    """read_partitions for a directory written by clean.py, read_clean for a CSV"""
+    return read_partitions(path, config) if os.path.isdir(path) else read_clean(path, config)
+
+
+def build_encoders(df):
+    """
+    LabelEncoders equivalent to the notebook's, built from category vocabularies
+
+    Returns:
+        tuple: (dict of feature -> LabelEncoder, condition LabelEncoder)
+    """
+    def encoder(categories):
+        le = LabelEncoder()
+        le.classes_ = np.asarray(categories, dtype=object)
+        return le
+
+    label_encoders = {column: encoder(df[column].cat.categories) for column in CATEGORICAL_FEATURES}
+    return label_encoders, encoder(df['condition'].cat.categories)
+
+
+def feature_matrix(df, features):
+    """
+    Build a float32 feature matrix, using category codes for categorical columns
+
+    Args:
+        df (pd.DataFrame): Frame returned by read_clean
+        features (list): Feature order
+
+    Returns:
+        np.ndarray: Matrix of shape (len(df), len(features))
+    """
+    X = np.empty((len(df), len(features)), dtype=np.float32)
+    for position, feature in enumerate(features):
+        column = df[feature]
+        X[:, position] = column.cat.codes if isinstance(column.dtype, pd.CategoricalDtype) else column
+    return X
+
+
+def load_training_data(csv_path, config=None):
+    """
+    Load everything the training script needs from vehicles.csv (or a cleaned Parquet directory)
+
+    Returns:
+        dict: X_reg, y_reg (price), X_clf, y_clf (condition codes),
+              label_encoders and condition_encoder
+    """
+    df = read_source(csv_path, config)
+    label_encoders, condition_encoder = build_encoders(df)
+
+    data = {
+        'X_reg': feature_matrix(df, REGRESSION_FEATURES),
+        'y_reg': df['price'].to_numpy(dtype=np.float64),
+        'X_clf': feature_matrix(df, CLASSIFICATION_FEATURES),
+        'y_clf': df['condition'].cat.codes.to_numpy(dtype=np.int64),
+        'label_encoders': label_encoders,
+        'condition_encoder': condition_encoder
+    }
+    return data
@@ -0,0 +1,234 @@
+"""
+On-disk cache of the cleaned, encoded training matrices
+Entries are keyed by a hash of the raw CSV contents plus the cleaning and
+feature configuration, and stored as .npy files that later runs memory-map
+instead of re-parsing vehicles.csv. Changing the data or the configuration
+changes the key, so stale entries are never read.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+from pathlib import Path
+from sklearn.preprocessing import LabelEncoder
+import data as dataset
+
+# Bump when the cache layout or the encoding logic changes
+CACHE_FORMAT = 1
+
+ARRAYS = ['X_reg', 'y_reg', 'X_clf', 'y_clf']
+
+# Remembers file digests by (path, size, mtime) so unchanged files are hashed once
+HASH_INDEX = 'file_hashes.json'
+
+# Base entry -> entries extended with newly ingested listings, oldest first
+INCREMENTS_INDEX = 'increments.json'
+
+
+def file_digest(path, cache_dir=None):
+    """
+    SHA-256 of a file's contents, or of every file under a directory (e.g. a
+    Parquet dataset written by clean.py)
+
+    Args:
+        path (str): File or directory to hash
+        cache_dir (str): If given, digests are remembered per (path, size, mtime)
+
+    Returns:
+        str: Hex digest
+    """
+    root = Path(path)
+    if root.is_dir():
+        files = sorted(p for p in root.rglob('*') if p.is_file())
+        listing = ';'.join(f"{p.relative_to(root)}:{p.stat().st_size}:{p.stat().st_mtime_ns}" for p in files)
+        stamp = f"{root.resolve()}/:{hashlib.sha256(listing.encode()).hexdigest()}"
+    else:
+        files = [root]
+        stat = os.stat(path)
+        stamp = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    index_path = Path(cache_dir) / HASH_INDEX if cache_dir else None
+    known = {}
+    if index_path and index_path.exists():
+        with open(index_path) as f:
+            known = json.load(f)
+        if stamp in known:
+            return known[stamp]
+
+    digest = hashlib.sha256()
+    for file in files:
+        if root.is_dir():
+            digest.update(f"{file.relative_to(root)}\0".encode())
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    digest = digest.hexdigest()
+
+    if index_path:
+        known[stamp] = digest
+        _write_json(index_path, known)
+    return digest
+
+
+def config_digest(config):
+    """Hash of everything besides the raw data that determines the cached arrays"""
+    description = {
+        'format': CACHE_FORMAT,
+        'config': {**dataset.DEFAULT_CONFIG, **(config or {}), 'chunk_size': None},
+        'current_year': dataset.CURRENT_YEAR,
+        'categorical': dataset.CATEGORICAL_FEATURES,
+        'regression_features': dataset.REGRESSION_FEATURES,
+        'classification_features': dataset.CLASSIFICATION_FEATURES,
+        'dtypes': dataset.NUMERIC_DTYPES
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def _write_json(path, obj):
+    """Write JSON via a temporary file so readers never see a partial file"""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _encoder(classes):
+    le = LabelEncoder()
+    le.classes_ = np.asarray(classes, dtype=object)
+    return le
+
+
+def _save(entry_dir, data, meta):
+    """Write a cache entry into a temporary directory, then move it into place"""
+    tmp_dir = entry_dir.with_name(f"{entry_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    for name in ARRAYS:
+        np.save(tmp_dir / f"{name}.npy", data[name])
+    vocab = {feature: list(encoder.classes_) for feature, encoder in data['label_encoders'].items()}
+    vocab['condition'] = list(data['condition_encoder'].classes_)
+    _write_json(tmp_dir / 'vocab.json', vocab)
+    _write_json(tmp_dir / 'meta.json', meta)
+
+    try:
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # Another run stored the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _load(entry_dir):
+    """Memory-map a cache entry"""
+    data = {name: np.load(entry_dir / f"{name}.npy", mmap_mode='r') for name in ARRAYS}
+    with open(entry_dir / 'vocab.json') as f:
+        vocab = json.load(f)
+    with open(entry_dir / 'meta.json') as f:
+        data['meta'] = json.load(f)
+    data['condition_encoder'] = _encoder(vocab.pop('condition'))
+    data['label_encoders'] = {feature: _encoder(classes) for feature, classes in vocab.items()}
+    data['cache_key'] = entry_dir.name
+    return data
+
+
+def _increments(cache_dir):
+    path = Path(cache_dir) / INCREMENTS_INDEX
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_cached(csv_path, config=None, cache_dir='.dataset_cache', include_increments=False):
+    """
+    Load the training matrices, from the cache when possible
+
+    Same return value as data.load_training_data, except that the arrays
+    are read-only memory maps.
+
+    Args:
+        csv_path (str): Path to vehicles.csv (or a Parquet directory written by clean.py)
+        config (dict): Overrides for data.DEFAULT_CONFIG
+        cache_dir (str): Cache directory
+        include_increments (bool): Load the latest entry extended with new
+                                   listings (see append_increment), if any
+
+    Returns:
+        dict: X_reg, y_reg, X_clf, y_clf, label_encoders, condition_encoder,
+              plus the entry's cache_key and meta
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    source = file_digest(csv_path, cache_dir)
+    key = f"{source[:16]}-{config_digest(config)[:16]}"
+    entry_dir = cache_dir / key
+
+    increments = _increments(cache_dir).get(key) if include_increments else None
+    if increments:
+        data = _load(cache_dir / increments[-1])
+        print(f"✓ Dataset cache hit {key} + {len(increments)} increment(s) ({time.perf_counter() - started:.1f}s)")
+        return data
+
+    if (entry_dir / 'meta.json').exists():
+        data = _load(entry_dir)
+        print(f"✓ Dataset cache hit {key} ({time.perf_counter() - started:.1f}s)")
+        return data
+
+    print(f"⚠️ Dataset cache miss {key}, parsing {csv_path}")
+    data = dataset.load_training_data(csv_path, config)
+    _save(entry_dir, data, {
+        'source': os.path.abspath(csv_path),
+        'source_sha256': source,
+        'config': {**dataset.DEFAULT_CONFIG, **(config or {})},
+        'rows': int(len(data['y_reg'])),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    })
+    print(f"✓ Cached as {key} ({time.perf_counter() - started:.1f}s)")
+    return _load(entry_dir)
+
+
+def append_increment(cache_dir, base_data, new_data, source):
+    """
+    Store a cached training set extended with newly ingested rows
+
+    The extended entry becomes the latest increment of the original base
+    entry, so load_cached(..., include_increments=True) returns it.
+
+    Args:
+        cache_dir (str): Cache directory
+        base_data (dict): Entry returned by load_cached
+        new_data (dict): X_reg, y_reg, X_clf, y_clf of the new rows, encoded
+                         with new_data's (extended) label_encoders
+        source (str): Path of the ingested file
+
+    Returns:
+        dict: The extended entry (memory-mapped)
+    """
+    cache_dir = Path(cache_dir)
+    base_meta = base_data['meta']
+    base_key = base_meta.get('base_key', base_data['cache_key'])
+    digest = file_digest(source, cache_dir)
+    if digest in base_meta.get('increments', []):
+        raise ValueError(f"{source} was already appended to {base_data['cache_key']}")
+
+    key = f"{base_key}-inc-{hashlib.sha256((base_data['cache_key'] + digest).encode()).hexdigest()[:16]}"
+    combined = {name: np.concatenate([base_data[name], new_data[name]]) for name in ARRAYS}
+    combined['label_encoders'] = new_data['label_encoders']
+    combined['condition_encoder'] = base_data['condition_encoder']
+    _save(cache_dir / key, combined, {
+        **base_meta,
+        'base_key': base_key,
+        'increments': base_meta.get('increments', []) + [digest],
+        'increment_sources': base_meta.get('increment_sources', []) + [os.path.abspath(source)],
+        'rows': int(len(combined['y_reg'])),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    })
+
+    index = _increments(cache_dir)
+    index.setdefault(base_key, []).append(key)
+    _write_json(cache_dir / INCREMENTS_INDEX, index)
+    return _load(cache_dir / key)
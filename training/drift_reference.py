@@ -0,0 +1,101 @@
+"""
+Reference distributions for the backend's drift monitor
+Summarizes the training data the way backend/drift.py summarizes live
+requests: a histogram on quantile bin edges for each numeric feature and
+value counts for each categorical one. train.py writes it next to the
+models; this script rebuilds it for models that were exported without one.
+
+Usage (from the training directory):
+    python drift_reference.py --data ../vehicles.csv --output ../backend/models
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import data as dataset
+from dataset_cache import load_cached
+
+REFERENCE_FILE = 'drift_reference.json'
+
+NUMERIC_FEATURES = ['year', 'odometer', 'price', 'lat', 'long']
+
+# Histogram bins (equal training mass in each)
+N_BINS = 20
+
+
+def numeric_reference(values, n_bins=N_BINS):
+    """Interior quantile edges, per-bin counts and the observed range"""
+    values = np.asarray(values, dtype=np.float64)
+    edges = np.unique(np.quantile(values, np.arange(1, n_bins) / n_bins))
+    counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+    return {
+        'edges': edges.tolist(),
+        'counts': counts.tolist(),
+        'min': float(values.min()),
+        'max': float(values.max())
+    }
+
+
+def categorical_reference(codes, classes):
+    """Count of every training value"""
+    counts = np.bincount(np.asarray(codes, dtype=np.int64), minlength=len(classes))
+    return {'counts': {str(value): int(count) for value, count in zip(classes, counts)}}
+
+
+def build_reference(data, source=None):
+    """
+    Drift reference from the encoded training data
+
+    Args:
+        data (dict): load_training_data / load_cached output (X_reg and y_reg are used)
+        source (str): Training data path, recorded in the reference
+
+    Returns:
+        dict: JSON-serializable reference
+    """
+    X, features = data['X_reg'], dataset.REGRESSION_FEATURES
+    numeric = {'price': numeric_reference(data['y_reg'])}
+    for feature in NUMERIC_FEATURES:
+        if feature != 'price':
+            numeric[feature] = numeric_reference(X[:, features.index(feature)])
+
+    encoders = {**data['label_encoders'], 'condition': data['condition_encoder']}
+    categorical = {
+        feature: categorical_reference(X[:, features.index(feature)], encoder.classes_)
+        for feature, encoder in encoders.items()
+    }
+    return {
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'source': os.path.abspath(source) if source else None,
+        'rows': int(len(data['y_reg'])),
+        'numeric': numeric,
+        'categorical': categorical
+    }
+
+
+def write_reference(output_dir, reference):
+    """Write the reference atomically next to the models"""
+    path = os.path.join(output_dir, REFERENCE_FILE)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(reference, f)
+    os.replace(tmp, path)
+    print(f"✓ Saved {REFERENCE_FILE}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the drift monitor reference from training data')
+    parser.add_argument('--data', default='../vehicles.csv', help='Path to vehicles.csv (or a clean.py directory)')
+    parser.add_argument('--output', default='../backend/models', help='Models directory')
+    parser.add_argument('--cache-dir', default='.dataset_cache', help='Cache of the cleaned, encoded matrices')
+    args = parser.parse_args()
+
+    print(f"📂 Loading {args.data}")
+    data = load_cached(args.data, cache_dir=args.cache_dir)
+    write_reference(args.output, build_reference(data, args.data))
+    print(f"\n✅ Drift reference for {len(data['y_reg']):,} rows written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
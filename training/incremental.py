@@ -0,0 +1,282 @@
+"""
+Incremental retraining from newly ingested listings
+Updates the exported models with a new CSV of listings instead of refitting
+on the whole of vehicles.csv:
+
+- XGBoost: boosting continues from the exported booster
+- random forests / gradient boosting: warm-start trees are added, fitted on
+  the new rows (plus a replayed sample of the previous training rows)
+- linear models: refitted on all rows (they are cheap)
+
+Label-encoder vocabularies are extended by appending unseen values, so the
+codes of existing values (and ModelHandler's lookups) stay stable. The new
+rows are appended to the dataset cache, so later runs see them, and so does
+a full refit with ``train.py --include-increments``, which exports the
+extended encoders instead of rebuilding them.
+
+Usage (from the training directory):
+    python incremental.py --new ../listings_2021-05-01.csv --data ../vehicles.csv --models ../backend/models
+"""
+import argparse
+import copy
+import json
+import os
+import pickle
+import time
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from xgboost import XGBModel
+import data as dataset
+from artifacts import copy_artifacts, write_pickle, write_version_marker
+from dataset_cache import load_cached, append_increment, file_digest
+from train import regression_metrics, classification_metrics
+
+REPORT_FILE = 'incremental_report.json'
+
+# Models trained on standardized features (train.SCALED_MODELS, by class)
+LINEAR_MODELS = {'LinearRegression', 'Ridge', 'LogisticRegression'}
+
+
+def extend_vocabulary(encoder, values):
+    """
+    Copy of a LabelEncoder with unseen values appended after the known ones
+
+    Returns:
+        tuple: (extended encoder, list of values that were added)
+    """
+    known = set(encoder.classes_)
+    added = sorted(set(values) - known)
+    extended = copy.copy(encoder)
+    extended.classes_ = np.concatenate([encoder.classes_, np.asarray(added, dtype=object)])
+    return extended, added
+
+
+def encode_new_rows(csv_path, label_encoders, condition_encoder):
+    """
+    Clean and encode new listings against the exported vocabularies
+
+    Returns:
+        dict: X_reg, y_reg, X_clf, y_clf and the extended label_encoders
+    """
+    df = dataset.read_source(csv_path)
+
+    unknown_condition = ~df['condition'].isin(condition_encoder.classes_)
+    if unknown_condition.any():
+        print(f"⚠️ Dropping {int(unknown_condition.sum())} rows with an unknown condition "
+              f"({', '.join(sorted(set(df.loc[unknown_condition, 'condition'])))})")
+        df = df.loc[~unknown_condition].reset_index(drop=True)
+    if df.empty:
+        raise ValueError(f"No usable rows in {csv_path}")
+
+    extended = {}
+    for feature in dataset.CATEGORICAL_FEATURES:
+        extended[feature], added = extend_vocabulary(label_encoders[feature], df[feature].cat.categories)
+        if added:
+            print(f"  {feature}: {len(added)} new value(s) ({', '.join(added[:5])}{', ...' if len(added) > 5 else ''})")
+        # Category codes become positions in the extended vocabulary
+        df[feature] = df[feature].cat.set_categories(extended[feature].classes_)
+    df['condition'] = df['condition'].cat.set_categories(condition_encoder.classes_)
+
+    return {
+        'X_reg': dataset.feature_matrix(df, dataset.REGRESSION_FEATURES),
+        'y_reg': df['price'].to_numpy(dtype=np.float64),
+        'X_clf': dataset.feature_matrix(df, dataset.CLASSIFICATION_FEATURES),
+        'y_clf': df['condition'].cat.codes.to_numpy(dtype=np.int64),
+        'label_encoders': extended
+    }
+
+
+def replay_sample(X, y, size, classify, seed=42):
+    """Rows drawn from the previous training set (stratified for classification)"""
+    size = min(int(size), len(y))
+    if size <= 0:
+        return X[:0], y[:0]
+    if size == len(y):
+        return np.asarray(X), np.asarray(y)
+    index, _ = train_test_split(
+        np.arange(len(y)), train_size=size, random_state=seed, stratify=y if classify else None
+    )
+    index.sort()
+    return X[index], y[index]
+
+
+def update_model(model, X_fit, y_fit, new_trees, boost_rounds):
+    """
+    Update a fitted model with new rows without refitting it from scratch
+
+    Args:
+        model: Exported model
+        X_fit, y_fit: New rows (plus replayed rows)
+        new_trees (int): Trees added to forests and sklearn gradient boosting
+        boost_rounds (int): Boosting rounds added to XGBoost
+
+    Returns:
+        tuple: (updated model, description of the update)
+    """
+    if isinstance(model, XGBModel):
+        updated = type(model)(**model.get_params())
+        updated.set_params(n_estimators=boost_rounds)
+        updated.fit(X_fit, y_fit, xgb_model=model.get_booster())
+        return updated, f'{boost_rounds} boosting rounds continued from the exported booster'
+
+    if 'warm_start' in model.get_params():
+        updated = copy.deepcopy(model)
+        updated.set_params(warm_start=True, n_estimators=model.n_estimators + new_trees)
+        updated.fit(X_fit, y_fit)
+        updated.set_params(warm_start=False)
+        return updated, f'{new_trees} warm-start trees added to {model.n_estimators}'
+
+    raise ValueError(f"{type(model).__name__} cannot be updated incrementally")
+
+
+def update_task(model, scaler, old_split, X_new, y_new, args, classify):
+    """
+    Update one exported model and compare it with the previous one (and optionally a full refit)
+
+    old_split holds the previous rows as (X_train, X_test, y_train, y_test);
+    20% of the new rows are held out for evaluation as well.
+
+    Returns:
+        tuple: (updated model, report dict)
+    """
+    evaluate = classification_metrics if classify else regression_metrics
+    X_old_train, X_old_test, y_old_train, y_old_test = old_split
+    X_new_fit, X_new_test, y_new_fit, y_new_test = train_test_split(
+        X_new, y_new, test_size=0.2, random_state=42
+    )
+    linear = type(model).__name__ in LINEAR_MODELS
+
+    def transform(X):
+        return scaler.transform(X) if linear else X
+
+    def scores(candidate):
+        return {
+            'previous_rows': evaluate(y_old_test, candidate.predict(transform(X_old_test))),
+            'new_rows': evaluate(y_new_test, candidate.predict(transform(X_new_test)))
+        }
+
+    report = {'model': type(model).__name__, 'new_rows': int(len(y_new_fit)), 'previous': scores(model)}
+
+    started = time.perf_counter()
+    if linear:
+        # Refitting is cheaper than anything incremental; the exported scaler is kept
+        updated = clone(model).fit(
+            transform(np.concatenate([X_old_train, X_new_fit])), np.concatenate([y_old_train, y_new_fit])
+        )
+        report['update'] = 'refitted on all rows (linear model)'
+    else:
+        X_replay, y_replay = replay_sample(X_old_train, y_old_train, args.replay * len(y_new_fit), classify)
+        X_fit = np.concatenate([X_replay, X_new_fit])
+        y_fit = np.concatenate([y_replay, y_new_fit])
+        if classify:
+            missing = sorted(set(range(len(model.classes_))) - set(np.unique(y_fit)))
+            if missing:
+                raise ValueError(f"Update rows lack condition code(s) {missing}; raise --replay")
+        updated, report['update'] = update_model(model, X_fit, y_fit, args.new_trees, args.boost_rounds)
+        report['replayed_rows'] = int(len(y_replay))
+    report['update_seconds'] = time.perf_counter() - started
+    report['incremental'] = scores(updated)
+
+    if args.compare:
+        started = time.perf_counter()
+        refit = clone(model).fit(
+            transform(np.concatenate([X_old_train, X_new_fit])), np.concatenate([y_old_train, y_new_fit])
+        )
+        report['full_refit_seconds'] = time.perf_counter() - started
+        report['full_refit'] = scores(refit)
+
+    metric = 'accuracy' if classify else 'r2'
+    print(f"  {report['update']} in {report['update_seconds']:.1f}s")
+    for label in ['previous', 'incremental', 'full_refit']:
+        if label in report:
+            timing = f" ({report['full_refit_seconds']:.1f}s)" if label == 'full_refit' else ''
+            print(f"  {label}: {metric} {report[label]['previous_rows'][metric]:.4f} on previous rows, "
+                  f"{report[label]['new_rows'][metric]:.4f} on new rows{timing}")
+    return updated, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update the exported models with newly ingested listings')
+    parser.add_argument('--new', required=True, help='CSV of new listings (same columns as vehicles.csv)')
+    parser.add_argument('--data', default='../vehicles.csv', help='Path to vehicles.csv')
+    parser.add_argument('--models', default='../backend/models', help='Directory with the exported models')
+    parser.add_argument('--output', default=None, help='Directory for the updated models (default: --models)')
+    parser.add_argument('--cache-dir', default='.dataset_cache', help='Cache of the cleaned, encoded matrices')
+    parser.add_argument('--new-trees', type=int, default=20,
+                        help='Trees added to random forest / gradient boosting models')
+    parser.add_argument('--boost-rounds', type=int, default=50, help='Boosting rounds added to XGBoost models')
+    parser.add_argument('--replay', type=float, default=1.0,
+                        help='Previous training rows replayed per new row when adding trees')
+    parser.add_argument('--compare', action='store_true', help='Also time and score a full refit')
+    args = parser.parse_args()
+    output = args.output or args.models
+    started = time.perf_counter()
+
+    def load(name):
+        with open(os.path.join(args.models, name), 'rb') as f:
+            return pickle.load(f)
+
+    label_encoders = load('label_encoders.pkl')
+    condition_encoder = load('condition_encoder.pkl')
+
+    print(f"📂 Loading training set for {args.data}")
+    base = load_cached(args.data, cache_dir=args.cache_dir)
+    previous = load_cached(args.data, cache_dir=args.cache_dir, include_increments=True)
+    for feature, encoder in previous['label_encoders'].items():
+        if list(encoder.classes_) != list(label_encoders[feature].classes_):
+            raise ValueError(f"Exported {feature} vocabulary does not match the cached training set; "
+                             f"retrain with train.py first")
+    if file_digest(args.new, args.cache_dir) in previous['meta'].get('increments', []):
+        raise ValueError(f"{args.new} has already been applied")
+
+    print(f"📂 Encoding {args.new}")
+    new = encode_new_rows(args.new, label_encoders, condition_encoder)
+    print(f"✓ {len(new['y_reg']):,} new rows after cleaning")
+
+    # Rows in train.py's test split of the original data are never trained on
+    updated, reports = {}, {}
+    for task, file_name, scaler_name, X_key, y_key, classify in [
+        ('price', 'regression_model.pkl', 'scaler_reg.pkl', 'X_reg', 'y_reg', False),
+        ('condition', 'classification_model.pkl', 'scaler_clf.pkl', 'X_clf', 'y_clf', True)
+    ]:
+        test_index = train_test_split(
+            np.arange(len(base[y_key])), test_size=0.2, random_state=42,
+            stratify=base[y_key] if classify else None
+        )[1]
+        is_test = np.zeros(len(previous[y_key]), dtype=bool)
+        is_test[test_index] = True
+        old_split = (previous[X_key][~is_test], previous[X_key][is_test],
+                     previous[y_key][~is_test], previous[y_key][is_test])
+
+        print(f"\n{'💰' if task == 'price' else '🔧'} Updating {task} model")
+        updated[file_name], reports[task] = update_task(
+            load(file_name), load(scaler_name), old_split, new[X_key], new[y_key], args, classify
+        )
+
+    print(f"\n💾 Exporting to {output}")
+    os.makedirs(output, exist_ok=True)
+    if os.path.abspath(output) != os.path.abspath(args.models):
+        # Everything else (scalers, drift reference, segment models, ...) is unchanged
+        copy_artifacts(args.models, output, skip=['label_encoders.pkl', *updated, REPORT_FILE])
+    # Encoders first: the updated models may use the new codes
+    write_pickle(os.path.join(output, 'label_encoders.pkl'), new['label_encoders'])
+    for file_name, model in updated.items():
+        write_pickle(os.path.join(output, file_name), model)
+    write_version_marker(output)
+
+    append_increment(args.cache_dir, previous, new, args.new)
+    print("✓ New rows appended to the dataset cache")
+
+    total = time.perf_counter() - started
+    with open(os.path.join(output, REPORT_FILE), 'w') as f:
+        json.dump({
+            'source': os.path.abspath(args.new),
+            'seconds': total,
+            'tasks': reports
+        }, f, indent=2)
+    print(f"\n✅ Done in {total:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
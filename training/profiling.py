@@ -0,0 +1,147 @@
+"""
+Inference cost of candidate models, and selection under serving budgets
+Each fitted candidate is timed on single rows (the /predict path) and on a
+batch, and its pickled size and unpickled memory footprint are measured.
+Selection keeps the best-scoring candidate that fits the latency and memory
+budgets, and the full table (with the Pareto front) is written next to the
+exported artifacts.
+"""
+import json
+import os
+import pickle
+import time
+import tracemalloc
+import numpy as np
+
+# Rows used for timing
+SINGLE_ROW_CALLS = 200
+BATCH_ROWS = 1000
+
+REPORT_FILE = 'model_selection_report.json'
+
+
+def profile_model(model, X):
+    """
+    Measure the serving cost of a fitted model
+
+    Args:
+        model: Fitted estimator
+        X (np.ndarray): Rows to predict on (as the model expects them)
+
+    Returns:
+        dict: latency_ms_p50 / latency_ms_p95 (single row), batch_ms_per_1k,
+              size_mb (pickled), memory_mb (unpickled), load_ms
+    """
+    rows = np.asarray(X[:max(SINGLE_ROW_CALLS, BATCH_ROWS)])
+    model.predict(rows[:1])  # Warm up
+
+    timings = []
+    for i in range(min(SINGLE_ROW_CALLS, len(rows))):
+        started = time.perf_counter()
+        model.predict(rows[i:i + 1])
+        timings.append(time.perf_counter() - started)
+
+    batch = rows[:BATCH_ROWS]
+    started = time.perf_counter()
+    model.predict(batch)
+    batch_seconds = time.perf_counter() - started
+
+    payload = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    tracemalloc.start()
+    started = time.perf_counter()
+    loaded = pickle.loads(payload)
+    load_seconds = time.perf_counter() - started
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+
+    return {
+        'latency_ms_p50': float(np.percentile(timings, 50) * 1000),
+        'latency_ms_p95': float(np.percentile(timings, 95) * 1000),
+        'batch_ms_per_1k': batch_seconds * 1000 * 1000 / len(batch),
+        'size_mb': len(payload) / 1024 ** 2,
+        # Native allocations (e.g. XGBoost boosters) are not traced; the
+        # pickled size is a lower bound for them
+        'memory_mb': max(traced, len(payload)) / 1024 ** 2,
+        'load_ms': load_seconds * 1000
+    }
+
+
+def pareto_front(results, objectives):
+    """
+    Names of the candidates no other candidate beats on every objective
+
+    Args:
+        results (dict): Name -> metrics
+        objectives (dict): Metric -> 'max' or 'min'
+    """
+    def at_least_as_good(a, b):
+        return all(
+            a[metric] >= b[metric] if goal == 'max' else a[metric] <= b[metric]
+            for metric, goal in objectives.items()
+        )
+
+    return [
+        name for name, metrics in results.items()
+        if not any(
+            other != name and at_least_as_good(results[other], metrics)
+            and not at_least_as_good(metrics, results[other])
+            for other in results
+        )
+    ]
+
+
+def fits_budget(metrics, budgets):
+    """Whether a candidate's metrics are within every budget (None = no limit)"""
+    return all(limit is None or metrics[metric] <= limit for metric, limit in budgets.items())
+
+
+def select_under_budget(results, budgets, score='score'):
+    """
+    Best-scoring candidate within the serving budgets
+
+    Args:
+        results (dict): Name -> metrics (including the profile_model keys)
+        budgets (dict): Metric -> maximum allowed value (None = no limit)
+        score (str): Metric to maximize
+
+    Returns:
+        str: Selected name (the best overall if no candidate fits, with a warning)
+    """
+    feasible = [name for name, metrics in results.items() if fits_budget(metrics, budgets)]
+    for name in results:
+        results[name]['within_budget'] = name in feasible
+
+    if not feasible:
+        print("⚠️ No candidate fits the serving budget, selecting on score alone")
+        feasible = list(results)
+    return max(feasible, key=lambda name: results[name][score])
+
+
+def write_report(output_dir, tables, budgets):
+    """
+    Write the per-task candidate tables next to the exported models
+
+    Args:
+        output_dir (str): Export directory
+        tables (dict): Task -> {'selected': name, 'candidates': {name: metrics}}
+        budgets (dict): Budgets used for selection
+    """
+    objectives = {'score': 'max', 'latency_ms_p95': 'min', 'memory_mb': 'min'}
+    report = {'budgets': budgets, 'objectives': objectives, 'tasks': {}}
+
+    for task, table in tables.items():
+        front = pareto_front(table['candidates'], objectives)
+        report['tasks'][task] = {
+            'selected': table['selected'],
+            'candidates': [
+                {'model': name, **metrics, 'pareto': name in front}
+                for name, metrics in sorted(table['candidates'].items(), key=lambda item: -item[1]['score'])
+            ]
+        }
+
+    path = os.path.join(output_dir, REPORT_FILE)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Saved {REPORT_FILE}")
+    return report
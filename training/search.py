@@ -0,0 +1,431 @@
+"""
+Hyperparameter search over the notebook's tree model families
+Hyperband (or plain successive halving) over random forest, gradient
+boosting and XGBoost settings, with the number of training rows as the
+budget: many configurations are tried on a small sample of rows, and only
+the best third of each rung moves on to three times as many rows.
+
+- trials of a rung run in parallel on a process pool, on memory-mapped data
+- gradient boosting and XGBoost stop adding trees once the loss on an
+  early-stopping split stops improving (a split separate from the one
+  trials are ranked on); gradient boosting adds trees in warm-started steps
+  and is cut back to its best stage, scored with staged predictions
+- every finished trial is appended to a JSONL log; re-running with the same
+  log skips trials already done, so an interrupted search resumes
+- the winner is refitted the way its trial was fitted (same rows, same
+  early stopping) and exported in the layout ModelHandler loads; a single
+  task is only exported next to models that use the same encoders
+
+Usage (from the training directory):
+    python search.py --data ../vehicles.csv --output ../backend/models --log search_trials.jsonl
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.metrics import log_loss, mean_squared_error
+from sklearn.model_selection import train_test_split
+from sklearn.base import is_classifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import (
+    RandomForestRegressor, GradientBoostingRegressor,
+    RandomForestClassifier, GradientBoostingClassifier
+)
+from xgboost import XGBRegressor, XGBClassifier
+from dataset_cache import load_cached
+from drift_reference import build_reference, write_reference
+from model_selection import open_shared, share_array
+from artifacts import SPLIT_FILE, write_json
+from train import TEST_SIZE, SEED, regression_metrics, classification_metrics, save_artifacts, split_record
+
+# Rounds without validation improvement before boosting stops
+EARLY_STOPPING_ROUNDS = 20
+
+# Part of the training split held out per task: half stops boosting early,
+# half scores the trials
+VALIDATION_SIZE = 0.2
+
+# Changes when logged scores are no longer comparable (older trials are re-run)
+TRIAL_FORMAT = 3
+
+FAMILIES = {
+    'price': {
+        'Random Forest': RandomForestRegressor,
+        'Gradient Boosting': GradientBoostingRegressor,
+        'XGBoost': XGBRegressor
+    },
+    'condition': {
+        'Random Forest': RandomForestClassifier,
+        'Gradient Boosting': GradientBoostingClassifier,
+        'XGBoost': XGBClassifier
+    }
+}
+
+TASKS = {
+    'price': ('X_reg', 'y_reg', regression_metrics, 'r2', 'regression_model.pkl'),
+    'condition': ('X_clf', 'y_clf', classification_metrics, 'accuracy', 'classification_model.pkl')
+}
+
+
+def sample_params(family, rng):
+    """Draw one configuration of a model family (plain Python values, for the log)"""
+    def log_uniform(low, high):
+        return float(np.exp(rng.uniform(np.log(low), np.log(high))))
+
+    if family == 'Random Forest':
+        return {
+            'n_estimators': int(rng.integers(50, 301)),
+            'max_depth': int(rng.integers(8, 31)),
+            'min_samples_leaf': int(rng.integers(1, 11)),
+            'max_features': [1.0, 0.5, 'sqrt'][int(rng.integers(3))]
+        }
+    if family == 'Gradient Boosting':
+        return {
+            'n_estimators': int(rng.integers(100, 501)),
+            'max_depth': int(rng.integers(3, 9)),
+            'learning_rate': log_uniform(0.02, 0.3),
+            'subsample': float(rng.uniform(0.6, 1.0))
+        }
+    return {
+        'n_estimators': int(rng.integers(100, 801)),
+        'max_depth': int(rng.integers(3, 11)),
+        'learning_rate': log_uniform(0.01, 0.3),
+        'subsample': float(rng.uniform(0.6, 1.0)),
+        'colsample_bytree': float(rng.uniform(0.5, 1.0)),
+        'min_child_weight': log_uniform(0.5, 20)
+    }
+
+
+def make_model(task, family, params, n_jobs=1):
+    """Estimator for a configuration (random_state fixed as in the notebook)"""
+    cls = FAMILIES[task][family]
+    extra = {'random_state': 42}
+    if family == 'Random Forest':
+        extra['n_jobs'] = n_jobs
+    elif family == 'XGBoost':
+        extra['n_jobs'] = n_jobs
+        extra['early_stopping_rounds'] = EARLY_STOPPING_ROUNDS
+        if task == 'condition':
+            extra['eval_metric'] = 'mlogloss'
+    return cls(**params, **extra)
+
+
+def fit_gradient_boosting(model, X, y, X_stop, y_stop):
+    """
+    Fit gradient boosting, stopping once the loss on X_stop stops improving
+
+    Trees are added EARLY_STOPPING_ROUNDS at a time (warm start), and the
+    loss of every stage comes from staged predictions on X_stop. The fitted
+    model is cut back to its best stage, like XGBoost's best_iteration.
+    """
+    classify = is_classifier(model)
+    max_rounds = model.n_estimators
+    model.set_params(warm_start=True)
+    losses = []
+    while len(losses) < max_rounds:
+        model.set_params(n_estimators=min(len(losses) + EARLY_STOPPING_ROUNDS, max_rounds))
+        model.fit(X, y)
+        stages = model.staged_predict_proba(X_stop) if classify else model.staged_predict(X_stop)
+        for y_pred in itertools.islice(stages, len(losses), None):
+            losses.append(log_loss(y_stop, y_pred, labels=model.classes_) if classify
+                          else mean_squared_error(y_stop, y_pred))
+        if len(losses) - 1 - int(np.argmin(losses)) >= EARLY_STOPPING_ROUNDS:
+            break
+
+    rounds = int(np.argmin(losses)) + 1
+    model.estimators_ = model.estimators_[:rounds]
+    for name in ('train_score_', 'oob_improvement_', 'oob_scores_'):
+        if hasattr(model, name):
+            setattr(model, name, getattr(model, name)[:rounds])
+    model.n_estimators_ = rounds
+    model.set_params(n_estimators=rounds, warm_start=False)
+    return model
+
+
+def fit_model(model, family, X, y, X_stop, y_stop):
+    """Fit a search model, stopping boosting early on the X_stop rows"""
+    if family == 'XGBoost':
+        return model.fit(X, y, eval_set=[(X_stop, y_stop)], verbose=False)
+    if family == 'Gradient Boosting':
+        return fit_gradient_boosting(model, X, y, X_stop, y_stop)
+    return model.fit(X, y)
+
+
+def fitted_rounds(model):
+    """Trees actually used after early stopping (None for forests)"""
+    if hasattr(model, 'best_iteration'):
+        try:
+            return int(model.best_iteration) + 1
+        except AttributeError:  # Fitted without early stopping
+            return None
+    return int(getattr(model, 'n_estimators_', 0)) or None
+
+
+def _run_trial(task, family, params, rows, X_path, y_path, X_stop_path, y_stop_path, X_val_path, y_val_path,
+               evaluate, metric):
+    """
+    Fit one configuration on the first ``rows`` training rows and score it (runs in a worker)
+
+    Boosting stops early on the X_stop rows; the score comes from the X_val
+    rows, which no fit has seen.
+    """
+    started = time.perf_counter()
+    X, y = open_shared(X_path)[:rows], open_shared(y_path)[:rows]
+    X_val, y_val = open_shared(X_val_path), open_shared(y_val_path)
+
+    model = fit_model(make_model(task, family, params), family, X, y,
+                      open_shared(X_stop_path), open_shared(y_stop_path))
+    score = evaluate(y_val, model.predict(X_val))[metric]
+    return {'score': float(score), 'rounds': fitted_rounds(model), 'seconds': time.perf_counter() - started}
+
+
+def prefix_order(y, classify, seed=42):
+    """
+    Row order whose every prefix is a sample of the whole
+
+    For classification the order is stratified: each class's rows are spread
+    evenly, and every class appears within the first n_classes rows, so even
+    the smallest budget sees all conditions.
+    """
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(y))
+    if not classify:
+        return order
+    shuffled = y[order]
+    position = np.empty(len(y))
+    for value in np.unique(shuffled):
+        members = np.flatnonzero(shuffled == value)
+        position[members] = np.arange(len(members)) / len(members)
+    return order[np.argsort(position, kind='stable')]
+
+
+def search_split(X, y, classify):
+    """
+    Split a task's training rows for the search
+
+    Returns:
+        tuple: (X_fit, y_fit, X_stop, y_stop, X_val, y_val). The fit rows are
+               in prefix_order; X_stop stops boosting early and X_val ranks
+               the trials.
+    """
+    X_fit, X_held_out, y_fit, y_held_out = train_test_split(
+        X, y, test_size=VALIDATION_SIZE, random_state=42, stratify=y if classify else None
+    )
+    X_stop, X_val, y_stop, y_val = train_test_split(
+        X_held_out, y_held_out, test_size=0.5, random_state=42, stratify=y_held_out if classify else None
+    )
+    order = prefix_order(y_fit, classify)
+    return X_fit[order], y_fit[order], X_stop, y_stop, X_val, y_val
+
+
+def brackets(max_rows, min_rows, eta, mode):
+    """
+    Hyperband brackets as lists of rungs (n_configs, rows)
+
+    Successive halving is the most exploratory bracket alone.
+    """
+    s_max = max(0, int(math.floor(math.log(max_rows / min_rows, eta) + 1e-9)))
+    plan = []
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        plan.append([
+            (max(1, int(n * eta ** -i)), int(round(max_rows * eta ** (i - s))))
+            for i in range(s + 1)
+        ])
+        if mode == 'halving':
+            break
+    return plan
+
+
+class TrialLog:
+    """Append-only JSONL record of finished trials, keyed for resuming"""
+
+    def __init__(self, path):
+        self.path = path
+        self.trials = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        trial = json.loads(line)
+                        self.trials[trial['key']] = trial
+
+    @staticmethod
+    def key(fingerprint, task, family, params, rows):
+        description = json.dumps([TRIAL_FORMAT, fingerprint, task, family, params, rows], sort_keys=True)
+        return hashlib.sha256(description.encode()).hexdigest()[:16]
+
+    def append(self, trial):
+        self.trials[trial['key']] = trial
+        if self.path:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(trial) + '\n')
+
+
+def search(task, X, y, args, log, fingerprint):
+    """
+    Run Hyperband for one task
+
+    Returns:
+        dict: Best trial on the largest row budget
+    """
+    _, _, evaluate, metric, _ = TASKS[task]
+    X_fit, y_fit, X_stop, y_stop, X_val, y_val = search_split(X, y, task == 'condition')
+    families = list(FAMILIES[task])
+    plan = brackets(len(y_fit), min(args.min_rows, len(y_fit)), args.eta, args.mode)
+    deadline = time.monotonic() + args.max_minutes * 60 if args.max_minutes else None
+    best = None
+
+    with tempfile.TemporaryDirectory(prefix='search_') as directory, \
+            ProcessPoolExecutor(max_workers=args.workers or os.cpu_count() or 1) as pool:
+        paths = (
+            share_array(X_fit, directory, 'X'), share_array(y_fit, directory, 'y'),
+            share_array(X_stop, directory, 'X_stop'), share_array(y_stop, directory, 'y_stop'),
+            share_array(X_val, directory, 'X_val'), share_array(y_val, directory, 'y_val')
+        )
+
+        for bracket, rungs in enumerate(plan):
+            # Same seed per bracket, so a resumed search draws the same configurations
+            rng = np.random.default_rng([args.seed, bracket])
+            configs = [
+                (family, sample_params(family, rng))
+                for family in (families[int(i)] for i in rng.integers(len(families), size=rungs[0][0]))
+            ]
+            print(f"\n  Bracket {bracket + 1}/{len(plan)}: " +
+                  ' → '.join(f"{n} × {rows:,} rows" for n, rows in rungs))
+
+            for rung, (n_keep, rows) in enumerate(rungs):
+                if deadline and time.monotonic() > deadline:
+                    print("⚠️ Time budget reached; re-run with the same --log to resume")
+                    return best
+                configs = configs[:n_keep]
+                keys = [TrialLog.key(fingerprint, task, family, params, rows) for family, params in configs]
+                pending = [(key, config) for key, config in zip(keys, configs) if key not in log.trials]
+
+                started = time.perf_counter()
+                futures = [
+                    (key, family, params, pool.submit(
+                        _run_trial, task, family, params, rows, *paths, evaluate, metric
+                    ))
+                    for key, (family, params) in pending
+                ]
+                for key, family, params, future in futures:
+                    log.append({
+                        'key': key, 'task': task, 'bracket': bracket, 'rung': rung, 'rows': rows,
+                        'family': family, 'params': params, **future.result()
+                    })
+
+                results = sorted(
+                    ((log.trials[key], config) for key, config in zip(keys, configs)),
+                    key=lambda item: -item[0]['score']
+                )
+                configs = [config for _, config in results]
+                top = results[0][0]
+                print(f"    {len(configs)} trial(s) on {rows:,} rows ({len(configs) - len(pending)} from log) "
+                      f"in {time.perf_counter() - started:.1f}s, best {metric}={top['score']:.4f} "
+                      f"({top['family']})")
+
+                if rows == len(y_fit) and (best is None or top['score'] > best['score']):
+                    best = top
+    return best
+
+
+def same_encoders(models_dir, data):
+    """Whether models_dir holds the label and condition encoders of data"""
+    try:
+        with open(os.path.join(models_dir, 'label_encoders.pkl'), 'rb') as f:
+            label_encoders = pickle.load(f)
+        with open(os.path.join(models_dir, 'condition_encoder.pkl'), 'rb') as f:
+            condition_encoder = pickle.load(f)
+    except FileNotFoundError:
+        return False
+    return (
+        label_encoders.keys() == data['label_encoders'].keys()
+        and all(list(encoder.classes_) == list(data['label_encoders'][feature].classes_)
+                for feature, encoder in label_encoders.items())
+        and list(condition_encoder.classes_) == list(data['condition_encoder'].classes_)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hyperband search over the tree model families')
+    parser.add_argument('--data', default='../vehicles.csv', help='Path to vehicles.csv (or a clean.py directory)')
+    parser.add_argument('--output', default='../backend/models', help='Directory for the exported models')
+    parser.add_argument('--task', choices=['price', 'condition', 'both'], default='both')
+    parser.add_argument('--mode', choices=['hyperband', 'halving'], default='hyperband',
+                        help='All Hyperband brackets, or successive halving only')
+    parser.add_argument('--min-rows', type=int, default=2000, help='Smallest row budget')
+    parser.add_argument('--eta', type=int, default=3, help='Keep 1/eta of the trials per rung')
+    parser.add_argument('--log', default='search_trials.jsonl', help='Trial log (resumes from it)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for sampling configurations')
+    parser.add_argument('--workers', type=int, default=None, help='Processes (default: CPU count)')
+    parser.add_argument('--max-minutes', type=float, default=None,
+                        help='Stop starting new rungs after this long (resume later)')
+    parser.add_argument('--cache-dir', default='.dataset_cache', help='Cache of the cleaned, encoded matrices')
+    args = parser.parse_args()
+    started = time.perf_counter()
+
+    print(f"📂 Loading {args.data}")
+    data = load_cached(args.data, cache_dir=args.cache_dir)
+    if args.task != 'both' and not same_encoders(args.output, data):
+        # The other task's exported model expects the codes of the exported encoders
+        raise ValueError(f"{args.output} has no models using the encoders of {args.data}; "
+                         f"search both tasks (--task both) to export there")
+    drift_reference = build_reference(data, args.data)
+    training_split = split_record(args.data, data, None, False)
+    log = TrialLog(args.log)
+    if log.trials:
+        print(f"✓ {len(log.trials)} trial(s) in {args.log}")
+
+    artifacts, report = {}, {}
+    for task in (['price', 'condition'] if args.task == 'both' else [args.task]):
+        X_key, y_key, evaluate, metric, file_name = TASKS[task]
+        classify = task == 'condition'
+        print(f"\n{'💰' if task == 'price' else '🔧'} Searching {task} models")
+
+        # Same split as train.py; the search only sees the training rows
+        X_train, X_test, y_train, y_test = train_test_split(
+            data[X_key], data[y_key], test_size=TEST_SIZE, random_state=SEED,
+            stratify=data[y_key] if classify else None
+        )
+        best = search(task, X_train, y_train, args, log, data['cache_key'])
+        if best is None:
+            print(f"⚠️ No {task} trial reached the full row budget; nothing exported")
+            continue
+
+        # Refitted as in its trial: the same rows, stopping early on the same split
+        print(f"🏆 {best['family']} {best['params']}")
+        X_fit, y_fit, X_stop, y_stop, _, _ = search_split(X_train, y_train, classify)
+        model = fit_model(make_model(task, best['family'], best['params'], n_jobs=-1), best['family'],
+                          X_fit, y_fit, X_stop, y_stop)
+        test_metrics = evaluate(y_test, model.predict(X_test))
+        print("  Test: " + ', '.join(f"{key}={value:.4f}" for key, value in test_metrics.items()))
+
+        artifacts[file_name] = model
+        artifacts['scaler_reg.pkl' if task == 'price' else 'scaler_clf.pkl'] = StandardScaler().fit(X_train)
+        report[task] = {'family': best['family'], 'params': best['params'], 'rounds': fitted_rounds(model),
+                        'validation': best['score'], 'test': test_metrics}
+
+    if artifacts:
+        print(f"\n💾 Exporting to {args.output}")
+        save_artifacts(args.output, {
+            **artifacts,
+            'label_encoders.pkl': data['label_encoders'],
+            'condition_encoder.pkl': data['condition_encoder']
+        })
+        write_reference(args.output, drift_reference)
+        write_json(os.path.join(args.output, SPLIT_FILE), training_split)
+        with open(os.path.join(args.output, 'search_report.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+    print(f"\n✅ Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+import data as dataset
+from clean import BloomFilter, clean
+
+
+def random_keys(rng, n):
+    return rng.integers(0, 2 ** 63, n, dtype=np.uint64), rng.integers(0, 2 ** 63, n, dtype=np.uint64)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    rng = np.random.default_rng(0)
+    seen = BloomFilter(10000, error_rate=1e-3)
+    h1, h2 = random_keys(rng, 10000)
+
+    assert not seen.contains(h1, h2).any()
+    seen.add(h1, h2)
+    assert seen.contains(h1, h2).all()
+    assert seen.count == 10000
+
+
+def test_bloom_filter_false_positive_rate():
+    rng = np.random.default_rng(1)
+    seen = BloomFilter(10000, error_rate=1e-3)
+    seen.add(*random_keys(rng, 10000))
+
+    assert seen.contains(*random_keys(rng, 200000)).mean() < 3e-3
+
+
+def listing(vin='', price=9000, odometer=80000, state='ca', year=2015):
+    return {
+        'VIN': vin, 'price': price, 'year': year, 'odometer': odometer, 'lat': 34.0, 'long': -118.2,
+        'manufacturer': 'toyota', 'model': 'camry', 'cylinders': '4 cylinders', 'fuel': 'gas',
+        'title_status': 'clean', 'transmission': 'automatic', 'drive': 'fwd', 'size': 'mid-size',
+        'type': 'sedan', 'paint_color': 'white', 'state': state, 'region': 'los angeles',
+        'condition': 'good', 'url': 'https://example.com/listing'
+    }
+
+
+@pytest.fixture
+def raw_path(tmp_path):
+    rows = [
+        listing(vin='1HGCM82633A004352', price=9000),
+        listing(odometer=50000),
+        listing(odometer=50000),                       # repost in the same chunk
+        listing(vin='1hgcm82633a004352 ', price=8500),  # same VIN, new price, next chunk
+        listing(odometer=50000, state='tx'),           # different content
+        listing(vin='2T1BURHE0JC000001', odometer=50000),  # content repost, but its own VIN
+        listing(odometer=50000),                       # repost of a listing two chunks back
+        listing(odometer=60000, price=0),              # fails cleaning
+    ]
+    path = tmp_path / 'vehicles.csv'
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_clean_drops_reposts_across_chunks(raw_path, tmp_path):
+    output = str(tmp_path / 'vehicles_clean')
+    stats = clean(str(raw_path), output, {'chunk_size': 3}, expected_rows=1000)
+
+    assert stats['rows_read'] == 8
+    assert stats['rows_cleaned'] == 7
+    assert stats['duplicates_by_vin'] == 1
+    assert stats['duplicates_by_content'] == 2
+    assert stats['rows_written'] == 4
+
+    df = dataset.read_partitions(output)
+    assert len(df) == 4
+    assert sorted(df['state'].astype(str)) == ['ca', 'ca', 'ca', 'tx']
+    assert 9000 in df['price'].tolist() and 8500 not in df['price'].tolist()
+
+
+def test_clean_without_dedup_keeps_reposts(raw_path, tmp_path):
+    output = str(tmp_path / 'vehicles_clean')
+    stats = clean(str(raw_path), output, {'chunk_size': 3}, dedup=False)
+
+    assert stats['rows_written'] == 7
+    assert 'bloom_filter' not in stats
+    assert len(dataset.read_partitions(output)) == 7
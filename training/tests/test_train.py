@@ -0,0 +1,55 @@
+import weakref
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.preprocessing import StandardScaler
+import train
+from train import select_model, regression_metrics
+
+LIVE = weakref.WeakSet()
+
+
+class Constant(BaseEstimator, RegressorMixin):
+    """Predicts a constant; padding makes its pickle larger"""
+
+    def __init__(self, value=0.0, padding=0):
+        self.value = value
+        self.padding = padding
+
+    def fit(self, X, y):
+        self.padding_ = b'x' * self.padding
+        LIVE.add(self)
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.value)
+
+
+def test_select_model_keeps_only_selectable_models(monkeypatch):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 3))
+    y = rng.normal(size=400)
+    split = (X[:300], X[300:], y[:300], y[300:])
+
+    alive = []
+    profile_model = train.profile_model
+
+    def profile_and_count(model, X_eval):
+        alive.append(len(LIVE))
+        return profile_model(model, X_eval)
+
+    monkeypatch.setattr(train, 'profile_model', profile_and_count)
+    models = {
+        'exact': Constant(0.0, padding=2 * 1024 ** 2),
+        'near': Constant(0.3),
+        'far': Constant(2.0),
+        'farther': Constant(3.0)
+    }
+    best, model, results = select_model(models, split, StandardScaler().fit(split[0]), regression_metrics, 'r2',
+                                        budgets={'size_mb': 1})
+
+    # 'exact' scores best but is over budget
+    assert best == 'near'
+    assert isinstance(model, Constant) and model.value == 0.3
+    assert [results[name]['within_budget'] for name in models] == [False, True, True, True]
+    # Only the best overall and the best within budget outlive their scoring
+    assert alive == [1, 2, 3, 3]
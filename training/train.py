@@ -0,0 +1,295 @@
+"""
+Train the price and condition models and export the backend artifacts
+
+Scripted version of Vehicle_Price_and_Condition.ipynb: same cleaning, models,
+split and selection, but the data is loaded with compact dtypes (see data.py)
+and only the encoded matrices are kept in memory.
+
+Usage (from the training directory):
+    python train.py --data ../vehicles.csv --output ../backend/models
+    python train.py --data ../vehicles.csv --include-increments   # plus rows added by incremental.py
+"""
+import argparse
+import os
+import time
+import tracemalloc
+import numpy as np
+from sklearn.base import clone
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split, KFold, StratifiedKFold
+from sklearn.linear_model import LinearRegression, Ridge, LogisticRegression
+from sklearn.ensemble import (
+    RandomForestRegressor, GradientBoostingRegressor,
+    RandomForestClassifier, GradientBoostingClassifier
+)
+from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error, accuracy_score, f1_score
+from xgboost import XGBRegressor, XGBClassifier
+from artifacts import SPLIT_FILE, write_json, write_pickle, write_version_marker
+from data import load_training_data
+from dataset_cache import load_cached
+from drift_reference import build_reference, write_reference
+from model_selection import cross_validate_models
+from profiling import fits_budget, profile_model, select_under_budget, write_report
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Models trained on standardized features (as in the notebook)
+SCALED_MODELS = {'Linear Regression', 'Ridge', 'Logistic Regression'}
+
+# Train/test split of both tasks (recorded in artifacts.SPLIT_FILE)
+TEST_SIZE = 0.2
+SEED = 42
+
+
+def regression_models():
+    """Candidate price models (same settings as the notebook)"""
+    return {
+        'Linear Regression': LinearRegression(),
+        'Ridge': Ridge(alpha=100, random_state=42),
+        'Random Forest': RandomForestRegressor(n_estimators=100, max_depth=20, random_state=42, n_jobs=-1),
+        'Gradient Boosting': GradientBoostingRegressor(n_estimators=100, max_depth=5, random_state=42),
+        'XGBoost': XGBRegressor(n_estimators=100, max_depth=7, learning_rate=0.1, random_state=42, n_jobs=-1)
+    }
+
+
+def classification_models():
+    """Candidate condition models (same settings as the notebook)"""
+    return {
+        'Logistic Regression': LogisticRegression(max_iter=1000, random_state=42),
+        'Random Forest': RandomForestClassifier(n_estimators=100, max_depth=20, random_state=42, n_jobs=-1),
+        'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, max_depth=5, random_state=42),
+        'XGBoost': XGBClassifier(n_estimators=100, max_depth=7, learning_rate=0.1, random_state=42,
+                                 n_jobs=-1, eval_metric='mlogloss')
+    }
+
+
+class MemoryReport:
+    def __init__(self, trace=False):
+        """
+        Report peak memory after each training stage
+
+        Args:
+            trace (bool): Also trace Python/numpy allocations with tracemalloc
+                          (slower, but shows the peak of each stage)
+        """
+        self.trace = trace
+        if trace:
+            tracemalloc.start()
+
+    def stage(self, name):
+        """Print the peak memory so far (and of the stage, when tracing)"""
+        parts = []
+        if resource is not None:
+            # ru_maxrss is in KB on Linux, bytes on macOS
+            scale = 1024 ** 2 if os.uname().sysname == 'Darwin' else 1024
+            parts.append(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale:,.0f} MB")
+        if self.trace:
+            _, peak = tracemalloc.get_traced_memory()
+            parts.append(f"stage peak {peak / 1024 ** 2:,.0f} MB")
+            tracemalloc.reset_peak()
+        print(f"📈 {name}: {', '.join(parts) or 'memory usage unavailable'}")
+
+
+def select_model(models, split, scaler, evaluate, rank_metric, cv=None, X_all=None, y_all=None, n_workers=None,
+                 budgets=None):
+    """
+    Fit every candidate on the training split and pick the best one within budget
+
+    Candidates are fitted one at a time and profiled right after scoring.
+    Only the models that can still be selected (the best within budget and
+    the best overall, the fallback when nothing fits) are kept in memory.
+
+    Args:
+        models (dict): Name -> unfitted estimator
+        split (tuple): (X_train, X_test, y_train, y_test)
+        scaler (StandardScaler): Fitted on X_train, used for SCALED_MODELS
+        evaluate (callable): (y_true, y_pred) -> dict of test metrics
+        rank_metric (str): Test metric that ranks the models
+        cv: Optional splitter; when given, models are ranked by the mean of
+            rank_metric over its folds on (X_all, y_all), as in the notebook
+        n_workers (int): Processes for the cross-validation fits
+        budgets (dict): Serving budgets, e.g. {'latency_ms_p95': 5, 'memory_mb': 200}
+
+    Returns:
+        tuple: (best name, fitted best model, dict of metrics per model)
+    """
+    X_train, X_test, y_train, y_test = split
+    X_train_scaled = scaler.transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    cv_results = {}
+    if cv is not None:
+        cv_results = cross_validate_models(models, X_all, y_all, cv, evaluate, SCALED_MODELS, n_workers)
+
+    budgets = budgets or {}
+    results, kept = {}, {}
+    for name, model in models.items():
+        scaled = name in SCALED_MODELS
+        started = time.perf_counter()
+        fitted = clone(model).fit(X_train_scaled if scaled else X_train, y_train)
+        results[name] = evaluate(y_test, fitted.predict(X_test_scaled if scaled else X_test))
+        score = results[name][rank_metric]
+
+        if cv is not None:
+            score = cv_results[name][f'{rank_metric}_mean']
+            results[name][f'cv_{rank_metric}'] = score
+        results[name]['score'] = score
+
+        metrics = ', '.join(f"{key}={value:.4f}" for key, value in results[name].items() if key != 'score')
+        print(f"  {name}: {metrics} ({time.perf_counter() - started:.1f}s)")
+
+        cost = profile_model(fitted, X_test_scaled if scaled else X_test)
+        results[name].update(cost)
+        print(f"    latency p50/p95 {cost['latency_ms_p50']:.2f}/{cost['latency_ms_p95']:.2f} ms, "
+              f"{cost['batch_ms_per_1k']:.1f} ms per 1k rows, {cost['size_mb']:.1f} MB pickled, "
+              f"{cost['memory_mb']:.1f} MB in memory, loads in {cost['load_ms']:.0f} ms")
+
+        # Drop every model select_under_budget can no longer return
+        kept[name] = fitted
+        del fitted
+        feasible = [other for other in results if fits_budget(results[other], budgets)]
+        keep = {max(results, key=lambda other: results[other]['score'])}
+        if feasible:
+            keep.add(max(feasible, key=lambda other: results[other]['score']))
+        kept = {other: kept[other] for other in kept if other in keep}
+
+    best_name = select_under_budget(results, budgets)
+    return best_name, kept[best_name], results
+
+
+def regression_metrics(y_true, y_pred):
+    return {
+        'r2': r2_score(y_true, y_pred),
+        'mae': mean_absolute_error(y_true, y_pred),
+        'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred)))
+    }
+
+
+def classification_metrics(y_true, y_pred):
+    return {
+        'accuracy': accuracy_score(y_true, y_pred),
+        'f1': f1_score(y_true, y_pred, average='weighted')
+    }
+
+
+def split_record(data_path, data, config, include_increments):
+    """Rows and split of an export, for SPLIT_FILE (compress.py rebuilds the held-out rows from it)"""
+    return {
+        'data': os.path.abspath(data_path),
+        'config': config,
+        'include_increments': include_increments,
+        'cache_key': data.get('cache_key'),
+        'test_size': TEST_SIZE,
+        'random_state': SEED,
+        'rows': {'price': len(data['y_reg']), 'condition': len(data['y_clf'])}
+    }
+
+
+def save_artifacts(output_dir, artifacts):
+    """Write the pickles ModelHandler.load_models expects, then the version marker"""
+    os.makedirs(output_dir, exist_ok=True)
+    for name, obj in artifacts.items():
+        write_pickle(os.path.join(output_dir, name), obj)
+    write_version_marker(output_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train and export the vehicle price and condition models')
+    parser.add_argument('--data', default='../vehicles.csv',
+                        help='Path to vehicles.csv, or a Parquet directory written by clean.py')
+    parser.add_argument('--output', default='../backend/models', help='Directory for the exported models')
+    parser.add_argument('--states', nargs='+', default=None, help='Train on these states only')
+    parser.add_argument('--years', type=int, nargs=2, default=None, metavar=('FIRST', 'LAST'),
+                        help='Train on these model years only (inclusive)')
+    parser.add_argument('--no-cv', action='store_true',
+                        help='Select models on the test split instead of 5-fold cross-validation')
+    parser.add_argument('--max-latency-ms', type=float, default=None,
+                        help='Serving budget: p95 single-row prediction latency')
+    parser.add_argument('--max-memory-mb', type=float, default=None,
+                        help='Serving budget: in-memory size of a model')
+    parser.add_argument('--max-size-mb', type=float, default=None,
+                        help='Serving budget: pickled size of a model')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes for cross-validation (default: CPU count)')
+    parser.add_argument('--cache-dir', default='.dataset_cache', help='Cache of the cleaned, encoded matrices')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the CSV')
+    parser.add_argument('--include-increments', action='store_true',
+                        help='Also train on the listings appended by incremental.py, keeping their '
+                             'extended (code-stable) label encoders')
+    parser.add_argument('--trace-memory', action='store_true', help='Report per-stage peaks with tracemalloc')
+    args = parser.parse_args()
+    if args.no_cache and args.include_increments:
+        parser.error('--include-increments reads the dataset cache; drop --no-cache')
+
+    memory = MemoryReport(trace=args.trace_memory)
+    budgets = {
+        'latency_ms_p95': args.max_latency_ms,
+        'memory_mb': args.max_memory_mb,
+        'size_mb': args.max_size_mb
+    }
+    config = {'states': args.states, 'years': args.years}
+    started = time.perf_counter()
+
+    print(f"📂 Loading {args.data}")
+    if args.no_cache:
+        data = load_training_data(args.data, config)
+    else:
+        # Increments carry the encoders incremental.py extended, so codes stay stable
+        data = load_cached(args.data, config, cache_dir=args.cache_dir, include_increments=args.include_increments)
+    print(f"✓ {len(data['y_reg']):,} rows after cleaning")
+    training_split = split_record(args.data, data, config, args.include_increments)
+    drift_reference = build_reference(data, args.data)
+    memory.stage('Load & encode')
+
+    # ==================== REGRESSION ====================
+    print("\n💰 Price models")
+    split = train_test_split(data['X_reg'], data['y_reg'], test_size=TEST_SIZE, random_state=SEED)
+    scaler_reg = StandardScaler().fit(split[0])
+    best_reg, regression_model, reg_results = select_model(
+        regression_models(), split, scaler_reg, regression_metrics, 'r2',
+        cv=None if args.no_cv else KFold(n_splits=5, shuffle=True, random_state=42),
+        X_all=data['X_reg'], y_all=data['y_reg'], n_workers=args.workers, budgets=budgets
+    )
+    print(f"🏆 Best price model: {best_reg}")
+    del split, data['X_reg'], data['y_reg']
+    memory.stage('Price models')
+
+    # ==================== CLASSIFICATION ====================
+    print("\n🔧 Condition models")
+    split = train_test_split(data['X_clf'], data['y_clf'], test_size=TEST_SIZE, random_state=SEED,
+                             stratify=data['y_clf'])
+    scaler_clf = StandardScaler().fit(split[0])
+    best_clf, classification_model, clf_results = select_model(
+        classification_models(), split, scaler_clf, classification_metrics, 'accuracy',
+        cv=None if args.no_cv else StratifiedKFold(n_splits=5, shuffle=True, random_state=42),
+        X_all=data['X_clf'], y_all=data['y_clf'], n_workers=args.workers, budgets=budgets
+    )
+    print(f"🏆 Best condition model: {best_clf}")
+    memory.stage('Condition models')
+
+    # ==================== EXPORT ====================
+    print(f"\n💾 Exporting to {args.output}")
+    save_artifacts(args.output, {
+        'regression_model.pkl': regression_model,
+        'classification_model.pkl': classification_model,
+        'scaler_reg.pkl': scaler_reg,
+        'scaler_clf.pkl': scaler_clf,
+        'label_encoders.pkl': data['label_encoders'],
+        'condition_encoder.pkl': data['condition_encoder']
+    })
+    write_reference(args.output, drift_reference)
+    write_json(os.path.join(args.output, SPLIT_FILE), training_split)
+    write_report(args.output, {
+        'price': {'selected': best_reg, 'candidates': reg_results},
+        'condition': {'selected': best_clf, 'candidates': clf_results}
+    }, budgets)
+
+    print(f"\n✅ Done in {time.perf_counter() - started:.1f}s")
+    memory.stage('Total')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Train per-segment models and write the backend's segment manifest
+Each segment is a group of values of one routing field (e.g. luxury makes,
+or a cluster of states). Its model is trained on the rows of that group only,
+with the global encoders and feature order, and compared with the global
+model on the same test rows. ModelHandler routes matching requests to it.
+
+Usage (from the training directory):
+    python train_segments.py --task price --route-by manufacturer \
+        --segment luxury=bmw,mercedes-benz,audi,lexus --segment trucks=ram,gmc
+"""
+import argparse
+import json
+import os
+import pickle
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+import data as dataset
+from artifacts import write_json, write_pickle, write_version_marker
+from dataset_cache import load_cached
+from train import regression_models, classification_models, regression_metrics, classification_metrics
+
+MANIFEST_FILE = 'segments.json'
+SEGMENTS_DIR = 'segments'
+
+
+def parse_segment(value):
+    """"name=value1,value2" -> (name, [values])"""
+    name, _, values = value.partition('=')
+    values = [item.strip() for item in values.split(',') if item.strip()]
+    if not name or not values:
+        raise argparse.ArgumentTypeError(f"Expected NAME=VALUE[,VALUE...], got '{value}'")
+    return name.strip(), values
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train segment models for ModelHandler')
+    parser.add_argument('--data', default='../vehicles.csv', help='Path to vehicles.csv (or a clean.py directory)')
+    parser.add_argument('--models', default='../backend/models', help='Exported models (manifest is written here)')
+    parser.add_argument('--task', choices=['price', 'condition'], required=True)
+    parser.add_argument('--route-by', required=True, help='Categorical field that selects the segment')
+    parser.add_argument('--segment', type=parse_segment, action='append', required=True,
+                        help='NAME=VALUE[,VALUE...] (repeatable)')
+    parser.add_argument('--model', default='Random Forest', help='Model family (as named in train.py)')
+    parser.add_argument('--min-rows', type=int, default=1000, help='Skip segments with fewer training rows')
+    parser.add_argument('--cache-dir', default='.dataset_cache', help='Cache of the cleaned, encoded matrices')
+    args = parser.parse_args()
+
+    classify = args.task == 'condition'
+    X_key, y_key = ('X_clf', 'y_clf') if classify else ('X_reg', 'y_reg')
+    evaluate, metric = (classification_metrics, 'accuracy') if classify else (regression_metrics, 'r2')
+    families = classification_models() if classify else regression_models()
+    if args.model not in families:
+        parser.error(f"--model must be one of: {', '.join(families)}")
+
+    data = load_cached(args.data, cache_dir=args.cache_dir)
+    features = dataset.CLASSIFICATION_FEATURES if classify else dataset.REGRESSION_FEATURES
+    encoder = data['label_encoders'].get(args.route_by)
+    if encoder is None or args.route_by not in features:
+        parser.error(f"--route-by must be a categorical feature: {', '.join(data['label_encoders'])}")
+
+    # train.py's split, so the global model is compared on rows it never saw
+    X, y = data[X_key], data[y_key]
+    is_test = np.zeros(len(y), dtype=bool)
+    is_test[train_test_split(np.arange(len(y)), test_size=0.2, random_state=42,
+                             stratify=y if classify else None)[1]] = True
+    route_codes = np.asarray(X[:, features.index(args.route_by)], dtype=np.int64)
+
+    with open(os.path.join(args.models, 'classification_model.pkl' if classify else 'regression_model.pkl'), 'rb') as f:
+        global_model = pickle.load(f)
+
+    os.makedirs(os.path.join(args.models, SEGMENTS_DIR), exist_ok=True)
+    segments = {}
+    for name, values in args.segment:
+        unknown = [value for value in values if value not in encoder.classes_]
+        if unknown:
+            print(f"⚠️ {name}: unknown {args.route_by} value(s) {', '.join(unknown)}")
+        codes = [int(np.flatnonzero(encoder.classes_ == value)[0]) for value in values if value not in unknown]
+        in_segment = np.isin(route_codes, codes)
+        train_rows, test_rows = np.flatnonzero(in_segment & ~is_test), np.flatnonzero(in_segment & is_test)
+        if len(train_rows) < args.min_rows:
+            print(f"⚠️ {name}: {len(train_rows)} training rows, skipped")
+            continue
+        if classify and args.model == 'XGBoost' and len(np.unique(y[train_rows])) < len(data['condition_encoder'].classes_):
+            print(f"⚠️ {name}: not every condition occurs, which XGBoost cannot train on; skipped")
+            continue
+
+        model = clone(families[args.model]).fit(X[train_rows], y[train_rows])
+        segment_score = evaluate(y[test_rows], model.predict(X[test_rows]))[metric]
+        global_score = evaluate(y[test_rows], global_model.predict(X[test_rows]))[metric]
+        print(f"  {name}: {len(train_rows):,} rows, {metric} {segment_score:.4f} "
+              f"(global model {global_score:.4f} on the same rows)")
+
+        file_name = f"{SEGMENTS_DIR}/{args.task}_{name}.pkl"
+        write_pickle(os.path.join(args.models, file_name), model)
+        segments[name] = {'model': file_name, 'values': values, metric: segment_score, f'global_{metric}': global_score}
+
+    # Other tasks' segments are kept; written last so the backend never sees missing files
+    manifest_path = os.path.join(args.models, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    manifest[args.task] = {'route_by': args.route_by, 'segments': segments}
+    write_json(manifest_path, manifest)
+    write_version_marker(args.models)
+    print(f"\n✅ {len(segments)} {args.task} segment model(s) written to {manifest_path}")
+
+
+if __name__ == '__main__':
+    main()